@@ -0,0 +1,116 @@
+"""
+AWS client setup costs: metric-logging throughput and Lambda init time.
+
+Metric logging compares the old per-call path (three fresh boto3 clients for
+every metric, as setup_aws_clients() used to do) with the cached client behind
+training/utils.put_metric_data, against a local stub CloudWatch endpoint.
+Init time loads each lambda/*/app.py in a fresh interpreter after importing
+boto3, so the number is what the module itself adds to a cold start.
+
+    python benchmarks/bench_aws_clients.py
+    python benchmarks/bench_aws_clients.py --calls 500 --threads 8
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from bench_metrics_backend import start_stub_cloudwatch
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+LAMBDAS = ['Lambda-Greengrass-Creation', 'Lambda-Neo-Compilation', 'Lambda-SageMaker-Training-Job',
+           'Lambda-WebSocket', 'model_alarm_response', 'model_monitoring']
+
+PROBE = """
+import importlib.util, json, sys, time
+start = time.perf_counter()
+import boto3
+imported = time.perf_counter()
+sys.path.insert(0, {lambda_dir!r})
+spec = importlib.util.spec_from_file_location('app', {path!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+print(json.dumps({{'boto3_ms': (imported - start) * 1000, 'init_ms': (time.perf_counter() - imported) * 1000}}))
+"""
+
+
+def probe_init(name: str, env: dict) -> dict:
+    lambda_dir = os.path.join(ROOT, 'lambda', name)
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(lambda_dir=lambda_dir, path=os.path.join(lambda_dir, 'app.py'))],
+        capture_output=True, text=True, check=True, env=env
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def per_call_clients_log_metric(name: str, value: float) -> None:
+    """The old log_metric: three new clients per metric."""
+    import boto3
+    clients = {
+        'sagemaker': boto3.client('sagemaker'),
+        'cloudwatch': boto3.client('cloudwatch'),
+        'runtime': boto3.client('sagemaker-runtime')
+    }
+    clients['cloudwatch'].put_metric_data(
+        Namespace='MLOps/ModelMetrics',
+        MetricData=[{'MetricName': name, 'Value': value, 'Unit': 'None',
+                     'Timestamp': datetime.now(timezone.utc), 'Dimensions': []}]
+    )
+
+
+def throughput(log_metric, calls: int, threads: int) -> float:
+    log_metric('Warmup', 0.0)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda i: log_metric('BenchmarkMetric', float(i)), range(calls)))
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AWS client setup costs.")
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    os.environ.update({
+        'AWS_DEFAULT_REGION': 'eu-west-2',
+        'AWS_ACCESS_KEY_ID': 'benchmark',
+        'AWS_SECRET_ACCESS_KEY': 'benchmark',
+        'AWS_ENDPOINT_URL_CLOUDWATCH': start_stub_cloudwatch(0.0),
+        'METRICS_BACKEND': 'api',
+    })
+    logging.disable(logging.CRITICAL)
+
+    sys.path.insert(0, os.path.join(ROOT, 'training'))
+    spec = importlib.util.spec_from_file_location('training_utils', os.path.join(ROOT, 'training', 'utils.py'))
+    utils = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(utils)
+
+    def cached_client_log_metric(name: str, value: float) -> None:
+        utils.put_metric_data([{'MetricName': name, 'Value': value, 'Unit': 'None',
+                                'Timestamp': datetime.now(timezone.utc), 'Dimensions': []}])
+
+    print(f"{'metric logging':<28}{'threads':>8}{'metrics/s':>12}")
+    for label, log_metric in (('per-call clients (old)', per_call_clients_log_metric),
+                              ('cached client', cached_client_log_metric)):
+        for threads in sorted({1, args.threads}):
+            print(f"{label:<28}{threads:>8}{throughput(log_metric, args.calls, threads):>12.0f}")
+
+    with tempfile.TemporaryDirectory() as baseline_dir:
+        env = dict(os.environ, SAGEMAKER_ROLE_ARN='arn:aws:iam::000000000000:role/benchmark',
+                   BASELINE_STORE='file', BASELINE_DIR=baseline_dir)
+        print(f"\n{'lambda init':<32}{'boto3 import (ms)':>18}{'app init (ms)':>15}")
+        for name in LAMBDAS:
+            result = probe_init(name, env)
+            print(f"{name:<32}{result['boto3_ms']:>18.1f}{result['init_ms']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Throughput of the Greengrass LSTM function with micro-batching on vs off.
+
+Keras `predict` has a large fixed cost per call on top of the per-sample work,
+so the stand-in predict below models that as a fixed overhead plus a cost
+proportional to batch size. Tune both to match what you measure on a device.
+
+    python benchmarks/bench_batching.py --events 2000 --call-overhead-ms 2
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'Lambda-Greengrass-LSTM'))
+
+from batching import MicroBatcher
+
+
+def make_predict(call_overhead_ms: float, per_sample_us: float):
+    def predict(batch: np.ndarray) -> np.ndarray:
+        time.sleep((call_overhead_ms / 1000.0) + (per_sample_us / 1e6) * batch.shape[0])
+        return batch.mean(axis=1)
+    return predict
+
+
+def run_unbatched(windows, predict) -> float:
+    start = time.perf_counter()
+    for window in windows:
+        predict(window.reshape(1, -1, 1)).tolist()
+    return len(windows) / (time.perf_counter() - start)
+
+
+def run_batched(windows, predict, max_batch_size: int, max_wait_ms: float) -> float:
+    done = []
+    batcher = MicroBatcher(predict, lambda pid, pred: done.append(pid),
+                           max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    batcher.start()
+    start = time.perf_counter()
+    for i, window in enumerate(windows):
+        batcher.submit(f'patient-{i % 500}', window)
+    while len(done) < len(windows):
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    batcher.stop()
+    return len(windows) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--window', type=int, default=60)
+    parser.add_argument('--call-overhead-ms', type=float, default=2.0)
+    parser.add_argument('--per-sample-us', type=float, default=20.0)
+    parser.add_argument('--max-wait-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    windows = [rng.normal(size=args.window).astype(np.float32) for _ in range(args.events)]
+    predict = make_predict(args.call_overhead_ms, args.per_sample_us)
+
+    print(f"{'mode':<24}{'events/sec':>12}")
+    print(f"{'unbatched':<24}{run_unbatched(windows, predict):>12.0f}")
+    for batch_size in (8, 32, 64, 128):
+        rate = run_batched(windows, predict, batch_size, args.max_wait_ms)
+        print(f"{f'batched (max {batch_size})':<24}{rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Cold-start profile of every lambda/*/app.py.
+
+Each app is loaded in a fresh interpreter with `-X importtime`, which gives
+the cost of every module it imports. The init phase is split into imports
+and the rest of the module body (client and config setup), and for the
+lambdas whose handlers can run offline the first invocation with an
+invalid event is timed too, since deferred work lands there.
+
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --lambda model_monitoring --top 15
+    python benchmarks/bench_cold_start.py --json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Any, Dict, List
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+LAMBDA_ROOT = os.path.join(ROOT, 'lambda')
+
+# Handlers that can be invoked without AWS access: these events fail validation
+OFFLINE_EVENTS = {
+    'model_monitoring': ('handler', {}),
+    'model_alarm_response': ('handler', {}),
+}
+
+MARKER = '--- app init ---'
+
+PROBE = """
+import importlib.util, json, sys, time
+sys.path.insert(0, {lambda_dir!r})
+sys.stderr.write({marker!r} + '\\n')
+sys.stderr.flush()
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('app', {path!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+loaded = time.perf_counter()
+result = {{'init_ms': (loaded - start) * 1000}}
+if {handler!r}:
+    getattr(module, {handler!r})({event!r}, None)
+    result['first_invoke_ms'] = (time.perf_counter() - loaded) * 1000
+print(json.dumps(result))
+"""
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Imports made while loading the app, as (module, self_us, cumulative_us, depth)."""
+    imports = []
+    seen_marker = False
+    for line in stderr.splitlines():
+        if line == MARKER:
+            seen_marker = True
+            continue
+        match = IMPORT_LINE.match(line)
+        if seen_marker and match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append({'module': module, 'self_us': int(self_us),
+                            'cumulative_us': int(cumulative_us), 'depth': len(indent) // 2})
+    return imports
+
+
+def profile(name: str, env: Dict[str, str]) -> Dict[str, Any]:
+    lambda_dir = os.path.join(LAMBDA_ROOT, name)
+    handler, event = OFFLINE_EVENTS.get(name, (None, None))
+    code = PROBE.format(lambda_dir=lambda_dir, path=os.path.join(lambda_dir, 'app.py'),
+                        marker=MARKER, handler=handler, event=event)
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                               capture_output=True, text=True, check=True, env=env)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(completed.stderr)
+
+    # Imports nest, so only top-level ones add up to the total
+    import_ms = sum(entry['cumulative_us'] for entry in imports if entry['depth'] == 0) / 1000
+    by_package: Dict[str, int] = defaultdict(int)
+    for entry in imports:
+        by_package[entry['module'].split('.')[0]] += entry['self_us']
+
+    return {
+        'lambda': name,
+        'init_ms': result['init_ms'],
+        'import_ms': import_ms,
+        'module_body_ms': max(result['init_ms'] - import_ms, 0.0),
+        'first_invoke_ms': result.get('first_invoke_ms'),
+        'modules_imported': len(imports),
+        'packages': sorted(({'package': package, 'ms': us / 1000} for package, us in by_package.items()),
+                           key=lambda item: item['ms'], reverse=True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile Lambda cold starts.")
+    parser.add_argument('--lambda', dest='lambdas', action='append',
+                        help='lambda directory to profile (default: all)')
+    parser.add_argument('--top', type=int, default=5, help='packages to list per lambda')
+    parser.add_argument('--json', action='store_true', help='print the full report as JSON')
+    args = parser.parse_args()
+
+    names = args.lambdas or sorted(name for name in os.listdir(LAMBDA_ROOT)
+                                   if os.path.exists(os.path.join(LAMBDA_ROOT, name, 'app.py')))
+    with tempfile.TemporaryDirectory() as baseline_dir:
+        env = dict(os.environ,
+                   AWS_DEFAULT_REGION=os.getenv('AWS_DEFAULT_REGION', 'eu-west-2'),
+                   SAGEMAKER_ROLE_ARN='arn:aws:iam::000000000000:role/profile',
+                   BASELINE_STORE='file', BASELINE_DIR=baseline_dir,
+                   TF_CPP_MIN_LOG_LEVEL='3')
+        reports = []
+        for name in names:
+            try:
+                reports.append(profile(name, env))
+            except subprocess.CalledProcessError as e:
+                # e.g. the Greengrass function needs greengrasssdk, which only exists on the device
+                last = (e.stderr.strip().splitlines() or ['?'])[-1]
+                reports.append({'lambda': name, 'error': last})
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    print(f"{'lambda':<32}{'init ms':>9}{'imports':>9}{'body':>8}{'1st call':>10}{'modules':>9}")
+    for report in reports:
+        if 'error' in report:
+            print(f"{report['lambda']:<32}  not loadable here: {report['error']}")
+            continue
+        first = report['first_invoke_ms']
+        print(f"{report['lambda']:<32}{report['init_ms']:>9.1f}{report['import_ms']:>9.1f}"
+              f"{report['module_body_ms']:>8.1f}{'-' if first is None else f'{first:.1f}':>10}"
+              f"{report['modules_imported']:>9}")
+        for package in report['packages'][:args.top]:
+            print(f"    {package['package']:<28}{package['ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
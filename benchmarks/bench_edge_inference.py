@@ -0,0 +1,329 @@
+"""
+Offline benchmark harness for the Greengrass LSTM function.
+
+Stubs greengrasssdk, builds a small stand-in LSTM as a NumPy weight bundle,
+generates synthetic vitals for N patients and drives lambda_handler directly,
+reporting throughput, handler latency percentiles and peak RSS. Any of the
+function's modes can be switched on, so the same run compares configurations:
+
+    python benchmarks/bench_edge_inference.py --patients 200 --seconds 10
+    python benchmarks/bench_edge_inference.py --patients 200 --seconds 10 --batching --binary
+    python benchmarks/bench_edge_inference.py --rate 1 --patients 300 --seconds 30 --streaming
+    python benchmarks/bench_edge_inference.py --patients 200 --seconds 10 --engine int8
+
+--engine picks the inference engine: the NumPy engine on a float32 bundle
+(default), on an int8 or float16 bundle calibrated on the synthetic vitals, or
+Keras (needs TensorFlow) on the same stand-in model saved as .h5.
+
+--rate 0 (default) drives the handler as fast as it will go; otherwise events
+are paced at patients * rate per second. --json writes the results for CI, and
+--max-p99-ms fails the run when the p99 latency regresses past a budget.
+With --batching the handler only enqueues, so throughput (which includes
+draining the queue) is the number to compare.
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import types
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'Lambda-Greengrass-LSTM')
+sys.path.insert(0, LAMBDA_DIR)
+
+import numpy_lstm
+import quantization
+from numpy_lstm import DenseLayer, LSTMLayer
+from payload import encode_metrics
+
+ENGINES = ('numpy', 'int8', 'float16', 'keras')
+
+
+class StubIotDataClient:
+    """Stands in for greengrasssdk's iot-data client, counting what would be sent."""
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self.topics: Dict[str, int] = {}
+
+    def publish(self, topic: str, payload: Any) -> None:
+        self.messages += 1
+        self.bytes += len(payload)
+        self.topics[topic] = self.topics.get(topic, 0) + 1
+
+
+@contextlib.contextmanager
+def greengrass_environment(env: Dict[str, str]) -> Iterator[StubIotDataClient]:
+    """
+    Set the function's environment variables and stub greengrasssdk for the
+    duration, restoring both afterwards so runs don't leak into each other
+    (or into the rest of a test session).
+    """
+    stub_client = StubIotDataClient()
+    module = types.ModuleType('greengrasssdk')
+    module.client = lambda name: stub_client
+    saved_env = {name: os.environ.get(name) for name in env}
+    saved_module = sys.modules.get('greengrasssdk')
+    os.environ.update(env)
+    sys.modules['greengrasssdk'] = module
+    try:
+        yield stub_client
+    finally:
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        if saved_module is None:
+            sys.modules.pop('greengrasssdk', None)
+        else:
+            sys.modules['greengrasssdk'] = saved_module
+
+
+def standin_layers(units: Tuple[int, ...] = (32, 16), seed: int = 0) -> List[Any]:
+    """A stacked LSTM with random weights and the production layer layout."""
+    rng = np.random.default_rng(seed)
+    layers: List[Any] = []
+    input_dim = 1
+    for i, u in enumerate(units):
+        scale = 1.0 / np.sqrt(input_dim + u)
+        layers.append(LSTMLayer(rng.normal(scale=scale, size=(input_dim, 4 * u)),
+                                rng.normal(scale=scale, size=(u, 4 * u)),
+                                np.zeros(4 * u), return_sequences=i < len(units) - 1))
+        input_dim = u
+    layers.append(DenseLayer(rng.normal(scale=0.3, size=(input_dim, 1)), np.zeros(1), activation='sigmoid'))
+    return layers
+
+
+def build_standin_model(path: str, units: Tuple[int, ...] = (32, 16), seed: int = 0) -> str:
+    """Write the stand-in LSTM as a float32 NumPy weight bundle."""
+    numpy_lstm.save_bundle(standin_layers(units, seed), path)
+    return path
+
+
+def build_engine_model(directory: str, engine: str, units: Tuple[int, ...] = (32, 16), window: int = 60,
+                       seed: int = 0) -> Tuple[str, Dict[str, str], Optional[Dict[str, Any]]]:
+    """
+    Write the stand-in model in the form the engine loads.
+
+    Returns:
+        Tuple: Model path, INFERENCE_ENGINE for the function, and the
+            calibration report for quantised bundles
+    """
+    layers = standin_layers(units, seed)
+    if engine == 'numpy':
+        return build_standin_model(os.path.join(directory, 'lstm_model.npz'), units, seed), 'numpy', None
+    if engine in quantization.QUANTIZATION_MODES:
+        stream = synthetic_vitals(32, window, seed)
+        # Calibrate on what the handler will see: raw readings
+        windows = np.stack([next(stream)[1] for _ in range(256)])
+        calibrated = quantization.calibrate(layers, windows, engine)
+        path = os.path.join(directory, f'lstm_model.{engine}.npz')
+        quantization.save_quantized_bundle(calibrated, path)
+        return path, 'numpy', calibrated['report']
+    if engine == 'keras':
+        import keras
+        model = keras.Sequential([keras.Input((None, 1))] + [
+            keras.layers.LSTM(layer.units, return_sequences=layer.return_sequences) if isinstance(layer, LSTMLayer)
+            else keras.layers.Dense(1, activation='sigmoid') for layer in layers])
+        for keras_layer, layer in zip(model.layers, layers):
+            keras_layer.set_weights([layer.kernel, layer.recurrent_kernel, layer.bias]
+                                    if isinstance(layer, LSTMLayer) else [layer.kernel, layer.bias])
+        path = os.path.join(directory, 'lstm_model.h5')
+        model.save(path)
+        return path, 'keras', None
+    raise ValueError(f"Unknown engine: {engine}")
+
+
+def synthetic_vitals(patients: int, window: int, seed: int = 0) -> Iterator[Tuple[str, np.ndarray, int]]:
+    """
+    Endless round-robin stream of (patient_id, window, index) heart-rate readings.
+
+    Each patient has their own resting rate, a slow drift, measurement noise and
+    occasional tachycardia episodes, so gating and drift behave as on a ward.
+    """
+    rng = np.random.default_rng(seed)
+    baseline = rng.normal(75, 8, size=patients)
+    phase = rng.uniform(0, 2 * np.pi, size=patients)
+    episode_left = np.zeros(patients, dtype=int)
+    history = [list(baseline[p] + rng.normal(0, 1.5, size=window)) for p in range(patients)]
+    t = 0
+    while True:
+        t += 1
+        for p in range(patients):
+            if episode_left[p] == 0 and rng.random() < 0.002:
+                episode_left[p] = rng.integers(10, 60)
+            surge = 35.0 if episode_left[p] > 0 else 0.0
+            episode_left[p] = max(0, episode_left[p] - 1)
+            reading = baseline[p] + 4 * np.sin(t / 300 + phase[p]) + surge + rng.normal(0, 1.5)
+            history[p].append(reading)
+            del history[p][0]
+            yield f'patient-{p:04d}', np.asarray(history[p], dtype=np.float32), window + t - 1
+
+
+def load_app() -> types.ModuleType:
+    """Import a fresh copy of the function's app.py (inside greengrass_environment)."""
+    spec = importlib.util.spec_from_file_location(f'greengrass_app_{time.monotonic_ns()}',
+                                                  os.path.join(LAMBDA_DIR, 'app.py'))
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    return app
+
+
+def shutdown_app(app: types.ModuleType) -> None:
+    for name in ('batcher', 'coalescer', 'forwarder', 'registry'):
+        component = getattr(app, name, None)
+        if component is not None:
+            component.stop()
+
+
+def peak_rss_mb() -> float:
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_event(patient_id: str, window: np.ndarray, index: int, binary: bool) -> Dict[str, Any]:
+    if binary:
+        return {'contentType': 'application/octet-stream', 'body': encode_metrics(patient_id, window, index)}
+    return {'body': json.dumps({'patient_id': patient_id, 'metrics': window.tolist(), 'index': index})}
+
+
+def run(patients: int = 100, window: int = 60, seconds: float = 5.0, rate: float = 0.0,
+        binary: bool = False, batching: bool = False, streaming: bool = False, gate: bool = False,
+        coalesce: bool = False, units: Tuple[int, ...] = (32, 16), seed: int = 0,
+        max_events: Optional[int] = None, engine: str = 'numpy') -> Dict[str, Any]:
+    """Run one benchmark configuration and return its measurements."""
+    with tempfile.TemporaryDirectory() as directory, contextlib.ExitStack() as stack:
+        model_path, inference_engine, quantization_report = build_engine_model(directory, engine, units, window, seed)
+        stub_client = stack.enter_context(greengrass_environment({
+            'INFERENCE_ENGINE': inference_engine,
+            'MODEL_PATH': model_path,
+            'MODEL_WATCH': 'false',
+            'BATCH_INFERENCE': str(batching).lower(),
+            'STREAMING_INFERENCE': str(streaming).lower(),
+            'GATE_INFERENCE': str(gate).lower(),
+            'COALESCE_RESULTS': str(coalesce).lower(),
+            'SPOOL_RESULTS': 'false',
+        }))
+        app = load_app()
+
+        # Pre-generate events so synthesis and encoding aren't timed
+        stream = synthetic_vitals(patients, window, seed)
+        target_rate = patients * rate
+        if max_events:
+            total = max_events
+        else:
+            total = int(target_rate * seconds) if target_rate else 10 ** 9
+        events: List[Dict[str, Any]] = []
+        generate_until = time.perf_counter() + max(seconds, 1.0)
+        while len(events) < total and (target_rate or time.perf_counter() < generate_until):
+            patient_id, values, index = next(stream)
+            events.append(make_event(patient_id, values, index, binary))
+
+        batcher = app.batcher if not target_rate else None
+        in_flight = 2 * app.BATCH_MAX_SIZE
+        latencies = np.empty(len(events))
+        start = time.perf_counter()
+        deadline = start + seconds
+        processed = 0
+        for i, event in enumerate(events):
+            if target_rate:
+                scheduled = start + i / target_rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            elif time.perf_counter() >= deadline:
+                break
+            if batcher is not None:
+                # Closed loop against an async queue needs backpressure, or the run
+                # only measures how fast events can be enqueued
+                while processed - batcher.stats['requests'] > in_flight:
+                    time.sleep(0.0005)
+            t0 = time.perf_counter()
+            app.lambda_handler(event, None)
+            latencies[i] = time.perf_counter() - t0
+            processed += 1
+
+        # Queued work (batches, coalesced messages) counts towards the elapsed time
+        shutdown_app(app)
+        elapsed = time.perf_counter() - start
+
+    latency_ms = latencies[:processed] * 1000
+    p50, p95, p99 = np.percentile(latency_ms, [50, 95, 99]) if processed else (0.0, 0.0, 0.0)
+    return {
+        'config': {'patients': patients, 'window': window, 'rate': rate, 'binary': binary,
+                   'batching': batching, 'streaming': streaming, 'gate': gate, 'coalesce': coalesce,
+                   'units': list(units), 'engine': engine},
+        'events': processed,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_eps': round(processed / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {'p50': round(float(p50), 3), 'p95': round(float(p95), 3), 'p99': round(float(p99), 3)},
+        'published_messages': stub_client.messages,
+        'published_bytes': stub_client.bytes,
+        'errors': stub_client.topics.get('healthcare/prediction/error', 0),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'quantization': quantization_report,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the Greengrass LSTM function.")
+    parser.add_argument('--patients', type=int, default=100)
+    parser.add_argument('--window', type=int, default=60)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--rate', type=float, default=0.0, help='events per patient per second (0 = max)')
+    parser.add_argument('--units', default='32,16', help='stand-in LSTM layer sizes')
+    parser.add_argument('--engine', choices=ENGINES, default='numpy',
+                        help='numpy on a float32, int8 or float16 bundle, or keras')
+    parser.add_argument('--binary', action='store_true')
+    parser.add_argument('--batching', action='store_true')
+    parser.add_argument('--streaming', action='store_true')
+    parser.add_argument('--gate', action='store_true')
+    parser.add_argument('--coalesce', action='store_true')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--max-p99-ms', type=float, help='fail if p99 handler latency exceeds this')
+    args = parser.parse_args()
+
+    result = run(patients=args.patients, window=args.window, seconds=args.seconds, rate=args.rate,
+                 binary=args.binary, batching=args.batching, streaming=args.streaming, gate=args.gate,
+                 coalesce=args.coalesce, units=tuple(int(u) for u in args.units.split(',')),
+                 engine=args.engine)
+
+    latency = result['latency_ms']
+    print(f"events: {result['events']} in {result['elapsed_s']}s -> {result['throughput_eps']} events/sec")
+    print(f"handler latency ms: p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}")
+    print(f"published: {result['published_messages']} messages, {result['published_bytes']} bytes, "
+          f"{result['errors']} errors")
+    print(f"peak RSS: {result['peak_rss_mb']} MB")
+    if result['quantization']:
+        report = result['quantization']
+        print(f"{args.engine} bundle: {report['size_ratio']:.2f}x the float32 size, rmse {report['rmse']:.6f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent = 4)
+
+    if result['errors']:
+        raise SystemExit(f"{result['errors']} events failed")
+    if args.max_p99_ms is not None and latency['p99'] > args.max_p99_ms:
+        raise SystemExit(f"p99 latency {latency['p99']} ms exceeds budget of {args.max_p99_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
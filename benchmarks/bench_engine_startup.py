@@ -0,0 +1,81 @@
+"""
+Startup time and peak RSS of the Keras and NumPy inference engines.
+
+Each engine is measured in a fresh interpreter so import costs are included:
+
+    python benchmarks/bench_engine_startup.py --model /greengrass-machine-learning/lstm_model.h5
+
+Without --model a small stacked LSTM is built with Keras and saved to a temp dir.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'Lambda-Greengrass-LSTM')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {lambda_dir!r})
+import numpy as np
+if {engine!r} == 'keras':
+    from tensorflow.keras.models import load_model
+else:
+    from numpy_lstm import load_model
+model = load_model({path!r})
+loaded = time.perf_counter()
+model.predict(np.zeros((1, 60, 1), dtype=np.float32))
+first = time.perf_counter()
+# VmHWM is per address space; ru_maxrss would carry over the parent's peak across exec
+with open('/proc/self/status') as status:
+    peak_kb = next(int(line.split()[1]) for line in status if line.startswith('VmHWM'))
+print(json.dumps({{
+    'load_s': loaded - start,
+    'first_predict_ms': (first - loaded) * 1000,
+    'peak_rss_mb': peak_kb / 1024,
+}}))
+"""
+
+
+def build_model(directory: str) -> str:
+    import keras
+    model = keras.Sequential([
+        keras.Input((None, 1)),
+        keras.layers.LSTM(64, return_sequences=True),
+        keras.layers.LSTM(32),
+        keras.layers.Dense(1, activation='sigmoid'),
+    ])
+    path = os.path.join(directory, 'lstm_model.h5')
+    model.save(path)
+    return path
+
+
+def probe(engine: str, path: str) -> dict:
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3')
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(lambda_dir=LAMBDA_DIR, engine=engine, path=path)],
+        capture_output=True, text=True, check=True, env=env
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', help='Keras .h5 model to load')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.model or build_model(directory)
+        print(f"{'engine':<18}{'load (s)':>10}{'1st predict (ms)':>18}{'peak RSS (MB)':>15}")
+        # The first NumPy run converts the .h5 and writes the .npz bundle; the second reads the bundle
+        for label, engine in (('keras', 'keras'), ('numpy (from h5)', 'numpy'), ('numpy (bundle)', 'numpy')):
+            result = probe(engine, path)
+            print(f"{label:<18}{result['load_s']:>10.2f}{result['first_predict_ms']:>18.1f}"
+                  f"{result['peak_rss_mb']:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Time of the old generator-loop accuracy against the vectorised evaluation,
+which also computes precision/recall/F1, Brier score, ROC-AUC and the
+confusion matrix.
+
+    python benchmarks/bench_evaluation.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'model_monitoring'))
+
+from evaluation import evaluate_predictions
+
+
+def loop_accuracy(predictions, actuals):
+    """The accuracy calculation model_monitoring used before evaluate_predictions."""
+    correct = sum(1 for p, a in zip(predictions, actuals) if p == a)
+    return correct / len(predictions)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'size':>10}{'loop acc (ms)':>16}{'all metrics (ms)':>19}{'from lists (ms)':>18}")
+    for size in (1000, 10000, 100000, 1000000):
+        actuals = rng.integers(0, 2, size=size)
+        scores = np.clip(0.4 * actuals + rng.normal(0.3, 0.2, size=size), 0, 1)
+        labels = (scores >= 0.5).astype(int).tolist()
+        actual_list = actuals.tolist()
+        score_list = scores.tolist()
+
+        number = max(1, 100000 // size)
+        loop_ms = min(timeit.repeat(lambda: loop_accuracy(labels, actual_list), number=number, repeat=3)) / number * 1e3
+        array_ms = min(timeit.repeat(lambda: evaluate_predictions(scores, actuals), number=number, repeat=3)) / number * 1e3
+        list_ms = min(timeit.repeat(lambda: evaluate_predictions(score_list, actual_list), number=number, repeat=3)) / number * 1e3
+        print(f"{size:>10}{loop_ms:>16.2f}{array_ms:>19.2f}{list_ms:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
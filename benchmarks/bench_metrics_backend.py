@@ -0,0 +1,131 @@
+"""
+Per-call latency of the CloudWatch API and Embedded Metric Format metrics backends.
+
+The API path talks to a local stub CloudWatch endpoint, so it measures request
+signing and serialisation plus loopback HTTP; --rtt-ms adds a
+simulated network round trip on top (real put_metric_data calls from Lambda
+typically see 10-50 ms). The EMF path writes to /dev/null, standing in for
+the Lambda log pipe.
+
+    python benchmarks/bench_metrics_backend.py
+    python benchmarks/bench_metrics_backend.py --rtt-ms 20
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def start_stub_cloudwatch(rtt_ms: float) -> str:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if rtt_ms:
+                time.sleep(rtt_ms / 1000)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-amz-json-1.0')
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}'
+
+
+def load_module(name: str, path: str):
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def time_calls(fn, calls: int):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.percentile(latencies, [50, 95, 99])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the CloudWatch API and EMF metrics backends.")
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--rtt-ms', type=float, default=0.0, help='simulated network round trip for API calls')
+    args = parser.parse_args()
+
+    os.environ.update({
+        'AWS_DEFAULT_REGION': 'eu-west-2',
+        'AWS_ACCESS_KEY_ID': 'benchmark',
+        'AWS_SECRET_ACCESS_KEY': 'benchmark',
+        'AWS_ENDPOINT_URL_CLOUDWATCH': start_stub_cloudwatch(args.rtt_ms),
+    })
+    logging.disable(logging.CRITICAL)
+    devnull = open(os.devnull, 'w')
+
+    import boto3
+    utils = load_module('training_utils', os.path.join(ROOT, 'training', 'utils.py'))
+    metric_writer = load_module('metric_writer', os.path.join(ROOT, 'lambda', 'model_monitoring', 'metric_writer.py'))
+
+    # DynamoDB is stubbed out so only the CloudWatch side is compared
+    table = SimpleNamespace(name='model-metrics', meta=SimpleNamespace(
+        client=SimpleNamespace(batch_write_item=lambda RequestItems: {})))
+    cloudwatch = boto3.client('cloudwatch')
+    metrics = {'ModelAccuracy': 0.93, 'ModelF1': 0.91, 'PredictionLatency': 12.5, 'DataDrift': 0.02}
+    dimensions = {'ModelVersion': 'v1', 'Environment': 'production'}
+
+    def monitoring_invocation(backend):
+        writer = metric_writer.MetricWriter(table, cloudwatch, backend=backend, emf_stream=devnull)
+
+        def invoke():
+            for name, value in metrics.items():
+                writer.add_metric(name, value, dimensions=dimensions)
+            writer.flush()
+        return invoke
+
+    def training_log_metric(backend):
+        def invoke():
+            utils.METRICS_BACKEND = backend
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                utils.log_metric('HealthCheckScore', 0.99, dimensions=[{'Name': 'CheckType', 'Value': 'canary'}])
+            finally:
+                sys.stdout = stdout
+        return invoke
+
+    def training_put_metric_data():
+        utils.put_metric_data([{'MetricName': 'HealthCheckScore', 'Value': 0.99,
+                                'Dimensions': [{'Name': 'CheckType', 'Value': 'canary'}]}])
+
+    # training log_metric queues API datums for a background thread, so the
+    # synchronous call it makes off the caller's path is timed separately
+    cases = [
+        ('training log_metric', 'api', training_log_metric('api')),
+        ('training log_metric', 'emf', training_log_metric('emf')),
+        ('  background API call', 'api', training_put_metric_data),
+        ('monitoring flush (4 metrics)', 'api', monitoring_invocation('api')),
+        ('monitoring flush (4 metrics)', 'emf', monitoring_invocation('emf')),
+    ]
+    print(f"{'path':<30}{'backend':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for label, backend, fn in cases:
+        fn()
+        p50, p95, p99 = time_calls(fn, args.calls)
+        print(f"{label:<30}{backend:>8}{p50:>10.3f}{p95:>10.3f}{p99:>10.3f}")
+    utils.get_metric_shipper().close()
+
+if __name__ == "__main__":
+    main()
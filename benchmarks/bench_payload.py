@@ -0,0 +1,38 @@
+"""
+Parse latency of the JSON and binary metrics formats at various window lengths.
+
+    python benchmarks/bench_payload.py
+"""
+import json
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'Lambda-Greengrass-LSTM'))
+
+from payload import encode_metrics, parse_request
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'window':>8}{'json (us)':>12}{'binary (us)':>14}{'speedup':>10}{'json B':>10}{'binary B':>10}")
+    for length in (60, 600, 6000, 60000):
+        window = (72 + rng.normal(size=length)).astype(np.float32)
+        json_event = {'body': json.dumps({'patient_id': 'patient-0001', 'metrics': window.tolist()})}
+        binary_event = {'contentType': 'application/octet-stream', 'body': encode_metrics('patient-0001', window)}
+
+        # Both paths end with the (1, timesteps, 1) array the model consumes
+        parse_json = lambda: np.asarray(parse_request(json_event)['metrics']).reshape(1, -1, 1)
+        parse_binary = lambda: np.asarray(parse_request(binary_event)['metrics']).reshape(1, -1, 1)
+
+        number = max(10, 200000 // length)
+        json_us = min(timeit.repeat(parse_json, number=number, repeat=5)) / number * 1e6
+        binary_us = min(timeit.repeat(parse_binary, number=number, repeat=5)) / number * 1e6
+        print(f"{length:>8}{json_us:>12.1f}{binary_us:>14.1f}{json_us / binary_us:>9.0f}x"
+              f"{len(json_event['body']):>10}{len(binary_event['body']):>10}")
+
+
+if __name__ == "__main__":
+    main()
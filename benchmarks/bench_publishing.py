@@ -0,0 +1,56 @@
+"""
+Messages/sec and bytes/sec sent to IoT Core with per-result JSON vs coalesced packed publishing.
+
+    python benchmarks/bench_publishing.py --patients 300 --rate 1 --seconds 60
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'Lambda-Greengrass-LSTM'))
+
+from publisher import CoalescingPublisher
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--patients', type=int, default=300)
+    parser.add_argument('--rate', type=float, default=1.0, help='results per patient per second')
+    parser.add_argument('--seconds', type=int, default=60)
+    parser.add_argument('--max-delay-ms', type=float, default=200.0)
+    parser.add_argument('--max-bytes', type=int, default=32 * 1024)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results_per_second = int(args.patients * args.rate)
+    total_results = results_per_second * args.seconds
+    predictions = rng.random(total_results).astype(np.float32).astype(float)
+
+    json_messages = total_results
+    json_bytes = sum(
+        len(json.dumps({'patient_id': f'patient-{i % args.patients:04d}', 'prediction': [[predictions[i]]]}))
+        for i in range(total_results)
+    )
+
+    # Results arrive evenly, so the time threshold flushes every max_delay worth of results
+    sent = []
+    publisher = CoalescingPublisher(lambda topic, payload: sent.append(len(payload)),
+                                    max_bytes=args.max_bytes, max_delay_ms=args.max_delay_ms)
+    per_window = max(1, int(results_per_second * args.max_delay_ms / 1000))
+    for i in range(total_results):
+        publisher.add('healthcare/prediction/result', f'patient-{i % args.patients:04d}', [[predictions[i]]])
+        if (i + 1) % per_window == 0:
+            publisher.flush()
+    publisher.flush()
+
+    print(f"{args.patients} patients x {args.rate}/s for {args.seconds}s ({total_results} results)")
+    print(f"{'mode':<10}{'msgs/sec':>12}{'bytes/sec':>14}")
+    print(f"{'json':<10}{json_messages / args.seconds:>12.1f}{json_bytes / args.seconds:>14.0f}")
+    print(f"{'packed':<10}{len(sent) / args.seconds:>12.1f}{sum(sent) / args.seconds:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,7 @@
 import json
-import boto3
 import logging
 import os
-
-# Initialise Greengrass client
-greengrass_client = boto3.client('greengrass')
+from aws_clients import get_client
 
 # Set up logging
 logger = logging.getLogger()
@@ -16,6 +13,8 @@ cert_arn = os.getenv('CERTIFICATE_ARN')
 
 def lambda_handler(event, context):
     try: 
+        greengrass_client = get_client('greengrass')
+
         # Create Greengrass Group
         group_response = greengrass_client.create_group(Name = "IoTGreenGrassGroup")
         group_id = group_response['Id']
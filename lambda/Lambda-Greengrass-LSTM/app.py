@@ -1,41 +1,214 @@
 import greengrasssdk
 import json
+import os
 import numpy as np
-from tensorflow.keras.models import load_model
+import numpy_lstm
+from batching import MicroBatcher
+from numpy_lstm import NumpyLSTMModel, layers_from_keras
+from payload import parse_request, single_feature_window
+from prefilter import InferenceGate
+from publisher import CoalescingPublisher
+from registry import ModelRegistry
+from spool import ResultSpool, StoreAndForwardPublisher
+from streaming import PatientStateCache, StreamingLSTM
 
 # Initialize Greengrass client
 client = greengrasssdk.client('iot-data')
 
-# Load the pre-trained LSTM model
-model = load_model('/greengrass-machine-learning/lstm_model.h5')
+# 'keras' loads the model with TensorFlow; 'numpy' runs it with NumPy only and skips the TensorFlow import
+INFERENCE_ENGINE = os.getenv('INFERENCE_ENGINE', 'keras').lower()
+MODEL_PATH = os.getenv('MODEL_PATH', '/greengrass-machine-learning/lstm_model.h5')
+
+# Hot-swap configuration: watch MODEL_DIR and serve the newest model file without a restart
+MODEL_WATCH = os.getenv('MODEL_WATCH', 'false').lower() == 'true'
+MODEL_DIR = os.getenv('MODEL_DIR', os.path.dirname(MODEL_PATH))
+MODEL_EXTENSIONS = tuple(os.getenv('MODEL_EXTENSIONS', '.h5').split(','))
+MODEL_POLL_SECONDS = float(os.getenv('MODEL_POLL_SECONDS', '5'))
+MODEL_WARMUP_TIMESTEPS = int(os.getenv('MODEL_WARMUP_TIMESTEPS', '60'))
+
+# Micro-batching configuration (pinned function, so the batcher lives for the process)
+BATCH_INFERENCE = os.getenv('BATCH_INFERENCE', 'false').lower() == 'true'
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '64'))
+BATCH_MAX_WAIT_MS = float(os.getenv('BATCH_MAX_WAIT_MS', '20'))
+
+# Stateful streaming configuration (per-patient LSTM state, advanced by new samples only)
+STREAMING_INFERENCE = os.getenv('STREAMING_INFERENCE', 'false').lower() == 'true'
+STREAMING_MAX_PATIENTS = int(os.getenv('STREAMING_MAX_PATIENTS', '1000'))
+STREAMING_TTL_SECONDS = float(os.getenv('STREAMING_TTL_SECONDS', '300'))
+
+# Coalesced publishing: results are packed per topic and sent on a size or time threshold
+COALESCE_RESULTS = os.getenv('COALESCE_RESULTS', 'false').lower() == 'true'
+COALESCE_MAX_BYTES = int(os.getenv('COALESCE_MAX_BYTES', str(32 * 1024)))
+COALESCE_MAX_DELAY_MS = float(os.getenv('COALESCE_MAX_DELAY_MS', '200'))
+
+# Statistical pre-filter: reuse the last prediction while readings stay within GATE_THRESHOLD_SIGMA
+GATE_INFERENCE = os.getenv('GATE_INFERENCE', 'false').lower() == 'true'
+GATE_THRESHOLD_SIGMA = float(os.getenv('GATE_THRESHOLD_SIGMA', '3'))
+GATE_REFRESH_SECONDS = float(os.getenv('GATE_REFRESH_SECONDS', '60'))
+GATE_WARMUP_SAMPLES = int(os.getenv('GATE_WARMUP_SAMPLES', '30'))
+# Gate stats are published every GATE_STATS_EVERY evaluated readings (0 turns them off)
+GATE_STATS_EVERY = int(os.getenv('GATE_STATS_EVERY', '1000'))
+
+gate = None
+if GATE_INFERENCE:
+    gate = InferenceGate(
+        threshold_sigma = GATE_THRESHOLD_SIGMA,
+        refresh_seconds = GATE_REFRESH_SECONDS,
+        warmup_samples = GATE_WARMUP_SAMPLES
+    )
+
+# Store-and-forward: results that can't be published are kept on local disk and replayed in order
+SPOOL_RESULTS = os.getenv('SPOOL_RESULTS', 'false').lower() == 'true'
+SPOOL_PATH = os.getenv('SPOOL_PATH', '/tmp/healthcare-results.spool')
+SPOOL_MAX_BYTES = int(os.getenv('SPOOL_MAX_BYTES', str(64 * 1024 * 1024)))
+SPOOL_REPLAY_RATE = float(os.getenv('SPOOL_REPLAY_RATE', '20'))
+
+forwarder = None
+if SPOOL_RESULTS:
+    forwarder = StoreAndForwardPublisher(
+        publish_fn = lambda topic, payload: client.publish(topic = topic, payload = payload),
+        spool = ResultSpool(SPOOL_PATH, capacity_bytes = SPOOL_MAX_BYTES),
+        replay_rate = SPOOL_REPLAY_RATE
+    )
+    forwarder.start()
+
+def send(topic, payload):
+    if forwarder is not None:
+        forwarder.publish(topic, payload)
+    else:
+        client.publish(topic = topic, payload = payload)
+
+coalescer = None
+if COALESCE_RESULTS:
+    coalescer = CoalescingPublisher(
+        publish_fn = send,
+        max_bytes = COALESCE_MAX_BYTES,
+        max_delay_ms = COALESCE_MAX_DELAY_MS
+    )
+    coalescer.start()
+
+def publish_result(patient_id, prediction):
+    if coalescer is not None:
+        coalescer.add('healthcare/prediction/result', patient_id, prediction)
+        return
+
+    # Publish result to AWS IoT Core
+    response = {
+        'patient_id': patient_id,
+        'prediction': prediction
+    }
+
+    # Send result to the cloud for further processing
+    send('healthcare/prediction/result', json.dumps(response))
+
+def publish_error(message):
+    client.publish(
+        topic = 'healthcare/prediction/error',
+        payload = f"Error processing prediction: {message}"
+    )
+
+def publish_gate_stats():
+    # Skipped-inference counters, so the threshold/refresh trade-off can be tuned
+    client.publish(
+        topic = 'healthcare/prediction/gate',
+        payload = json.dumps(dict(gate.stats, skip_ratio = round(gate.skip_ratio(), 4)))
+    )
+
+def publish_inferred_result(patient_id, prediction):
+    if gate is not None:
+        gate.record(patient_id, prediction)
+    publish_result(patient_id, prediction)
+
+def publish_batch_error(patient_ids, error):
+    publish_error(f"{str(error)} (patients: {', '.join(map(str, patient_ids))})")
+
+def load_lstm_model(path):
+    if INFERENCE_ENGINE == 'numpy':
+        return numpy_lstm.load_model(path)
+    from tensorflow.keras.models import load_model
+    return load_model(path)
+
+def numpy_layers(lstm_model):
+    return lstm_model.layers if isinstance(lstm_model, NumpyLSTMModel) else layers_from_keras(lstm_model)
+
+def on_model_swap(version):
+    # Report per-version load time and first-inference latency
+    client.publish(
+        topic = 'healthcare/model/status',
+        payload = json.dumps(version.to_dict())
+    )
+    if streamer is not None:
+        streamer.reset(numpy_layers(version.model))
+
+streamer = None
+registry = None
+if MODEL_WATCH:
+    registry = ModelRegistry(
+        MODEL_DIR,
+        load_lstm_model,
+        extensions = MODEL_EXTENSIONS,
+        warmup_shape = (1, MODEL_WARMUP_TIMESTEPS, 1),
+        poll_seconds = MODEL_POLL_SECONDS,
+        on_swap = on_model_swap
+    )
+    registry.start()
+    model = registry.model
+else:
+    # Load the pre-trained LSTM model
+    model = load_lstm_model(MODEL_PATH)
+
+def current_model():
+    return registry.model if registry is not None else model
+
+if STREAMING_INFERENCE:
+    streamer = StreamingLSTM(
+        numpy_layers(model),
+        PatientStateCache(max_patients = STREAMING_MAX_PATIENTS, ttl_seconds = STREAMING_TTL_SECONDS)
+    )
+
+batcher = None
+if BATCH_INFERENCE and streamer is None:
+    batcher = MicroBatcher(
+        predict_fn = lambda batch: current_model().predict(batch, verbose = 0),
+        on_result = publish_inferred_result,
+        on_error = publish_batch_error,
+        max_batch_size = BATCH_MAX_SIZE,
+        max_wait_ms = BATCH_MAX_WAIT_MS
+    )
+    batcher.start()
 
 def lambda_handler(event, context):
     try:
-        # Parse input data (e.g., health metrics)
-        data = json.loads(event['body'])
-        input_data = np.array(data['metrics']).reshape(1, -1, 1)  # Reshape for LSTM
+        # Parse input data (e.g., health metrics), either JSON or the binary metrics format
+        data = parse_request(event)
+        data['metrics'] = single_feature_window(data['metrics'])
 
-        # Run inference
-        prediction = model.predict(input_data).tolist()
+        if streamer is not None:
+            prediction = streamer.update(data['patient_id'], data['metrics'], data.get('index'))
+            publish_result(data['patient_id'], prediction)
+            return 'Inference complete'
 
-        # Publish result to AWS IoT Core 
-        response = {
-            'patient_id': data['patient_id'],
-            'prediction': prediction
-        }
+        if gate is not None:
+            run_inference, last_prediction = gate.check(data['patient_id'], data['metrics'])
+            if GATE_STATS_EVERY > 0 and gate.stats['evaluated'] % GATE_STATS_EVERY == 0:
+                publish_gate_stats()
+            if not run_inference:
+                publish_result(data['patient_id'], last_prediction)
+                return 'Inference skipped'
 
-        # Send result to the cloud for further processing
-        client.publish(
-            topic = 'healthcare/prediction/result',
-            payload = json.dumps(response)
-        )
+        if batcher is not None:
+            # Results are published per patient when the batch is flushed
+            batcher.submit(data['patient_id'], data['metrics'])
+            return 'Inference queued'
 
-    except Exception as e:
-        client.publish(
-            topic = 'healthcare/prediction/error',
-            payload = f"Error processing prediction: {str(e)}"
-        )
+        input_data = np.asarray(data['metrics']).reshape(1, -1, 1)  # Reshape for LSTM
 
-    return 'Inference complete'
+        # Run inference
+        prediction = current_model().predict(input_data).tolist()
 
+        publish_inferred_result(data['patient_id'], prediction)
 
+    except Exception as e:
+        publish_error(str(e))
+
+    return 'Inference complete'
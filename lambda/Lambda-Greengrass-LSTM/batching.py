@@ -0,0 +1,157 @@
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger()
+
+
+class InferenceRequest:
+    """A single queued reading waiting for a batched predict."""
+
+    __slots__ = ('patient_id', 'metrics', 'enqueued_at')
+
+    def __init__(self, patient_id: str, metrics: np.ndarray):
+        self.patient_id = patient_id
+        self.metrics = metrics
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Collect inference requests for a short window and run one predict per batch.
+
+    Requests are bucketed by sequence length so every bucket stacks into a
+    dense (batch, timesteps, 1) tensor without padding, which keeps the LSTM
+    output identical to the per-event path.
+
+    Args:
+        predict_fn: Callable taking a (batch, timesteps, 1) array and returning
+            a (batch, ...) array of predictions
+        on_result: Called as on_result(patient_id, prediction) for every request
+        on_error: Called as on_error(patient_ids, exception) when a batch fails
+        max_batch_size: Flush as soon as this many requests are queued
+        max_wait_ms: Flush once the oldest queued request is this old
+    """
+
+    def __init__(self,
+                 predict_fn: Callable[[np.ndarray], Any],
+                 on_result: Callable[[str, List], None],
+                 on_error: Optional[Callable[[List[str], Exception], None]] = None,
+                 max_batch_size: int = 64,
+                 max_wait_ms: float = 20.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+
+        self.predict_fn = predict_fn
+        self.on_result = on_result
+        self.on_error = on_error
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: "queue.Queue[InferenceRequest]" = queue.Queue()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        self.stats = {'requests': 0, 'batches': 0, 'predict_calls': 0, 'errors': 0}
+
+    def start(self) -> None:
+        """Start the background worker that drains the queue."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name='lstm-microbatcher', daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the worker after flushing anything still queued."""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+        self.flush()
+
+    def submit(self, patient_id: str, metrics: Any) -> None:
+        """Queue one reading window for the next batch."""
+        window = np.asarray(metrics, dtype=np.float32).reshape(-1)
+        self._queue.put(InferenceRequest(patient_id, window))
+
+    def flush(self) -> int:
+        """Synchronously process everything currently queued. Returns the request count."""
+        batch = self._drain(self.max_batch_size)
+        processed = 0
+        while batch:
+            self._process(batch)
+            processed += len(batch)
+            batch = self._drain(self.max_batch_size)
+        return processed
+
+    def _drain(self, limit: int) -> List[InferenceRequest]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _collect(self) -> List[InferenceRequest]:
+        """Block for the first request, then gather more until size or deadline."""
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                # Past the deadline: take whatever is already waiting, but don't wait for more
+                batch.extend(self._drain(self.max_batch_size - len(batch)))
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch: List[InferenceRequest]) -> None:
+        self.stats['requests'] += len(batch)
+        self.stats['batches'] += 1
+
+        buckets: Dict[int, List[InferenceRequest]] = defaultdict(list)
+        for request in batch:
+            buckets[request.metrics.shape[0]].append(request)
+
+        for requests in buckets.values():
+            patient_ids = [r.patient_id for r in requests]
+            try:
+                input_data = np.stack([r.metrics for r in requests]).reshape(len(requests), -1, 1)
+                predictions = np.asarray(self.predict_fn(input_data))
+                self.stats['predict_calls'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Batched inference failed for {len(requests)} requests: {e}")
+                if self.on_error is not None:
+                    self.on_error(patient_ids, e)
+                continue
+
+            for i, patient_id in enumerate(patient_ids):
+                # Keep the (1, outputs) shape the per-event path publishes
+                try:
+                    self.on_result(patient_id, predictions[i:i + 1].tolist())
+                except Exception as e:
+                    logger.error(f"Error delivering result for patient {patient_id}: {e}")
@@ -0,0 +1,301 @@
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger()
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _hard_sigmoid(x: np.ndarray) -> np.ndarray:
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'linear': lambda x: x,
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+    'hard_sigmoid': _hard_sigmoid,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'softmax': _softmax,
+}
+
+
+def get_activation(name: str) -> Callable[[np.ndarray], np.ndarray]:
+    try:
+        return ACTIVATIONS[name]
+    except KeyError:
+        raise ValueError(f"Unsupported activation: {name}")
+
+
+class LSTMLayer:
+    """
+    Keras-compatible LSTM layer (gate order i, f, c, o).
+
+    Args:
+        kernel: (input_dim, 4 * units) input weights
+        recurrent_kernel: (units, 4 * units) recurrent weights
+        bias: (4 * units,) bias, or None when the layer was built without one
+        activation: Cell/output activation name
+        recurrent_activation: Gate activation name
+        return_sequences: Whether the layer emits every timestep
+    """
+
+    def __init__(self, kernel: np.ndarray, recurrent_kernel: np.ndarray, bias: Any = None,
+                 activation: str = 'tanh', recurrent_activation: str = 'sigmoid',
+                 return_sequences: bool = False):
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.recurrent_kernel = np.asarray(recurrent_kernel, dtype=np.float32)
+        self.units = self.recurrent_kernel.shape[0]
+        self.bias = (np.zeros(4 * self.units, dtype=np.float32) if bias is None
+                     else np.asarray(bias, dtype=np.float32))
+        self.activation = activation
+        self.recurrent_activation = recurrent_activation
+        self.return_sequences = return_sequences
+        self._activation = get_activation(activation)
+        self._recurrent_activation = get_activation(recurrent_activation)
+
+    def initial_state(self, batch_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        zeros = np.zeros((batch_size, self.units), dtype=np.float32)
+        return zeros, zeros.copy()
+
+    def step(self, x: np.ndarray, h: np.ndarray, c: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance one timestep. x is (batch, input_dim), h and c are (batch, units)."""
+        return self.cell(x @ self.kernel + h @ self.recurrent_kernel + self.bias, c)
+
+    def cell(self, z: np.ndarray, c: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Apply the gates to pre-activations z (batch, 4 * units) and return new (h, c)."""
+        u = self.units
+        i = self._recurrent_activation(z[:, :u])
+        f = self._recurrent_activation(z[:, u:2 * u])
+        g = self._activation(z[:, 2 * u:3 * u])
+        o = self._recurrent_activation(z[:, 3 * u:])
+        c = f * c + i * g
+        h = o * self._activation(c)
+        return h, c
+
+
+class DenseLayer:
+    """Keras-compatible Dense layer."""
+
+    def __init__(self, kernel: np.ndarray, bias: Any = None, activation: str = 'linear'):
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.bias = (np.zeros(self.kernel.shape[1], dtype=np.float32) if bias is None
+                     else np.asarray(bias, dtype=np.float32))
+        self.activation = activation
+        self._activation = get_activation(activation)
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        return self._activation(x @ self.kernel + self.bias)
+
+
+def build_layer(class_name: str, config: Dict[str, Any], weights: List[np.ndarray]) -> Any:
+    """
+    Build a NumPy layer from a Keras layer class name, config and weight list.
+
+    Returns None for layers that are identity at inference time (Dropout,
+    InputLayer); anything else unsupported is rejected rather than silently
+    mis-evaluated.
+    """
+    if class_name in ('InputLayer', 'Dropout'):
+        return None
+    if class_name == 'LSTM':
+        if config.get('go_backwards') or config.get('stateful'):
+            raise ValueError(f"Unsupported LSTM configuration in layer {config.get('name')}")
+        return LSTMLayer(
+            weights[0], weights[1], weights[2] if len(weights) > 2 else None,
+            activation=config.get('activation', 'tanh'),
+            recurrent_activation=config.get('recurrent_activation', 'sigmoid'),
+            return_sequences=config.get('return_sequences', False)
+        )
+    if class_name == 'Dense':
+        return DenseLayer(
+            weights[0], weights[1] if len(weights) > 1 else None,
+            activation=config.get('activation', 'linear')
+        )
+    raise ValueError(f"Unsupported layer type for NumPy inference: {class_name}")
+
+
+def layers_from_keras(model: Any) -> List[Any]:
+    """Copy the weights of a loaded Keras Sequential LSTM model into NumPy layers."""
+    layers: List[Any] = []
+    for layer in model.layers:
+        built = build_layer(type(layer).__name__, layer.get_config(), layer.get_weights())
+        if built is not None:
+            layers.append(built)
+
+    logger.info(f"Converted {len(layers)} Keras layers to NumPy")
+    return layers
+
+
+def _decode(value: Any) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else str(value)
+
+
+def layers_from_h5(path: str) -> List[Any]:
+    """
+    Read a Keras Sequential .h5 model file with h5py only (no TensorFlow import).
+
+    Args:
+        path: Path to a full-model .h5 file saved by Keras
+
+    Returns:
+        List: NumPy layers in model order
+    """
+    import h5py
+
+    with h5py.File(path, 'r') as f:
+        if 'model_config' not in f.attrs:
+            raise ValueError(f"{path} has no model_config; save the full model, not only weights")
+        model_config = json.loads(_decode(f.attrs['model_config']))
+        config = model_config['config']
+        # Keras < 2.3 stored the Sequential layer list directly under 'config'
+        layer_configs = config['layers'] if isinstance(config, dict) else config
+        weights_root = f['model_weights'] if 'model_weights' in f else f
+
+        layers: List[Any] = []
+        for layer_config in layer_configs:
+            class_name = layer_config['class_name']
+            config = layer_config['config']
+            name = config.get('name')
+            weights = []
+            if name in weights_root:
+                group = weights_root[name]
+                weights = [np.asarray(group[_decode(w)], dtype=np.float32)
+                           for w in group.attrs.get('weight_names', [])]
+            built = build_layer(class_name, config, weights)
+            if built is not None:
+                layers.append(built)
+
+    logger.info(f"Read {len(layers)} layers from {path}")
+    return layers
+
+
+def layer_tensors(layers: List[Any]) -> Tuple[List[Dict[str, Any]], Dict[str, np.ndarray]]:
+    """Flatten layers into a JSON-able spec plus named weight tensors ('<layer index>_<weight>')."""
+    spec = []
+    tensors: Dict[str, np.ndarray] = {}
+    for i, layer in enumerate(layers):
+        if isinstance(layer, LSTMLayer):
+            spec.append({'type': 'LSTM', 'activation': layer.activation,
+                         'recurrent_activation': layer.recurrent_activation,
+                         'return_sequences': layer.return_sequences})
+            tensors[f'{i}_kernel'] = layer.kernel
+            tensors[f'{i}_recurrent_kernel'] = layer.recurrent_kernel
+            tensors[f'{i}_bias'] = layer.bias
+        else:
+            spec.append({'type': 'Dense', 'activation': layer.activation})
+            tensors[f'{i}_kernel'] = layer.kernel
+            tensors[f'{i}_bias'] = layer.bias
+    return spec, tensors
+
+
+def save_bundle(layers: List[Any], path: str) -> None:
+    """Write layers to a compact .npz weight bundle."""
+    spec, tensors = layer_tensors(layers)
+    with open(path, 'wb') as f:
+        np.savez(f, spec=np.array(json.dumps(spec)), **tensors)
+
+
+def _read_tensor(bundle: Any, key: str) -> np.ndarray:
+    """Read a bundle tensor as float32, dequantising int8 tensors stored with a '<key>_scale'."""
+    tensor = bundle[key]
+    scale_key = f'{key}_scale'
+    if scale_key in bundle.files:
+        return tensor.astype(np.float32) * np.float32(bundle[scale_key])
+    return tensor.astype(np.float32)
+
+
+def load_bundle(path: str) -> List[Any]:
+    """Load layers from a .npz weight bundle written by save_bundle or quantization.save_quantized_bundle."""
+    with np.load(path, allow_pickle=False) as bundle:
+        spec = json.loads(str(bundle['spec']))
+        layers: List[Any] = []
+        for i, layer_spec in enumerate(spec):
+            if layer_spec['type'] == 'LSTM':
+                layers.append(LSTMLayer(
+                    _read_tensor(bundle, f'{i}_kernel'),
+                    _read_tensor(bundle, f'{i}_recurrent_kernel'),
+                    _read_tensor(bundle, f'{i}_bias'),
+                    activation=layer_spec['activation'],
+                    recurrent_activation=layer_spec['recurrent_activation'],
+                    return_sequences=layer_spec['return_sequences']
+                ))
+            else:
+                layers.append(DenseLayer(_read_tensor(bundle, f'{i}_kernel'), _read_tensor(bundle, f'{i}_bias'),
+                                         activation=layer_spec['activation']))
+    return layers
+
+
+class NumpyLSTMModel:
+    """
+    Drop-in replacement for a Keras Sequential LSTM model's predict using NumPy only.
+
+    Args:
+        layers: NumPy layers in model order
+    """
+
+    def __init__(self, layers: List[Any]):
+        if not layers:
+            raise ValueError("Model has no layers")
+        self.layers = layers
+
+    def predict(self, input_data: np.ndarray, verbose: int = 0) -> np.ndarray:
+        """Run a (batch, timesteps, features) array through the model."""
+        x = np.asarray(input_data, dtype=np.float32)
+        if x.ndim == 2:
+            x = x[:, :, np.newaxis]
+
+        for layer in self.layers:
+            if isinstance(layer, LSTMLayer):
+                x = self._run_lstm(layer, x)
+            else:
+                x = layer(x)
+        return x
+
+    @staticmethod
+    def _run_lstm(layer: LSTMLayer, x: np.ndarray) -> np.ndarray:
+        batch, timesteps, _ = x.shape
+        h, c = layer.initial_state(batch)
+        # Input projections for every timestep in one matmul; only the recurrent part is sequential
+        projected = x @ layer.kernel + layer.bias
+        outputs = np.empty((batch, timesteps, layer.units), dtype=np.float32) if layer.return_sequences else None
+        for t in range(timesteps):
+            h, c = layer.cell(projected[:, t, :] + h @ layer.recurrent_kernel, c)
+            if outputs is not None:
+                outputs[:, t, :] = h
+        return outputs if outputs is not None else h
+
+
+def load_model(path: str, bundle_path: Optional[str] = None) -> NumpyLSTMModel:
+    """
+    Load a NumPy model from a .npz bundle or a Keras .h5 file.
+
+    When given an .h5 file the weights are converted once and cached as a bundle
+    next to it (or at bundle_path), so later cold starts skip h5py entirely.
+    """
+    if path.endswith('.npz'):
+        return NumpyLSTMModel(load_bundle(path))
+
+    bundle_path = bundle_path or os.path.splitext(path)[0] + '.npz'
+    if os.path.exists(bundle_path) and os.path.getmtime(bundle_path) >= os.path.getmtime(path):
+        logger.info(f"Loading NumPy weight bundle {bundle_path}")
+        return NumpyLSTMModel(load_bundle(bundle_path))
+
+    layers = layers_from_h5(path)
+    try:
+        save_bundle(layers, bundle_path)
+        logger.info(f"Cached NumPy weight bundle at {bundle_path}")
+    except OSError as e:
+        logger.warning(f"Could not cache weight bundle at {bundle_path}: {e}")
+    return NumpyLSTMModel(layers)
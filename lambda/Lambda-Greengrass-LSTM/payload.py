@@ -0,0 +1,104 @@
+import base64
+import json
+import struct
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Binary metrics format (all little-endian):
+#   header:  magic b'HCMB' | version u8 | reserved u8 | patient id length u16 |
+#            timesteps u32 | features u16 | reserved u16 | index i64 (-1 when absent)
+#   body:    patient id utf-8, zero-padded to a 4-byte boundary, then float32[timesteps * features]
+# Padding keeps the float block aligned so np.frombuffer can view it without copying.
+METRICS_MAGIC = b'HCMB'
+METRICS_VERSION = 1
+BINARY_CONTENT_TYPES = ('application/octet-stream', 'application/x-healthcare-metrics')
+_HEADER = struct.Struct('<4sBBHIHHq')
+
+
+def _padded(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def encode_metrics(patient_id: str, metrics: Any, index: Optional[int] = None) -> bytes:
+    """Encode a metrics window in the binary format (used by devices and tests)."""
+    values = np.asarray(metrics, dtype='<f4')
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    timesteps, features = values.shape
+    patient_bytes = str(patient_id).encode('utf-8')
+    header = _HEADER.pack(METRICS_MAGIC, METRICS_VERSION, 0, len(patient_bytes),
+                          timesteps, features, 0, -1 if index is None else index)
+    return header + patient_bytes.ljust(_padded(len(patient_bytes)), b'\0') + values.tobytes()
+
+
+def decode_metrics(body: bytes) -> Dict[str, Any]:
+    """
+    Decode a binary metrics body.
+
+    Returns:
+        Dict: 'patient_id', 'metrics' as a read-only (timesteps, features) float32
+        view over the body (no copy), and 'index' when the sender set one
+    """
+    if len(body) < _HEADER.size:
+        raise ValueError("Binary metrics body is shorter than its header")
+    magic, version, _, id_length, timesteps, features, _, index = _HEADER.unpack_from(body, 0)
+    if magic != METRICS_MAGIC:
+        raise ValueError("Body is not in the binary metrics format")
+    if version != METRICS_VERSION:
+        raise ValueError(f"Unsupported binary metrics version: {version}")
+
+    offset = _HEADER.size + _padded(id_length)
+    count = timesteps * features
+    if len(body) != offset + 4 * count:
+        raise ValueError(f"Binary metrics body size does not match shape ({timesteps}, {features})")
+
+    data = {
+        'patient_id': bytes(body[_HEADER.size:_HEADER.size + id_length]).decode('utf-8'),
+        'metrics': np.frombuffer(body, dtype='<f4', count=count, offset=offset).reshape(timesteps, features),
+    }
+    if index >= 0:
+        data['index'] = index
+    return data
+
+
+def single_feature_window(metrics: Any) -> np.ndarray:
+    """
+    Flatten a metrics window to one reading per timestep.
+
+    The LSTM takes a single feature, so a (timesteps, features) window with more
+    than one feature is rejected rather than read as extra timesteps.
+    """
+    values = np.asarray(metrics)
+    if values.ndim > 1 and values.shape[1:] != (1,):
+        raise ValueError(f"Expected one feature per timestep, got a window of shape {values.shape}")
+    return values.reshape(-1)
+
+
+def _content_type(event: Dict[str, Any]) -> str:
+    headers = event.get('headers') or {}
+    for key, value in headers.items():
+        if key.lower() == 'content-type':
+            return str(value).split(';')[0].strip().lower()
+    return str(event.get('contentType', '')).lower()
+
+
+def parse_request(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse an inference event in either the JSON or the binary metrics format.
+
+    The binary format is used when the content type says so or the body starts
+    with its magic bytes; base64 bodies (isBase64Encoded) are decoded first.
+    Everything else is parsed as the original JSON document.
+    """
+    body = event['body']
+    if event.get('isBase64Encoded') and isinstance(body, str):
+        body = base64.b64decode(body)
+
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        if _content_type(event) in BINARY_CONTENT_TYPES or bytes(body[:4]) == METRICS_MAGIC:
+            return decode_metrics(body)
+    elif _content_type(event) in BINARY_CONTENT_TYPES:
+        raise ValueError("Binary content type with a text body; send raw bytes or set isBase64Encoded")
+
+    return json.loads(body)
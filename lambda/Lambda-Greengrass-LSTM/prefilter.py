@@ -0,0 +1,133 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger()
+
+
+class PatientStats:
+    """Welford running mean/variance of a patient's readings and their last prediction."""
+
+    __slots__ = ('count', 'mean', 'm2', 'last_prediction', 'last_inference_at')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.last_prediction: Optional[List] = None
+        self.last_inference_at = 0.0
+
+    def update(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class InferenceGate:
+    """
+    Skip LSTM inference for readings that are statistically unremarkable.
+
+    Each patient's readings feed a Welford running mean/variance. A window goes
+    to the model when the patient has no prediction yet, is still warming up,
+    its newest reading is more than threshold_sigma standard deviations from
+    the running mean, or refresh_seconds have passed since the last inference.
+    Otherwise the caller re-publishes the last prediction.
+
+    Args:
+        threshold_sigma: Deviation (in standard deviations) that forces inference
+        refresh_seconds: Maximum age of a reused prediction
+        warmup_samples: Readings needed before the statistics are trusted
+        max_patients: Patients tracked; least recently seen are dropped
+        clock: Monotonic time source (overridable for tests)
+    """
+
+    REASONS = ('new', 'warmup', 'deviation', 'refresh')
+
+    def __init__(self,
+                 threshold_sigma: float = 3.0,
+                 refresh_seconds: float = 60.0,
+                 warmup_samples: int = 30,
+                 max_patients: int = 1000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.threshold_sigma = threshold_sigma
+        self.refresh_seconds = refresh_seconds
+        self.warmup_samples = warmup_samples
+        self.max_patients = max_patients
+        self.clock = clock
+
+        self._patients: "OrderedDict[str, PatientStats]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {'evaluated': 0, 'inferred': 0, 'skipped': 0}
+        self.stats.update({f'inferred_{reason}': 0 for reason in self.REASONS})
+
+    def _patient(self, patient_id: str) -> PatientStats:
+        stats = self._patients.get(patient_id)
+        if stats is None:
+            stats = PatientStats()
+            self._patients[patient_id] = stats
+            while len(self._patients) > self.max_patients:
+                self._patients.popitem(last=False)
+        else:
+            self._patients.move_to_end(patient_id)
+        return stats
+
+    def check(self, patient_id: str, metrics: Any) -> Tuple[bool, Optional[List]]:
+        """
+        Decide whether a window needs inference, updating the patient's statistics.
+
+        Args:
+            patient_id: Patient identifier
+            metrics: Latest window of readings, newest last
+
+        Returns:
+            Tuple[bool, Optional[List]]: (True, None) to run inference, or
+            (False, last_prediction) to reuse the previous result
+        """
+        reading = float(np.asarray(metrics, dtype=np.float64).reshape(-1)[-1])
+        now = self.clock()
+
+        with self._lock:
+            patient = self._patient(patient_id)
+            self.stats['evaluated'] += 1
+
+            if patient.last_prediction is None:
+                reason = 'new'
+            elif patient.count < self.warmup_samples:
+                reason = 'warmup'
+            elif abs(reading - patient.mean) > self.threshold_sigma * patient.std:
+                reason = 'deviation'
+            elif now - patient.last_inference_at >= self.refresh_seconds:
+                reason = 'refresh'
+            else:
+                reason = None
+
+            patient.update(reading)
+
+            if reason is None:
+                self.stats['skipped'] += 1
+                return False, patient.last_prediction
+
+            self.stats['inferred'] += 1
+            self.stats[f'inferred_{reason}'] += 1
+            return True, None
+
+    def record(self, patient_id: str, prediction: List) -> None:
+        """Store the prediction produced for a window that check() let through."""
+        with self._lock:
+            patient = self._patient(patient_id)
+            patient.last_prediction = prediction
+            patient.last_inference_at = self.clock()
+
+    def skip_ratio(self) -> float:
+        evaluated = self.stats['evaluated']
+        return self.stats['skipped'] / evaluated if evaluated else 0.0
@@ -0,0 +1,144 @@
+import logging
+import struct
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger()
+
+# Packed result format, decoded by lambda/Lambda-WebSocket/result_codec.py (keep the two in step):
+#   header:  magic b'HCPR' | version u8 | reserved u8 | record count u16
+#   record:  patient id length u16 | patient id utf-8 | value count u16 | values float32[count]
+# All integers and floats are little-endian.
+PACKED_MAGIC = b'HCPR'
+PACKED_VERSION = 1
+_HEADER = struct.Struct('<4sBBH')
+_LENGTH = struct.Struct('<H')
+MAX_RECORDS = 0xFFFF
+
+
+def encode_record(patient_id: str, prediction: Any) -> bytes:
+    """Pack one patient's prediction (flattened to float32) into a record."""
+    patient_bytes = str(patient_id).encode('utf-8')
+    values = np.asarray(prediction, dtype='<f4').reshape(-1)
+    if len(patient_bytes) > 0xFFFF or values.size > 0xFFFF:
+        raise ValueError("Patient id or prediction too large to pack")
+    return b''.join((_LENGTH.pack(len(patient_bytes)), patient_bytes,
+                     _LENGTH.pack(values.size), values.tobytes()))
+
+
+def encode_results(records: List[bytes]) -> bytes:
+    """Prefix already-encoded records with the packed message header."""
+    return _HEADER.pack(PACKED_MAGIC, PACKED_VERSION, 0, len(records)) + b''.join(records)
+
+
+class CoalescingPublisher:
+    """
+    Buffer prediction results per topic and publish them as packed batches.
+
+    A topic's buffer is flushed when the next record would push the packed
+    message past max_bytes, when it holds max_records, or when its oldest record
+    is older than max_delay_ms (checked by a background thread).
+
+    Args:
+        publish_fn: Called as publish_fn(topic, payload_bytes) for every packed message
+        max_bytes: Upper bound on the packed message size (IoT Core allows 128 KB)
+        max_records: Upper bound on records per message
+        max_delay_ms: Longest a result may wait before it is published
+    """
+
+    def __init__(self,
+                 publish_fn: Callable[[str, bytes], None],
+                 max_bytes: int = 32 * 1024,
+                 max_records: int = 1000,
+                 max_delay_ms: float = 200.0):
+        if max_bytes <= _HEADER.size:
+            raise ValueError("max_bytes is too small to hold a packed message")
+        self.publish_fn = publish_fn
+        self.max_bytes = max_bytes
+        self.max_records = min(max_records, MAX_RECORDS)
+        self.max_delay = max_delay_ms / 1000.0
+
+        self._buffers: Dict[str, List[bytes]] = defaultdict(list)
+        self._sizes: Dict[str, int] = defaultdict(int)
+        self._oldest: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        self.stats = {'records': 0, 'messages': 0, 'bytes': 0, 'errors': 0}
+
+    def add(self, topic: str, patient_id: str, prediction: Any) -> None:
+        """Buffer one result, publishing the topic's batch first if it is full."""
+        record = encode_record(patient_id, prediction)
+        ready: List[Tuple[str, List[bytes]]] = []
+        with self._lock:
+            size = self._sizes[topic]
+            if self._buffers[topic] and _HEADER.size + size + len(record) > self.max_bytes:
+                ready.append(self._take(topic))
+            self._buffers[topic].append(record)
+            self._sizes[topic] += len(record)
+            self._oldest.setdefault(topic, time.monotonic())
+            if len(self._buffers[topic]) >= self.max_records:
+                ready.append(self._take(topic))
+            self.stats['records'] += 1
+
+        for topic_name, records in ready:
+            self._send(topic_name, records)
+
+    def flush(self, topic: Optional[str] = None) -> int:
+        """Publish buffered results (one topic, or all). Returns the number of messages sent."""
+        with self._lock:
+            topics = [topic] if topic is not None else list(self._buffers)
+            ready = [self._take(t) for t in topics if self._buffers.get(t)]
+        for topic_name, records in ready:
+            self._send(topic_name, records)
+        return len(ready)
+
+    def _flush_expired(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            ready = [self._take(t) for t, oldest in list(self._oldest.items())
+                     if now - oldest >= self.max_delay and self._buffers.get(t)]
+        for topic_name, records in ready:
+            self._send(topic_name, records)
+
+    def _take(self, topic: str) -> Tuple[str, List[bytes]]:
+        records = self._buffers.pop(topic)
+        self._sizes.pop(topic, None)
+        self._oldest.pop(topic, None)
+        return topic, records
+
+    def _send(self, topic: str, records: List[bytes]) -> None:
+        payload = encode_results(records)
+        try:
+            self.publish_fn(topic, payload)
+            self.stats['messages'] += 1
+            self.stats['bytes'] += len(payload)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error publishing {len(records)} packed results to {topic}: {e}")
+
+    def start(self) -> None:
+        """Start the background thread that enforces max_delay_ms."""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._run, name='result-coalescer', daemon=True)
+        self._flusher.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread and publish anything still buffered."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout)
+            self._flusher = None
+        self.flush()
+
+    def _run(self) -> None:
+        interval = max(self.max_delay / 4, 0.005)
+        while not self._stop.wait(interval):
+            self._flush_expired()
@@ -0,0 +1,165 @@
+"""
+Reduced-precision weight bundles for the NumPy LSTM engine.
+
+Kernels are stored as float16, or as int8 with one float32 scale per tensor;
+biases stay float32 since they are tiny and shift every gate directly.
+numpy_lstm.load_model dequantises a quantised bundle transparently, so
+deploying one is just pointing MODEL_PATH at it with INFERENCE_ENGINE=numpy.
+
+    python quantization.py --model lstm_model.h5 --calibration windows.npy \\
+        --mode int8 --output lstm_model.int8.npz
+"""
+import argparse
+import io
+import json
+import logging
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+import numpy_lstm
+from numpy_lstm import NumpyLSTMModel
+
+logger = logging.getLogger()
+
+QUANTIZATION_MODES = ('int8', 'float16')
+DEFAULT_CLIP_PERCENTILES = (100.0, 99.99, 99.9, 99.5)
+
+
+def quantize_tensor(tensor: np.ndarray, mode: str, clip_percentile: float = 100.0) -> Dict[str, np.ndarray]:
+    """
+    Quantise one weight tensor.
+
+    Args:
+        tensor: float32 weights
+        mode: 'int8' (symmetric, per-tensor scale) or 'float16'
+        clip_percentile: Percentile of |w| mapped to the int8 range; outliers above it are clipped
+
+    Returns:
+        Dict: {'values': quantised array} plus {'scale': float32 scalar} for int8
+    """
+    if mode == 'float16':
+        return {'values': tensor.astype(np.float16)}
+    if mode != 'int8':
+        raise ValueError(f"Unsupported quantization mode: {mode}")
+
+    limit = float(np.percentile(np.abs(tensor), clip_percentile)) if tensor.size else 0.0
+    scale = np.float32(limit / 127.0 if limit > 0 else 1.0)
+    values = np.clip(np.round(tensor / scale), -127, 127).astype(np.int8)
+    return {'values': values, 'scale': scale}
+
+
+def quantize_layers(layers: List[Any], mode: str, clip_percentile: float = 100.0
+                    ) -> Tuple[List[Dict[str, Any]], Dict[str, np.ndarray]]:
+    """Quantise every kernel of a layer list. Returns the bundle spec and arrays to save."""
+    spec, tensors = numpy_lstm.layer_tensors(layers)
+    arrays: Dict[str, np.ndarray] = {}
+    for key, tensor in tensors.items():
+        if key.endswith('_bias'):
+            arrays[key] = tensor
+            continue
+        quantized = quantize_tensor(tensor, mode, clip_percentile)
+        arrays[key] = quantized['values']
+        if 'scale' in quantized:
+            arrays[f'{key}_scale'] = quantized['scale']
+    return spec, arrays
+
+
+def _bundle_bytes(spec: List[Dict[str, Any]], arrays: Dict[str, np.ndarray]) -> bytes:
+    buffer = io.BytesIO()
+    np.savez(buffer, spec=np.array(json.dumps(spec)), **arrays)
+    return buffer.getvalue()
+
+
+def _load_bytes(data: bytes) -> NumpyLSTMModel:
+    return NumpyLSTMModel(numpy_lstm.load_bundle(io.BytesIO(data)))
+
+
+def accuracy_delta_report(reference: NumpyLSTMModel, candidate: NumpyLSTMModel,
+                          windows: np.ndarray, threshold: float = 0.5) -> Dict[str, float]:
+    """
+    Compare a quantised model's outputs against the float32 model on sample windows.
+
+    Args:
+        reference: float32 model
+        candidate: Quantised model
+        windows: (samples, timesteps[, 1]) calibration windows
+        threshold: Decision threshold applied to both outputs to measure agreement
+
+    Returns:
+        Dict: Error statistics and the fraction of windows with the same decision
+    """
+    expected = reference.predict(windows)
+    actual = candidate.predict(windows)
+    error = np.abs(actual - expected)
+    return {
+        'samples': int(expected.shape[0]),
+        'max_abs_error': float(error.max()),
+        'mean_abs_error': float(error.mean()),
+        'rmse': float(np.sqrt(np.mean(error ** 2))),
+        'decision_agreement': float(np.mean((expected >= threshold) == (actual >= threshold))),
+    }
+
+
+def calibrate(layers: List[Any], windows: np.ndarray, mode: str = 'int8',
+              clip_percentiles: Sequence[float] = DEFAULT_CLIP_PERCENTILES,
+              threshold: float = 0.5) -> Dict[str, Any]:
+    """
+    Pick the clipping percentile that best preserves outputs on sample patient windows.
+
+    Each candidate is quantised, dequantised and run over the calibration windows;
+    the one with the lowest RMSE against the float32 model wins. float16 has no
+    clipping choice, so it is evaluated once.
+
+    Returns:
+        Dict: 'spec' and 'arrays' of the chosen bundle, plus the 'report' used to choose it
+    """
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unsupported quantization mode: {mode}")
+
+    reference = NumpyLSTMModel(layers)
+    float_bytes = len(_bundle_bytes(*numpy_lstm.layer_tensors(layers)))
+    candidates = clip_percentiles if mode == 'int8' else (100.0,)
+
+    best = None
+    for percentile in candidates:
+        spec, arrays = quantize_layers(layers, mode, percentile)
+        data = _bundle_bytes(spec, arrays)
+        report = accuracy_delta_report(reference, _load_bytes(data), windows, threshold)
+        report.update({
+            'mode': mode,
+            'clip_percentile': percentile,
+            'float32_bytes': float_bytes,
+            'quantized_bytes': len(data),
+            'size_ratio': len(data) / float_bytes,
+        })
+        logger.info(f"Calibration {mode} p{percentile}: rmse={report['rmse']:.6f}")
+        if best is None or report['rmse'] < best['report']['rmse']:
+            best = {'spec': spec, 'arrays': arrays, 'report': report}
+    return best
+
+
+def save_quantized_bundle(calibrated: Dict[str, Any], path: str) -> None:
+    """Write the bundle chosen by calibrate to disk."""
+    with open(path, 'wb') as f:
+        np.savez(f, spec=np.array(json.dumps(calibrated['spec'])), **calibrated['arrays'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantise the edge LSTM and report the accuracy delta.")
+    parser.add_argument('--model', required=True, help='Keras .h5 model or float32 .npz bundle')
+    parser.add_argument('--calibration', required=True, help='.npy array of sample windows (samples, timesteps)')
+    parser.add_argument('--mode', choices=QUANTIZATION_MODES, default='int8')
+    parser.add_argument('--threshold', type=float, default=0.5)
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    layers = numpy_lstm.load_model(args.model).layers
+    windows = np.load(args.calibration).astype(np.float32)
+    calibrated = calibrate(layers, windows, args.mode, threshold=args.threshold)
+    save_quantized_bundle(calibrated, args.output)
+    print(json.dumps(calibrated['report'], indent = 4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger()
+
+
+class ModelVersion:
+    """A loaded, warmed-up model and the timings recorded while bringing it up."""
+
+    __slots__ = ('version', 'path', 'model', 'load_ms', 'first_inference_ms', 'activated_at')
+
+    def __init__(self, version: str, path: str, model: Any, load_ms: float, first_inference_ms: float):
+        self.version = version
+        self.path = path
+        self.model = model
+        self.load_ms = load_ms
+        self.first_inference_ms = first_inference_ms
+        self.activated_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'path': self.path,
+            'load_ms': round(self.load_ms, 2),
+            'first_inference_ms': round(self.first_inference_ms, 2),
+            'activated_at': self.activated_at,
+        }
+
+
+class ModelRegistry:
+    """
+    Watch a model directory and hot-swap new versions in without pausing inference.
+
+    The newest model file in the directory is the active version. A background
+    thread polls for a newer file, loads it, runs one dummy predict to warm it
+    up and only then replaces the active reference, so callers always get a
+    ready model from the `model` property. Failed loads keep the current
+    version serving.
+
+    Args:
+        model_dir: Directory the models are deployed to
+        loader: Callable loading a model file (e.g. keras or numpy_lstm load_model)
+        extensions: File extensions treated as model versions
+        warmup_shape: Shape of the dummy input used for warm-up
+        poll_seconds: How often the directory is checked
+        settle_seconds: Ignore files modified more recently than this (still being copied)
+        on_swap: Called with the new ModelVersion after it becomes active
+    """
+
+    def __init__(self,
+                 model_dir: str,
+                 loader: Callable[[str], Any],
+                 extensions: Sequence[str] = ('.h5',),
+                 warmup_shape: Tuple[int, ...] = (1, 60, 1),
+                 poll_seconds: float = 5.0,
+                 settle_seconds: float = 2.0,
+                 on_swap: Optional[Callable[[ModelVersion], None]] = None):
+        self.model_dir = model_dir
+        self.loader = loader
+        self.extensions = tuple(extensions)
+        self.warmup_shape = warmup_shape
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.on_swap = on_swap
+
+        self._active: Optional[ModelVersion] = None
+        self._failed: Dict[str, str] = {}
+        self._swap_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.history: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def active(self) -> Optional[ModelVersion]:
+        return self._active
+
+    @property
+    def model(self) -> Any:
+        active = self._active
+        if active is None:
+            raise RuntimeError("No model version has been loaded")
+        return active.model
+
+    def _latest(self, settle_seconds: float) -> Optional[Tuple[str, str]]:
+        """Return (version, path) of the newest settled model file, if any."""
+        now = time.time()
+        candidates = []
+        for name in os.listdir(self.model_dir):
+            if not name.endswith(self.extensions):
+                continue
+            path = os.path.join(self.model_dir, name)
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            if now - mtime_ns / 1e9 < settle_seconds:
+                continue
+            candidates.append((mtime_ns, name, path))
+
+        if not candidates:
+            return None
+        mtime_ns, name, path = max(candidates)
+        return f"{name}@{mtime_ns}", path
+
+    def _load(self, version: str, path: str) -> ModelVersion:
+        start = time.perf_counter()
+        model = self.loader(path)
+        loaded = time.perf_counter()
+        model.predict(np.zeros(self.warmup_shape, dtype=np.float32))
+        warmed = time.perf_counter()
+        return ModelVersion(version, path, model, (loaded - start) * 1000, (warmed - loaded) * 1000)
+
+    def refresh(self) -> bool:
+        """Load and activate the newest version if it changed. Returns True when a swap happened."""
+        with self._swap_lock:
+            # Nothing is serving yet, so don't wait for the newest file to settle
+            latest = self._latest(self.settle_seconds if self._active is not None else 0.0)
+            if latest is None:
+                return False
+            version, path = latest
+            if (self._active is not None and self._active.version == version) or version in self._failed:
+                return False
+
+            try:
+                candidate = self._load(version, path)
+            except Exception as e:
+                self._failed[version] = str(e)
+                self.history[version] = {'version': version, 'path': path, 'error': str(e)}
+                logger.error(f"Failed to load model version {version}: {e}")
+                return False
+
+            candidate.activated_at = time.time()
+            previous = self._active
+            # Single reference assignment: in-flight requests finish on the old model
+            self._active = candidate
+            self.history[version] = candidate.to_dict()
+
+        logger.info(f"Activated model version {version} (load {candidate.load_ms:.1f} ms, "
+                    f"first inference {candidate.first_inference_ms:.1f} ms)"
+                    + (f", replacing {previous.version}" if previous else ""))
+        if self.on_swap is not None:
+            try:
+                self.on_swap(candidate)
+            except Exception as e:
+                logger.error(f"Model swap callback failed: {e}")
+        return True
+
+    def start(self) -> None:
+        """Load the current version synchronously, then watch for new ones in the background."""
+        self.refresh()
+        if self._active is None:
+            raise RuntimeError(f"No loadable model found in {self.model_dir}")
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._run, name='lstm-model-registry', daemon=True)
+        self._watcher.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout)
+            self._watcher = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error checking for new model versions: {e}")
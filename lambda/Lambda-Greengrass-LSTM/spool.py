@@ -0,0 +1,334 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Optional, Tuple, Union
+
+logger = logging.getLogger()
+
+# File layout: a 64-byte header followed by a fixed-size ring of records.
+#   header:  magic b'HCSP' | version u8 | pad | capacity u64 | head u64 | tail u64 |
+#            used u64 | count u64 | dropped u64
+#   record:  payload length u32 | crc32 u32 | flags u8 | topic length u16 | topic | payload
+# A payload length of 0xFFFFFFFF (or too few bytes left for a record header)
+# means the writer wrapped to the start of the ring.
+SPOOL_MAGIC = b'HCSP'
+SPOOL_VERSION = 1
+_FILE_HEADER = struct.Struct('<4sB3xQQQQQQ')
+_FILE_HEADER_SIZE = 64
+_RECORD = struct.Struct('<IIBH')
+_WRAP = 0xFFFFFFFF
+_FLAG_TEXT = 0x01
+
+Payload = Union[str, bytes]
+
+
+class ResultSpool:
+    """
+    Memory-mapped, append-only ring buffer of unsent messages on local disk.
+
+    The file is created at a fixed size, so the spool never grows past its disk
+    budget; when it is full the oldest messages are dropped (and counted) to
+    make room. The header is only updated after a record is fully written, and
+    every record carries a CRC, so a crash mid-write loses at most that record.
+
+    Args:
+        path: Spool file location
+        capacity_bytes: Size of the record ring (the disk budget)
+        sync: Flush the mapping to disk after every change
+    """
+
+    def __init__(self, path: str, capacity_bytes: int = 64 * 1024 * 1024, sync: bool = True):
+        if capacity_bytes < 4 * _RECORD.size:
+            raise ValueError("capacity_bytes is too small for a spool")
+        self.path = path
+        self.sync = sync
+        self._lock = threading.RLock()
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, 'r+b' if exists else 'w+b')
+        if not exists:
+            self._file.truncate(_FILE_HEADER_SIZE + capacity_bytes)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+        if exists:
+            magic, version, capacity, head, tail, used, count, dropped = _FILE_HEADER.unpack_from(self._map, 0)
+            if magic != SPOOL_MAGIC or version != SPOOL_VERSION:
+                raise ValueError(f"{path} is not a result spool")
+            if capacity != capacity_bytes:
+                raise ValueError(f"{path} was created with capacity {capacity}, not {capacity_bytes}")
+            self.capacity = capacity
+            self._head, self._tail, self._used, self._count, self.dropped = head, tail, used, count, dropped
+            if count:
+                logger.info(f"Recovered {count} unsent messages from {path}")
+        else:
+            self.capacity = capacity_bytes
+            self._head = self._tail = self._used = self._count = self.dropped = 0
+            self._write_header()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def used_bytes(self) -> int:
+        return self._used
+
+    def _write_header(self) -> None:
+        _FILE_HEADER.pack_into(self._map, 0, SPOOL_MAGIC, SPOOL_VERSION, self.capacity,
+                               self._head, self._tail, self._used, self._count, self.dropped)
+        if self.sync:
+            self._map.flush()
+
+    def _record_at(self, position: int) -> Tuple[int, Optional[Tuple[str, Payload]], int]:
+        """Read the record at a ring position. Returns (record start, (topic, payload), size)."""
+        if self.capacity - position < _RECORD.size:
+            return 0, None, 0
+        length, crc, flags, topic_length = _RECORD.unpack_from(self._map, _FILE_HEADER_SIZE + position)
+        if length == _WRAP:
+            return 0, None, 0
+
+        start = _FILE_HEADER_SIZE + position + _RECORD.size
+        body = self._map[start:start + topic_length + length]
+        if zlib.crc32(body) != crc:
+            raise IOError(f"Corrupt record at offset {position} in {self.path}")
+        topic = body[:topic_length].decode('utf-8')
+        payload = body[topic_length:]
+        message = (topic, payload.decode('utf-8') if flags & _FLAG_TEXT else payload)
+        return position, message, _RECORD.size + topic_length + length
+
+    def _drop_oldest(self) -> None:
+        self._pop()
+        self.dropped += 1
+
+    def _pop(self) -> Optional[Tuple[str, Payload]]:
+        if self._count == 0:
+            return None
+        position, message, size = self._record_at(self._head)
+        if message is None:
+            # Skip the unused tail of the ring the writer wrapped past
+            self._used -= self.capacity - self._head
+            self._head = 0
+            position, message, size = self._record_at(0)
+        self._head = position + size
+        self._used -= size
+        self._count -= 1
+        if self._count == 0:
+            self._head = self._tail = self._used = 0
+        return message
+
+    def append(self, topic: str, payload: Payload) -> None:
+        """Persist one message, dropping the oldest ones if the ring is full."""
+        is_text = isinstance(payload, str)
+        data = payload.encode('utf-8') if is_text else bytes(payload)
+        topic_bytes = topic.encode('utf-8')
+        body = topic_bytes + data
+        size = _RECORD.size + len(body)
+        if size > self.capacity:
+            raise ValueError(f"Message of {size} bytes does not fit in a {self.capacity} byte spool")
+
+        with self._lock:
+            while True:
+                if self._used == 0 or self._tail > self._head:
+                    if self.capacity - self._tail >= size:
+                        break
+                    if self._head >= size or self._used == 0:
+                        # Wrap: mark the rest of the ring as skipped and continue from the start
+                        if self.capacity - self._tail >= _RECORD.size:
+                            _RECORD.pack_into(self._map, _FILE_HEADER_SIZE + self._tail, _WRAP, 0, 0, 0)
+                        self._used += self.capacity - self._tail
+                        self._tail = 0
+                        if self._count == 0:
+                            self._used = 0
+                            self._head = 0
+                        continue
+                elif self._head - self._tail >= size:
+                    break
+                try:
+                    self._drop_oldest()
+                except IOError as e:
+                    self._discard_corrupt(e)
+
+            offset = _FILE_HEADER_SIZE + self._tail
+            _RECORD.pack_into(self._map, offset, len(data), zlib.crc32(body),
+                              _FLAG_TEXT if is_text else 0, len(topic_bytes))
+            self._map[offset + _RECORD.size:offset + size] = body
+            self._tail += size
+            self._used += size
+            self._count += 1
+            self._write_header()
+
+    def peek(self) -> Optional[Tuple[str, Payload]]:
+        """Return the oldest message without removing it."""
+        with self._lock:
+            if self._count == 0:
+                return None
+            try:
+                _, message, _ = self._record_at(self._head)
+                if message is None:
+                    _, message, _ = self._record_at(0)
+                return message
+            except IOError as e:
+                self._discard_corrupt(e)
+                return None
+
+    def pop(self) -> Optional[Tuple[str, Payload]]:
+        """Remove and return the oldest message."""
+        with self._lock:
+            try:
+                message = self._pop()
+            except IOError as e:
+                self._discard_corrupt(e)
+                return None
+            self._write_header()
+            return message
+
+    def _discard_corrupt(self, error: Exception) -> None:
+        # Record boundaries past a corrupt record can't be trusted, so the backlog is dropped
+        logger.error(f"{error}; discarding {self._count} spooled messages")
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.dropped += self._count
+            self._head = self._tail = self._used = self._count = 0
+            self._write_header()
+
+    def close(self) -> None:
+        with self._lock:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+
+
+class TokenBucket:
+    """Token bucket limiting replay to `rate` messages per second with bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 when one is available now)."""
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # Tolerance so float rounding can't leave the caller sleeping ever-smaller intervals
+        return 0.0 if self._tokens >= 1 - 1e-9 else (1 - self._tokens) / self.rate
+
+    def take(self) -> None:
+        self._tokens -= 1
+
+
+class StoreAndForwardPublisher:
+    """
+    Publish through a disk spool whenever the uplink is down.
+
+    While the spool is empty, messages go straight to publish_fn. When a publish
+    fails, or older messages are still waiting, the message is spooled instead
+    so delivery order is preserved. replay() drains the spool oldest first at no
+    more than replay_rate messages per second and stops at the first failure.
+
+    Args:
+        publish_fn: Called as publish_fn(topic, payload); raises when the link is down
+        spool: Disk spool for unsent messages
+        replay_rate: Messages per second allowed while replaying
+        replay_burst: Messages allowed back-to-back before the rate applies
+        retry_seconds: How often the background thread retries while messages are spooled
+        sleep: Sleep function (overridable for tests)
+    """
+
+    def __init__(self,
+                 publish_fn: Callable[[str, Payload], None],
+                 spool: ResultSpool,
+                 replay_rate: float = 20.0,
+                 replay_burst: int = 10,
+                 retry_seconds: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.publish_fn = publish_fn
+        self.spool = spool
+        self.bucket = TokenBucket(replay_rate, replay_burst, clock)
+        self.retry_seconds = retry_seconds
+        self.sleep = sleep
+
+        self._replay_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self.stats = {'sent': 0, 'spooled': 0, 'replayed': 0, 'publish_failures': 0}
+
+    def publish(self, topic: str, payload: Payload) -> bool:
+        """Send or spool a message. Returns True if it was sent immediately."""
+        if len(self.spool) == 0:
+            try:
+                self.publish_fn(topic, payload)
+                self.stats['sent'] += 1
+                return True
+            except Exception as e:
+                self.stats['publish_failures'] += 1
+                logger.warning(f"Publish to {topic} failed, spooling to disk: {e}")
+
+        self.spool.append(topic, payload)
+        self.stats['spooled'] += 1
+        return False
+
+    def replay(self, max_messages: Optional[int] = None) -> int:
+        """Send spooled messages in order, rate limited. Returns how many were delivered."""
+        delivered = 0
+        with self._replay_lock:
+            while len(self.spool) and (max_messages is None or delivered < max_messages):
+                if self._stop.is_set() and self._worker is not None:
+                    break
+                wait = self.bucket.wait_time()
+                if wait > 0:
+                    self.sleep(wait)
+                    continue
+
+                message = self.spool.peek()
+                if message is None:
+                    break
+                topic, payload = message
+                try:
+                    self.publish_fn(topic, payload)
+                except Exception as e:
+                    self.stats['publish_failures'] += 1
+                    logger.warning(f"Replay paused, uplink still unavailable: {e}")
+                    break
+
+                self.bucket.take()
+                self.spool.pop()
+                delivered += 1
+                self.stats['replayed'] += 1
+
+        if delivered:
+            logger.info(f"Replayed {delivered} spooled messages, {len(self.spool)} remaining")
+        return delivered
+
+    def start(self) -> None:
+        """Start the background thread that retries the spool."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name='result-spool-replay', daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.retry_seconds):
+            if len(self.spool):
+                try:
+                    self.replay()
+                except Exception as e:
+                    logger.error(f"Error replaying spooled messages: {e}")
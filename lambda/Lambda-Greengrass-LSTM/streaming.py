@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from numpy_lstm import LSTMLayer
+
+logger = logging.getLogger()
+
+
+class PatientState:
+    """Recurrent state of one patient's stream."""
+
+    __slots__ = ('states', 'last_index', 'output', 'updated_at')
+
+    def __init__(self, states: List[Tuple[np.ndarray, np.ndarray]], last_index: Optional[int],
+                 output: np.ndarray, updated_at: float):
+        self.states = states
+        self.last_index = last_index
+        self.output = output
+        self.updated_at = updated_at
+
+
+class PatientStateCache:
+    """
+    Bounded LRU cache of per-patient LSTM state with TTL eviction.
+
+    Args:
+        max_patients: Maximum number of patients kept; least recently used are evicted
+        ttl_seconds: Patients not seen for this long are treated as new streams
+        clock: Monotonic time source (overridable for tests)
+    """
+
+    def __init__(self, max_patients: int = 1000, ttl_seconds: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_patients < 1:
+            raise ValueError("max_patients must be at least 1")
+
+        self.max_patients = max_patients
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: "OrderedDict[str, PatientState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, patient_id: str) -> Optional[PatientState]:
+        with self._lock:
+            entry = self._entries.get(patient_id)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if self.clock() - entry.updated_at > self.ttl_seconds:
+                del self._entries[patient_id]
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(patient_id)
+            self.stats['hits'] += 1
+            return entry
+
+    def put(self, patient_id: str, entry: PatientState) -> None:
+        with self._lock:
+            entry.updated_at = self.clock()
+            self._entries[patient_id] = entry
+            self._entries.move_to_end(patient_id)
+            while len(self._entries) > self.max_patients:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def evict_expired(self) -> int:
+        """Drop every patient whose state is older than the TTL. Returns the count dropped."""
+        with self._lock:
+            now = self.clock()
+            expired = [pid for pid, entry in self._entries.items()
+                       if now - entry.updated_at > self.ttl_seconds]
+            for patient_id in expired:
+                del self._entries[patient_id]
+            self.stats['expirations'] += len(expired)
+            return len(expired)
+
+
+class StreamingLSTM:
+    """
+    Incremental per-patient inference that advances cached LSTM state by new samples only.
+
+    The first window seen for a patient (or after its state was evicted) is run
+    in full from a zero state; after that only samples beyond the last one
+    consumed are fed through, so each reading costs O(1) instead of O(window).
+    Note the carried state summarises the patient's whole stream rather than
+    just the latest window.
+
+    Args:
+        layers: NumPy layers from numpy_lstm, applied in order each timestep
+        cache: Per-patient state cache
+    """
+
+    def __init__(self, layers: List[Any], cache: PatientStateCache):
+        if not any(isinstance(layer, LSTMLayer) for layer in layers):
+            raise ValueError("Streaming inference needs at least one LSTM layer")
+        self.layers = layers
+        self.cache = cache
+        self.stats = {'full_windows': 0, 'incremental_steps': 0, 'duplicates': 0}
+
+    def reset(self, layers: List[Any]) -> None:
+        """Switch to new model weights. Cached states belong to the old weights, so they are dropped."""
+        self.layers = layers
+        self.cache.clear()
+
+    def _initial_states(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        return [layer.initial_state(1) for layer in self.layers if isinstance(layer, LSTMLayer)]
+
+    def _advance(self, states: List[Tuple[np.ndarray, np.ndarray]],
+                 samples: np.ndarray) -> np.ndarray:
+        """Feed samples through every layer one timestep at a time, updating states in place."""
+        output = None
+        for sample in samples:
+            x = np.full((1, 1), sample, dtype=np.float32)
+            lstm_index = 0
+            for layer in self.layers:
+                if isinstance(layer, LSTMLayer):
+                    h, c = layer.step(x, *states[lstm_index])
+                    states[lstm_index] = (h, c)
+                    lstm_index += 1
+                    x = h
+                else:
+                    x = layer(x)
+            output = x
+        return output
+
+    def update(self, patient_id: str, metrics: Any, index: Optional[int] = None) -> List:
+        """
+        Advance a patient's stream and return the latest prediction.
+
+        Args:
+            patient_id: Patient identifier used as the cache key
+            metrics: Latest window of readings, oldest first
+            index: Absolute sample index of the last reading in the window. Without
+                it, consecutive windows are assumed to advance by one sample.
+
+        Returns:
+            List: Prediction with the same (1, outputs) shape as model.predict
+        """
+        window = np.asarray(metrics, dtype=np.float32).reshape(-1)
+        if window.size == 0:
+            raise ValueError("Empty metrics window")
+
+        entry = self.cache.get(patient_id)
+        new_samples = None
+        if entry is not None:
+            if index is None or entry.last_index is None:
+                new_samples = window[-1:]
+            else:
+                step = index - entry.last_index
+                if step <= 0:
+                    # Duplicate or out-of-order reading: nothing new to consume
+                    self.stats['duplicates'] += 1
+                    return entry.output.tolist()
+                if step <= window.size:
+                    new_samples = window[-step:]
+
+        if new_samples is None:
+            # New patient, expired state, or a gap larger than the window
+            states = self._initial_states()
+            output = self._advance(states, window)
+            self.stats['full_windows'] += 1
+        else:
+            states = entry.states
+            output = self._advance(states, new_samples)
+            self.stats['incremental_steps'] += len(new_samples)
+
+        self.cache.put(patient_id, PatientState(states, index, output, 0.0))
+        return output.tolist()
@@ -1,9 +1,6 @@
-import boto3
 import json
 import os
-
-# Initialise SageMaker Client
-sagemaker = boto3.client('sagemaker')
+from aws_clients import get_client
 
 # Define the training job parameters
 compilation_job_name = "lstm-neo-model"
@@ -36,7 +33,7 @@ compilation_params = {
 # Start the SageMaker Neo compilation job
 def trigger_compilation_job():
     try:
-        response = sagemaker.create_compilation_job(**compilation_params)
+        response = get_client('sagemaker').create_compilation_job(**compilation_params)
         print (f"Compilation job {compilation_job_name} started successfully."),
         print(json.dumps(response, indent = 4, default = str))
 
@@ -1,9 +1,6 @@
-import boto3
 import json
 import os
-
-# Initialise SageMaker Client
-sagemaker = boto3.client('sagemaker')
+from aws_clients import get_client
 
 # Define the training job parameters
 training_job_name = "train-model"
@@ -54,7 +51,7 @@ training_params = {
 def lambda_handler(event, context):
     try:
         # Start the SageMaker training job
-        response = sagemaker.create_training_job(**training_params)
+        response = get_client('sagemaker').create_training_job(**training_params)
         print(f"Training job {training_params['TrainingJobName']} started successfully.")
         
         # Return success response
@@ -1,9 +1,11 @@
+import base64
 import json
-import boto3
 import logging
+from aws_clients import get_client
+from result_codec import decode_results, is_packed
 
-# Initialise the API Gateway Management API Client
-apigateway_management = boto3.client('apigatewaymanagementapi', endpoint_url = 'https://example.com')
+# API Gateway Management API endpoint for the WebSocket stage
+WEBSOCKET_ENDPOINT = 'https://example.com'
 
 # Set up Logging
 logger = logging.getLogger()
@@ -21,11 +23,23 @@ def handler(event, context):
     
     # Process the analytics data from IoT Greengrass
     try:
+        connection_id = "mock-connection-id"
+
+        # Coalesced results arrive as one packed binary message (base64-encoded by the IoT rule)
+        if event.get('isBase64Encoded'):
+            raw = base64.b64decode(payload)
+            if is_packed(raw):
+                results = decode_results(raw)
+                logger.info(f"Decoded {len(results)} packed analytics results from Greengrass")
+                for analytics_result in results:
+                    send_alert(connection_id, analytics_result)
+                return
+            payload = raw
+
         analytics_result = json.loads(payload)
         logger.info(f"Analytics result from Greengrass: {analytics_result}")
 
         # Send alert to WebSocket API Gateway
-        connection_id = "mock-connection-id"
         send_alert(connection_id, analytics_result)
 
     except Exception as e:
@@ -34,7 +48,7 @@ def handler(event, context):
     
 def send_alert(connection_id, message):
     try:
-        apigateway_management.post_to_connection(
+        get_client('apigatewaymanagementapi', endpoint_url = WEBSOCKET_ENDPOINT).post_to_connection(
             ConnectionId = connection_id,
             Data = json.dumps(message)
         )
@@ -0,0 +1,50 @@
+import struct
+from typing import Any, Dict, List
+
+# Packed result format written by lambda/Lambda-Greengrass-LSTM/publisher.py (keep the two in step):
+#   header:  magic b'HCPR' | version u8 | reserved u8 | record count u16
+#   record:  patient id length u16 | patient id utf-8 | value count u16 | values float32[count]
+# All integers and floats are little-endian.
+PACKED_MAGIC = b'HCPR'
+PACKED_VERSION = 1
+_HEADER = struct.Struct('<4sBBH')
+_LENGTH = struct.Struct('<H')
+
+
+def is_packed(payload: bytes) -> bool:
+    return len(payload) >= _HEADER.size and payload[:4] == PACKED_MAGIC
+
+
+def decode_results(payload: bytes) -> List[Dict[str, Any]]:
+    """
+    Decode a packed batch of edge prediction results.
+
+    Args:
+        payload: Raw packed message
+
+    Returns:
+        List[Dict]: One {'patient_id', 'prediction'} dict per record, with the
+        prediction in the same [[...]] shape the edge publishes as JSON
+    """
+    magic, version, _, count = _HEADER.unpack_from(payload, 0)
+    if magic != PACKED_MAGIC:
+        raise ValueError("Not a packed result message")
+    if version != PACKED_VERSION:
+        raise ValueError(f"Unsupported packed result version: {version}")
+
+    offset = _HEADER.size
+    results = []
+    for _ in range(count):
+        (id_length,) = _LENGTH.unpack_from(payload, offset)
+        offset += _LENGTH.size
+        patient_id = payload[offset:offset + id_length].decode('utf-8')
+        offset += id_length
+        (value_count,) = _LENGTH.unpack_from(payload, offset)
+        offset += _LENGTH.size
+        values = struct.unpack_from(f'<{value_count}f', payload, offset)
+        offset += 4 * value_count
+        results.append({'patient_id': patient_id, 'prediction': [list(values)]})
+
+    if offset != len(payload):
+        raise ValueError("Trailing bytes after packed results")
+    return results
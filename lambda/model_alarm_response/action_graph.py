@@ -0,0 +1,123 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger()
+
+
+class ActionSkipped(Exception):
+    """Raised by an action that decided not to run (e.g. it is in its cooldown)."""
+
+
+class _Action:
+    def __init__(self, name: str, fn: Callable[[], Any], depends_on: Sequence[str], timeout: float):
+        self.name = name
+        self.fn = fn
+        self.depends_on = list(depends_on)
+        self.timeout = timeout
+
+
+class ActionGraph:
+    """
+    Run alarm response actions concurrently, respecting their dependencies.
+
+    An action starts as soon as every action it depends on has finished,
+    whatever their outcome: a failed model switch must still be followed by
+    the alert that reports it. Actions read earlier outcomes from
+    graph.results.
+
+    Each action has a timeout. Python threads can't be cancelled, so an
+    action that times out is reported as timed_out and its dependents go
+    ahead while the thread finishes in the background; the clients it uses
+    should have their own timeouts too.
+
+    Args:
+        max_workers: Threads for running actions
+        default_timeout: Seconds an action may run when add() doesn't set one
+    """
+
+    def __init__(self, max_workers: int = 4, default_timeout: float = 10.0,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.clock = clock
+        self._actions: Dict[str, _Action] = {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, name: str, fn: Callable[[], Any], depends_on: Sequence[str] = (),
+            timeout: Optional[float] = None) -> None:
+        """Add an action; dependencies must already have been added."""
+        if name in self._actions:
+            raise ValueError(f"Duplicate action: {name}")
+        unknown = [dependency for dependency in depends_on if dependency not in self._actions]
+        if unknown:
+            raise ValueError(f"Action {name} depends on unknown actions: {unknown}")
+        self._actions[name] = _Action(name, fn, depends_on, self.default_timeout if timeout is None else timeout)
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Run every action and wait for them (or their timeouts).
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Per action: status (succeeded, failed,
+                skipped or timed_out), start_ms and duration_ms relative to the
+                start of the run, and the result or error
+        """
+        start = self.clock()
+        pending: List[_Action] = list(self._actions.values())
+        running: Dict[Future, _Action] = {}
+        started: Dict[str, float] = {}
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='alarm-action')
+        try:
+            while pending or running:
+                for action in [a for a in pending if all(d in self.results for d in a.depends_on)]:
+                    pending.remove(action)
+                    started[action.name] = self.clock()
+                    running[executor.submit(action.fn)] = action
+
+                now = self.clock()
+                next_deadline = min(started[a.name] + a.timeout for a in running.values())
+                done, _ = wait(running, timeout=max(next_deadline - now, 0), return_when=FIRST_COMPLETED)
+
+                now = self.clock()
+                for future in list(running):
+                    action = running[future]
+                    if future in done:
+                        self._record(action, future, started[action.name] - start, now - started[action.name])
+                    elif now - started[action.name] >= action.timeout:
+                        logger.error(f"Action {action.name} timed out after {action.timeout}s")
+                        self._finish(action, 'timed_out', started[action.name] - start, now - started[action.name],
+                                     error=f"Timed out after {action.timeout}s")
+                    else:
+                        continue
+                    del running[future]
+        finally:
+            # Don't wait for timed-out actions still running in the background
+            executor.shutdown(wait=False)
+        return self.results
+
+    def _record(self, action: _Action, future: Future, start_s: float, duration_s: float) -> None:
+        try:
+            result = future.result()
+        except ActionSkipped as e:
+            self._finish(action, 'skipped', start_s, duration_s, error=str(e))
+        except Exception as e:
+            logger.error(f"Action {action.name} failed: {e}")
+            self._finish(action, 'failed', start_s, duration_s, error=str(e))
+        else:
+            self._finish(action, 'succeeded', start_s, duration_s, result=result)
+
+    def _finish(self, action: _Action, status: str, start_s: float, duration_s: float,
+                result: Any = None, error: Optional[str] = None) -> None:
+        entry: Dict[str, Any] = {
+            'status': status,
+            'start_ms': round(start_s * 1000, 1),
+            'duration_ms': round(duration_s * 1000, 1)
+        }
+        if result is not None:
+            entry['result'] = result
+        if error is not None:
+            entry['error'] = error
+        self.results[action.name] = entry
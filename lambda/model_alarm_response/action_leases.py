@@ -0,0 +1,175 @@
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from emf import emit_emf
+
+logger = logging.getLogger()
+
+METRICS_NAMESPACE = 'Healthcare/ML'
+
+
+def lease_key(alarm_name: str, endpoint_name: Optional[str], action: str) -> str:
+    return f"{alarm_name}#{endpoint_name or '-'}#{action}"
+
+
+class InMemoryLeaseStore:
+    """Leases in a dict; for tests and local runs (a Lambda container only sees its own)."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        now = self.clock()
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease[1] > now:
+                return False
+            self._leases[key] = (owner, now + ttl_seconds)
+            return True
+
+    def release(self, key: str, owner: str) -> None:
+        with self._lock:
+            if self._leases.get(key, (None,))[0] == owner:
+                del self._leases[key]
+
+
+class DynamoDBLeaseStore:
+    """
+    Leases as items in a DynamoDB table keyed by LeaseKey.
+
+    A lease is taken with a conditional put that only succeeds when there is
+    no lease or the existing one has expired, so of several concurrent
+    invocations exactly one wins. ExpiresAt is epoch seconds and doubles as
+    the table's TTL attribute, which cleans up expired leases.
+
+    Actions take and release leases from several threads, so this uses the
+    low-level client (thread-safe) rather than a Table resource (not).
+    """
+
+    def __init__(self, client: Any, table_name: str, clock: Callable[[], float] = time.time):
+        self.client = client
+        self.table_name = table_name
+        self.clock = clock
+
+    def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        from botocore.exceptions import ClientError
+        now = self.clock()
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={'LeaseKey': {'S': key}, 'Owner': {'S': owner}, 'AcquiredAt': {'N': str(int(now))},
+                      'ExpiresAt': {'N': str(int(now + ttl_seconds))}},
+                ConditionExpression='attribute_not_exists(LeaseKey) OR ExpiresAt <= :now',
+                ExpressionAttributeValues={':now': {'N': str(int(now))}}
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    def release(self, key: str, owner: str) -> None:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.delete_item(
+                TableName=self.table_name,
+                Key={'LeaseKey': {'S': key}},
+                ConditionExpression='#owner = :owner',
+                ExpressionAttributeNames={'#owner': 'Owner'},
+                ExpressionAttributeValues={':owner': {'S': owner}}
+            )
+        except ClientError as e:
+            # Someone else holds it now, or it already expired and was replaced
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+
+class ActionGuard:
+    """
+    Run each alarm response action at most once per cooldown window.
+
+    Actions are keyed on alarm name, endpoint and action. Running one takes a
+    lease that lasts for the action's cooldown; duplicate deliveries,
+    concurrent invocations and a flapping alarm find the lease held and the
+    action is suppressed. If the action fails the lease is released so the
+    next alarm can retry it.
+
+    If the lease store itself fails (unreachable, throttled, missing
+    permissions), actions in fail_open run anyway without a lease: for a
+    mitigation like switching to the backup model, a possible duplicate is
+    better than none. Other actions raise the store's error.
+
+    Each decision is emitted as an AlarmActionExecuted, AlarmActionSuppressed
+    or AlarmActionUnguarded metric (Embedded Metric Format, dimensioned by
+    action and alarm).
+
+    Args:
+        store: Lease store with acquire(key, owner, ttl_seconds) and release(key, owner)
+        cooldowns: Cooldown in seconds per action name
+        default_cooldown: Cooldown for actions not in cooldowns
+        owner: Identifies this invocation in the lease (defaults to a random id)
+        fail_open: Actions that run without a lease when the store fails
+    """
+
+    def __init__(self, store: Any, cooldowns: Optional[Dict[str, float]] = None,
+                 default_cooldown: float = 900.0, owner: Optional[str] = None,
+                 fail_open: Iterable[str] = ()):
+        self.store = store
+        self.cooldowns = cooldowns or {}
+        self.default_cooldown = default_cooldown
+        self.owner = owner or str(uuid.uuid4())
+        self.fail_open = set(fail_open)
+        self.stats = {'executed': 0, 'suppressed': 0, 'failed': 0, 'unguarded': 0}
+        self._lock = threading.Lock()
+
+    def run(self, alarm_name: str, endpoint_name: Optional[str], action: str,
+            fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[bool, Any]:
+        """
+        Run fn unless the action is in its cooldown.
+
+        Returns:
+            Tuple[bool, Any]: Whether fn ran, and its result
+        """
+        key = lease_key(alarm_name, endpoint_name, action)
+        try:
+            acquired = self.store.acquire(key, self.owner, self.cooldowns.get(action, self.default_cooldown))
+        except Exception as e:
+            if action not in self.fail_open:
+                raise
+            logger.warning(f"Lease store failed for {action} on {alarm_name}, running it without a lease: {e}")
+            self._count('unguarded')
+            self._emit('AlarmActionUnguarded', alarm_name, action)
+            return True, fn(*args, **kwargs)
+
+        if not acquired:
+            logger.info(f"Suppressed {action} for {alarm_name}: already ran within its cooldown")
+            self._count('suppressed')
+            self._emit('AlarmActionSuppressed', alarm_name, action)
+            return False, None
+
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._count('failed')
+            self.store.release(key, self.owner)
+            raise
+        self._count('executed')
+        self._emit('AlarmActionExecuted', alarm_name, action)
+        return True, result
+
+    def _count(self, name: str) -> None:
+        # Actions of one alarm can run on several threads
+        with self._lock:
+            self.stats[name] += 1
+
+    def _emit(self, metric_name: str, alarm_name: str, action: str) -> None:
+        try:
+            emit_emf(METRICS_NAMESPACE, [{'name': metric_name, 'value': 1, 'unit': 'Count'}],
+                     {'Action': action, 'AlarmName': alarm_name})
+        except Exception as e:
+            logger.warning(f"Failed to emit {metric_name} metric: {e}")
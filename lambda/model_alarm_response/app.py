@@ -1,108 +1,245 @@
 import json
-import boto3
 import logging
-from typing import Dict, Any
-import datetime
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+from aws_clients import get_client
+from action_leases import ActionGuard, DynamoDBLeaseStore, InMemoryLeaseStore
+from action_graph import ActionGraph, ActionSkipped
+from capacity_planner import CapacityPlanner, endpoint_load, fetch_endpoint_load
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-sagemaker = boto3.client('sagemaker')
-sns = boto3.client('sns')
+# Each mitigation runs at most once per cooldown for an alarm and endpoint, so a
+# flapping alarm or duplicate EventBridge delivery can't start overlapping
+# retraining jobs. Leases live in DynamoDB; 'memory' only dedups within a container
+LEASE_STORE = os.getenv('LEASE_STORE', 'dynamodb')  # 'dynamodb' or 'memory'
+LEASE_TABLE = os.getenv('LEASE_TABLE', 'alarm-action-leases')
+# Actions that still run, unguarded, if the lease store can't be reached
+LEASE_FAIL_OPEN_ACTIONS = [action.strip() for action in os.getenv('LEASE_FAIL_OPEN_ACTIONS', 'switch_to_backup').split(',')
+                           if action.strip()]
+ACTION_COOLDOWNS = {
+    'retrain': float(os.getenv('RETRAIN_COOLDOWN_SECONDS', '21600')),
+    'switch_to_backup': float(os.getenv('SWITCH_COOLDOWN_SECONDS', '1800')),
+    'scale_up': float(os.getenv('SCALE_COOLDOWN_SECONDS', '900'))
+}
+
+# The actions for an alarm run concurrently, except that the alert waits for
+# the model switch or scale-up it reports on. Timeouts are per action, in seconds
+ACTION_TIMEOUTS = {
+    'switch_to_backup': float(os.getenv('SWITCH_TIMEOUT_SECONDS', '10')),
+    'scale_up': float(os.getenv('SCALE_TIMEOUT_SECONDS', '10')),
+    'retrain': float(os.getenv('RETRAIN_TIMEOUT_SECONDS', '15')),
+    'notify': float(os.getenv('NOTIFY_TIMEOUT_SECONDS', '5'))
+}
+ACTION_WORKERS = int(os.getenv('ACTION_WORKERS', '4'))
+
+# The GitHub token is kept across warm invocations and re-read after the TTL or a 401
+GITHUB_TOKEN_SECRET = os.getenv('GITHUB_TOKEN_SECRET', 'github-actions-token')
+GITHUB_TOKEN_TTL_SECONDS = float(os.getenv('GITHUB_TOKEN_TTL_SECONDS', '900'))
+# (connect, read) timeouts for the dispatch request. A 401 sends it twice, so
+# both attempts plus the secret refresh have to fit in the retrain action's timeout
+GITHUB_HTTP_TIMEOUT = (float(os.getenv('GITHUB_CONNECT_TIMEOUT_SECONDS', '2')),
+                       float(os.getenv('GITHUB_READ_TIMEOUT_SECONDS', '4')))
+
+# Scale-up sizes the endpoint for TARGET_P95_MS from recent Invocations and
+# ModelLatency, within the instance bounds and at most MAX_SCALE_STEP at a time
+TARGET_P95_MS = float(os.getenv('TARGET_P95_MS', '500'))
+MIN_INSTANCES = int(os.getenv('MIN_INSTANCES', '1'))
+MAX_INSTANCES = int(os.getenv('MAX_INSTANCES', '8'))
+MAX_SCALE_STEP = int(os.getenv('MAX_SCALE_STEP', '2'))
+WORKERS_PER_INSTANCE = int(os.getenv('WORKERS_PER_INSTANCE', '1'))
+SCALING_WINDOW_MINUTES = int(os.getenv('SCALING_WINDOW_MINUTES', '15'))
+# Instances to add when there are no metrics to plan from; 0 leaves the endpoint as it is
+NO_METRICS_SCALE_STEP = int(os.getenv('NO_METRICS_SCALE_STEP', '0'))
+SCALING_PERIOD_SECONDS = 60
+
+lease_store = None
+_github_token = None  # (token, fetched at)
+_github_token_lock = threading.Lock()
+
+def get_lease_store():
+    """The lease store, created on first use."""
+    global lease_store
+    if lease_store is None:
+        if LEASE_STORE == 'memory':
+            lease_store = InMemoryLeaseStore()
+        else:
+            lease_store = DynamoDBLeaseStore(get_client('dynamodb'), LEASE_TABLE)
+    return lease_store
+
+def get_github_token(refresh: bool = False) -> str:
+    """The GitHub Actions token from Secrets Manager, cached for GITHUB_TOKEN_TTL_SECONDS."""
+    global _github_token
+    with _github_token_lock:
+        if refresh or _github_token is None or time.monotonic() - _github_token[1] >= GITHUB_TOKEN_TTL_SECONDS:
+            token = get_client('secretsmanager').get_secret_value(SecretId=GITHUB_TOKEN_SECRET)['SecretString']
+            _github_token = (token, time.monotonic())
+        return _github_token[0]
 
 class ModelMonitoringResponse:
-    def __init__(self, event: Dict[str, Any]):
+    def __init__(self, event: Dict[str, Any], guard: Optional[ActionGuard] = None):
         self.event = event
         self.alarm_name = event['detail']['alarmName']
         self.alarm_description = event['detail'].get('alarmDescription', '')
         self.trigger = event['detail']['configuration']['metrics'][0]
+        self.endpoint_name = event['detail']['configuration'].get('dimensions', {}).get('EndpointName')
+        self.guard = guard or ActionGuard(get_lease_store(), ACTION_COOLDOWNS, fail_open = LEASE_FAIL_OPEN_ACTIONS)
+        self.suppressed_actions = []
+
+    def run_action(self, action: str, fn, *args) -> Tuple[bool, Any]:
+        """Run a mitigation unless it already ran for this alarm and endpoint within its cooldown."""
+        ran, result = self.guard.run(self.alarm_name, self.endpoint_name, action, fn, *args)
+        if not ran:
+            self.suppressed_actions.append(action)
+        return ran, result
+
+    def add_action(self, graph: ActionGraph, action: str, fn, *args, depends_on: Optional[List[str]] = None):
+        """Add an action to the graph; mitigations go through the cooldown guard."""
+        def step():
+            if action not in ACTION_COOLDOWNS:
+                return fn(*args)
+            ran, result = self.run_action(action, fn, *args)
+            if not ran:
+                raise ActionSkipped("already ran within its cooldown")
+            return result
+        graph.add(action, step, depends_on = depends_on or [], timeout = ACTION_TIMEOUTS.get(action))
+
+    def run_graph(self, graph: ActionGraph, problem: str) -> Dict[str, Dict[str, Any]]:
+        """Run the actions, and send an error alert if any failed or timed out."""
+        results = graph.run()
+        failures = {name: result for name, result in results.items() if result['status'] in ('failed', 'timed_out')}
+        if failures:
+            try:
+                self.send_alert(
+                    subject = f"ERROR: Failed to handle {problem}",
+                    message = "; ".join(f"{name} {result['status']}: {result.get('error')}"
+                                        for name, result in failures.items())
+                )
+            except Exception as e:
+                logger.error(f"Error sending failure alert: {e}")
+        return results
 
-    def handle_accuracy_drop(self):
+    @staticmethod
+    def outcomes(graph: ActionGraph, actions: List[str]) -> str:
+        """Outcome of finished actions, for the alert that waited on them."""
+        return "".join(f" {name}: {graph.results[name]['status']}." for name in actions)
+
+    @staticmethod
+    def scaling_summary(graph: ActionGraph) -> str:
+        """What the capacity planner decided, for the latency alert."""
+        plan = graph.results['scale_up'].get('result')
+        if not plan:
+            return ""
+        if plan['current'] is None:
+            return f" Not scaled ({plan['reason']})."
+        summary = f" Instances: {plan['current']} -> {plan['desired']} ({plan['reason']})"
+        if plan.get('desired_p95_ms') is None:
+            return summary + "."
+        return summary + f", modelled p95 {plan['desired_p95_ms']} ms against a {TARGET_P95_MS:g} ms target."
+
+    def handle_accuracy_drop(self) -> Dict[str, Dict[str, Any]]:
         """Handle model accuracy dropping below threshold."""
         logger.info(f"Handling accuracy drop for alarm: {self.alarm_name}")
+        graph = ActionGraph(max_workers = ACTION_WORKERS)
 
-        try:
-            # Get current endpoint configuration
-            endpoint_name = self.event['detail']['configuration'].get('dimensions', {}).get('EndpointName')
+        # The alert goes out once the switch to the backup model has finished
+        notify_after = []
+        if self.trigger['value'] < 0.8:
+            self.add_action(graph, 'switch_to_backup', self.switch_to_backup_model, self.endpoint_name)
+            notify_after.append('switch_to_backup')
 
-            if self.trigger['value'] < 0.8:
-                self._switch_to_backup_model(endpoint_name)
+        # Trigger model retraining
+        self.add_action(graph, 'retrain', self.trigger_retraining_pipeline)
 
-            # Trigger model retraining
-            self._trigger_retraining_pipeline()
+        # Send high-priority alert
+        self.add_action(graph, 'notify', lambda: self.send_alert(
+            subject = "CRITICAL: Model Accuracy Drop Detected",
+            message = f"Model accuracy has dropped to {self.trigger['value']}. "
+                      f"Automatic Response actions have been initiated." + self.outcomes(graph, notify_after)
+        ), depends_on = notify_after)
 
-            # Send high-priority alert
-            self._send_alert(
-                subject = "CRITICAL: Model Accuracy Drop Detected",
-                message = f"Model accuracy has dropped to {self.trigger['value']}."
-                          f"Automatic Response actions have been initiated."
-            )
+        return self.run_graph(graph, "accuracy drop")
 
-        except Exception as e:
-            logger.error(f"Error handling accuracy drop: {e}")
-            self._send_alert(
-                subject = "ERROR: Failed to handle accuracy drop",
-                message = f"Error: {str(e)}"
-            )
-
-    def handle_high_latency(self):
+    def handle_high_latency(self) -> Dict[str, Dict[str, Any]]:
         """Handle high prediction latency."""
         logger.info(f"Handling high latency for alarm: {self.alarm_name}")
+        graph = ActionGraph(max_workers = ACTION_WORKERS)
 
-        try: 
-            endpoint_name = self.event['detail']['configuration'].get('dimensions', {}).get('EndpointName')
-
-            # Scale up endpoint
-            response = sagemaker.update_endpoint_config(
-                EndpointConfigName = f"{endpoint_name}-config",
-                InstanceCount = 2
-            )
-
-            self._send_alert(
-                subject = "WARNING: High Latency Detected",
-                message = f"High prediction latency detected. Scaling up endpoint {endpoint_name}."
-            )
+        # Scale up endpoint, then report it
+        self.add_action(graph, 'scale_up', self.scale_up_endpoint, self.endpoint_name)
+        self.add_action(graph, 'notify', lambda: self.send_alert(
+            subject = "WARNING: High Latency Detected",
+            message = f"High prediction latency detected on endpoint {self.endpoint_name}."
+                      + self.outcomes(graph, ['scale_up']) + self.scaling_summary(graph)
+        ), depends_on = ['scale_up'])
 
-        except Exception as e:
-            logger.error(f"Error handling high latency: {e}")
-            self._send_alert(
-                subject = "ERROR: Failed to handle high latency",
-                message = f"Error: {str(e)}"
-            )
+        return self.run_graph(graph, "high latency")
 
-    def handle_data_drift(self):
+    def handle_data_drift(self) -> Dict[str, Dict[str, Any]]:
         """Handle detected data drift."""
         logger.info(f"Handling data drift for alarm: {self.alarm_name}")
-        
+        graph = ActionGraph(max_workers = ACTION_WORKERS)
+        drift_value = self.trigger['value']
+
+        if drift_value > 0.3:  # Significant drift
+            # Retraining and the alert are independent
+            self.add_action(graph, 'retrain', self.trigger_retraining_pipeline)
+            self.add_action(graph, 'notify', lambda: self.send_alert(
+                subject = "WARNING: Significant Data Drift Detected",
+                message = f"Data drift value: {drift_value}. Initiating model retraining."
+            ))
+        else:
+            self.add_action(graph, 'notify', lambda: self.send_alert(
+                subject = "INFO: Minor Data Drift Detected",
+                message = f"Data drift value: {drift_value}. Monitoring situation."
+            ))
+
+        return self.run_graph(graph, "data drift")
+
+    def scale_up_endpoint(self, endpoint_name: str) -> Dict[str, Any]:
+        """Scale the endpoint to the instance count the capacity planner asks for."""
         try:
-            # Capture current distribution
-            drift_value = self.trigger['value']
-            
-            if drift_value > 0.3:  # Significant drift
-                # Trigger retraining pipeline
-                self._trigger_retraining_pipeline()
-                
-                self._send_alert(
-                    subject="WARNING: Significant Data Drift Detected",
-                    message=f"Data drift value: {drift_value}. Initiating model retraining."
+            sagemaker = get_client('sagemaker')
+            variant = sagemaker.describe_endpoint(EndpointName=endpoint_name)['ProductionVariants'][0]
+            current = variant.get('CurrentInstanceCount')
+            if current is None:
+                # Serverless variants scale themselves and have no instance count to change
+                logger.info(f"Not scaling endpoint {endpoint_name}: {variant['VariantName']} is not instance-based")
+                return {'current': None, 'required': None, 'desired': None, 'reason': 'not_instance_based'}
+
+            metrics = fetch_endpoint_load(get_client('cloudwatch'), endpoint_name, variant['VariantName'],
+                                          SCALING_WINDOW_MINUTES, SCALING_PERIOD_SECONDS)
+            arrival_rate, service_time = endpoint_load(metrics['MetricDataResults'], SCALING_PERIOD_SECONDS)
+            planner = CapacityPlanner(TARGET_P95_MS, MIN_INSTANCES, MAX_INSTANCES, max_step_up = MAX_SCALE_STEP,
+                                      workers_per_instance = WORKERS_PER_INSTANCE,
+                                      no_metrics_step = NO_METRICS_SCALE_STEP)
+            plan = planner.plan(current, arrival_rate, service_time)
+
+            # A latency alarm only ever adds capacity
+            if plan['desired'] > plan['current']:
+                sagemaker.update_endpoint_weights_and_capacities(
+                    EndpointName=endpoint_name,
+                    DesiredWeightsAndCapacities=[{
+                        'VariantName': variant['VariantName'],
+                        'DesiredInstanceCount': plan['desired']
+                    }]
                 )
+                logger.info(f"Scaled up endpoint {endpoint_name} from {plan['current']} to {plan['desired']} instances")
             else:
-                self._send_alert(
-                    subject="INFO: Minor Data Drift Detected",
-                    message=f"Data drift value: {drift_value}. Monitoring situation."
-                )
-                
+                logger.info(f"Not scaling endpoint {endpoint_name}: {plan['reason']}")
+            return plan
         except Exception as e:
-            logger.error(f"Error handling data drift: {e}")
-            self._send_alert(
-                subject="ERROR: Failed to handle data drift",
-                message=f"Error: {str(e)}"
-            )
+            logger.error(f"Error scaling up endpoint: {e}")
+            raise
 
     def switch_to_backup_model(self, endpoint_name: str):
         """Switch endpoint to backup model."""
         try:
-            response = sagemaker.update_endpoint(
+            response = get_client('sagemaker').update_endpoint(
                 EndpointName=endpoint_name,
                 EndpointConfigName=f"{endpoint_name}-backup-config"
             )
@@ -114,40 +251,39 @@ class ModelMonitoringResponse:
     def trigger_retraining_pipeline(self):
         """Trigger model retraining via GitHub Actions."""
         try:
-            # Create GitHub client
-            github = boto3.client('secretsmanager')
-            
-            # Get GitHub token from AWS Secrets Manager
-            github_token = github.get_secret_value(
-                SecretId='github-actions-token'
-            )['SecretString']
-
             # Define repository details
             repo = "edge-healthcare-project"
             owner = "talhazaman2001"
             
             # Trigger GitHub workflow
             import requests
-            response = requests.post(
-                f'https://api.github.com/repos/{owner}/{repo}/dispatches',
-                headers={
-                    'Authorization': f'token {github_token}',
-                    'Accept': 'application/vnd.github.v3+json'
-                },
-                json={
-                    'event_type': 'retrain_model',
-                    'client_payload': {
-                        'triggered_by': 'monitoring_alarm',
-                        'timestamp': str(datetime.now()),
-                        'metrics': self.trigger
-                    }
-                }
-            )
+            def dispatch(github_token: str):
+                return requests.post(
+                    f'https://api.github.com/repos/{owner}/{repo}/dispatches',
+                    headers={
+                        'Authorization': f'token {github_token}',
+                        'Accept': 'application/vnd.github.v3+json'
+                    },
+                    json={
+                        'event_type': 'retrain_model',
+                        'client_payload': {
+                            'triggered_by': 'monitoring_alarm',
+                            'timestamp': datetime.now().isoformat(),
+                            'metrics': self.trigger
+                        }
+                    },
+                    timeout=GITHUB_HTTP_TIMEOUT
+                )
+
+            response = dispatch(get_github_token())
+            if response.status_code == 401:
+                # The token was rotated since it was cached
+                response = dispatch(get_github_token(refresh=True))
             
             if response.status_code == 204:
                 logger.info("Successfully triggered GitHub Actions workflow")
             else:
-                logger.error(f"Failed to trigger workflow: {response.status_code}")
+                raise RuntimeError(f"Failed to trigger workflow: {response.status_code}")
                 
         except Exception as e:
             logger.error(f"Error triggering GitHub Actions workflow: {e}")
@@ -156,7 +292,7 @@ class ModelMonitoringResponse:
     def send_alert(self, subject: str, message: str):
         """Send SNS alert."""
         try:
-            sns.publish(
+            get_client('sns').publish(
                 TopicArn='your-sns-topic-arn',  # Replace with your SNS topic
                 Subject =subject,
                 Message =message
@@ -170,21 +306,29 @@ def handler(event, context):
     try:
         logger.info(f"Received alarm event: {json.dumps(event)}")
         
-        response_handler = ModelMonitoringResponse(event)
+        guard = ActionGuard(get_lease_store(), ACTION_COOLDOWNS, owner = getattr(context, 'aws_request_id', None),
+                            fail_open = LEASE_FAIL_OPEN_ACTIONS)
+        response_handler = ModelMonitoringResponse(event, guard)
         alarm_name = event['detail']['alarmName'].lower()
         
+        actions = {}
         if "accuracy" in alarm_name:
-            response_handler.handle_accuracy_drop()
+            actions = response_handler.handle_accuracy_drop()
         elif "latency" in alarm_name:
-            response_handler.handle_high_latency()
+            actions = response_handler.handle_high_latency()
         elif "drift" in alarm_name:
-            response_handler.handle_data_drift()
+            actions = response_handler.handle_data_drift()
         else:
             logger.warning(f"Unknown alarm type: {alarm_name}")
-            
+
+        logger.info(f"Alarm actions: {json.dumps(actions, default=str)}")
         return {
             'statusCode': 200,
-            'body': json.dumps('Alarm handled successfully')
+            'body': json.dumps({
+                'message': 'Alarm handled successfully',
+                'actions': actions,
+                'suppressed_actions': response_handler.suppressed_actions
+            }, default=str)
         }
         
     except Exception as e:
@@ -0,0 +1,244 @@
+import logging
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger()
+
+# Upper limit for the required-instances search, well past any max_instances
+MAX_MODELLED_INSTANCES = 1000
+
+
+def erlang_c(servers: int, offered_load: float) -> float:
+    """
+    Probability that a request has to queue in an M/M/c system.
+
+    Uses the Erlang B recursion, which stays stable for large server counts
+    where the factorial form overflows.
+
+    Args:
+        servers: Number of servers (c)
+        offered_load: Arrival rate times mean service time (a = λ/μ), below c
+    """
+    if offered_load <= 0:
+        return 0.0
+    if offered_load >= servers:
+        return 1.0
+    blocking = 1.0
+    for k in range(1, servers + 1):
+        blocking = offered_load * blocking / (k + offered_load * blocking)
+    return servers * blocking / (servers - offered_load * (1 - blocking))
+
+
+def response_time_quantile(arrival_rate: float, service_time: float, servers: int,
+                           quantile: float = 0.95) -> float:
+    """
+    Response time (queueing plus service) at the given quantile for M/M/c.
+
+    A request waits with probability C (Erlang C), and then for an
+    Exp(cμ - λ) time, before an Exp(μ) service. The tail
+    P(T > t) = (1 - C)·e^(-μt) + C·P(Exp(cμ - λ) + Exp(μ) > t)
+    is inverted by bisection.
+
+    Returns:
+        float: Seconds; infinity when the servers can't keep up (λ ≥ cμ)
+    """
+    mu = 1.0 / service_time
+    if arrival_rate <= 0:
+        return -math.log(1 - quantile) * service_time
+    theta = servers * mu - arrival_rate
+    if theta <= 0:
+        return math.inf
+    wait_probability = erlang_c(servers, arrival_rate * service_time)
+
+    def tail(t: float) -> float:
+        if abs(theta - mu) < 1e-9 * mu:
+            queued = (1 + mu * t) * math.exp(-mu * t)
+        else:
+            queued = (theta * math.exp(-mu * t) - mu * math.exp(-theta * t)) / (theta - mu)
+        return (1 - wait_probability) * math.exp(-mu * t) + wait_probability * queued
+
+    low, high = 0.0, service_time
+    while tail(high) > 1 - quantile:
+        low, high = high, high * 2
+    for _ in range(60):
+        mid = (low + high) / 2
+        if tail(mid) > 1 - quantile:
+            low = mid
+        else:
+            high = mid
+    return high
+
+
+def endpoint_load(results: Sequence[Dict[str, Any]], period: int, smoothing: int = 3) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Arrival rate and mean service time from GetMetricData results.
+
+    The arrival rate is the busiest stretch of `smoothing` periods, so a
+    sustained surge counts but a single spiky minute is averaged down. The
+    service time is the invocation-weighted mean ModelLatency.
+
+    Args:
+        results: MetricDataResults with 'invocations' (Sum) and 'latency'
+            (ModelLatency Average, microseconds) series
+        period: Seconds per datapoint
+        smoothing: Datapoints per rolling window for the arrival rate
+
+    Returns:
+        Tuple[Optional[float], Optional[float]]: Requests per second and
+            seconds per request, or None when there are no datapoints
+    """
+    series = {result['Id']: dict(zip(result['Timestamps'], result['Values'])) for result in results}
+    invocations = series.get('invocations', {})
+    latency = series.get('latency', {})
+    timestamps = sorted(invocations)
+    if not timestamps:
+        return None, None
+
+    counts = [invocations[t] for t in timestamps]
+    window = max(1, min(smoothing, len(counts)))
+    busiest = max(sum(counts[i:i + window]) for i in range(len(counts) - window + 1))
+    arrival_rate = busiest / (window * period)
+
+    weighted = [(latency[t], invocations[t]) for t in timestamps if t in latency and invocations[t] > 0]
+    total = sum(count for _, count in weighted)
+    if not total:
+        return arrival_rate, None
+    service_time = sum(value * count for value, count in weighted) / total / 1e6
+    return arrival_rate, service_time
+
+
+def fetch_endpoint_load(cloudwatch: Any, endpoint_name: str, variant_name: str,
+                        window_minutes: int = 15, period: int = 60,
+                        now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Pull recent Invocations and ModelLatency for a variant; returns the raw MetricDataResults."""
+    end = now or datetime.now(timezone.utc)
+    dimensions = [{'Name': 'EndpointName', 'Value': endpoint_name},
+                  {'Name': 'VariantName', 'Value': variant_name}]
+    queries = [
+        {'Id': query_id, 'MetricStat': {
+            'Metric': {'Namespace': 'AWS/SageMaker', 'MetricName': metric_name, 'Dimensions': dimensions},
+            'Period': period,
+            'Stat': stat
+        }}
+        for query_id, metric_name, stat in (('invocations', 'Invocations', 'Sum'),
+                                            ('latency', 'ModelLatency', 'Average'))
+    ]
+    results: Dict[str, Dict[str, List]] = {}
+    kwargs = {'MetricDataQueries': queries, 'StartTime': end - timedelta(minutes=window_minutes), 'EndTime': end}
+    while True:
+        response = cloudwatch.get_metric_data(**kwargs)
+        for result in response['MetricDataResults']:
+            merged = results.setdefault(result['Id'], {'Id': result['Id'], 'Timestamps': [], 'Values': []})
+            merged['Timestamps'].extend(result['Timestamps'])
+            merged['Values'].extend(result['Values'])
+        if not response.get('NextToken'):
+            return {'MetricDataResults': list(results.values())}
+        kwargs['NextToken'] = response['NextToken']
+
+
+class CapacityPlanner:
+    """
+    Size an endpoint for a target p95 latency with an M/M/c queueing model.
+
+    Each instance serves `workers_per_instance` requests at a time, so an
+    endpoint of n instances is treated as c = n * workers_per_instance
+    servers. The required count is the smallest that meets the target p95
+    and keeps utilisation under max_utilisation; the desired count is that,
+    clamped to [min_instances, max_instances] and moved at most max_step_up
+    (or max_step_down) instances from the current count.
+
+    Without Invocations or ModelLatency datapoints there is no load to model,
+    so by default the count is left alone; no_metrics_step adds that many
+    instances instead, for deployments that would rather scale blind than
+    not at all.
+
+    Args:
+        target_p95_ms: Response time the endpoint should hold at p95
+        min_instances: Fewest instances to run
+        max_instances: Most instances to run
+        max_step_up: Most instances to add in one step
+        max_step_down: Most instances to remove in one step
+        workers_per_instance: Concurrent requests per instance
+        max_utilisation: Utilisation ceiling, for headroom the model doesn't capture
+        no_metrics_step: Instances to add when there are no metrics (0 keeps the count)
+    """
+
+    def __init__(self, target_p95_ms: float, min_instances: int = 1, max_instances: int = 8,
+                 max_step_up: int = 2, max_step_down: int = 1, workers_per_instance: int = 1,
+                 max_utilisation: float = 0.8, no_metrics_step: int = 0):
+        if min_instances < 1 or max_instances < min_instances:
+            raise ValueError("Need 1 <= min_instances <= max_instances")
+        self.target_p95 = target_p95_ms / 1000
+        self.min_instances = min_instances
+        self.max_instances = max_instances
+        self.max_step_up = max_step_up
+        self.max_step_down = max_step_down
+        self.workers_per_instance = workers_per_instance
+        self.max_utilisation = max_utilisation
+        self.no_metrics_step = no_metrics_step
+
+    def predicted_p95_ms(self, instances: int, arrival_rate: float, service_time: float) -> Optional[float]:
+        """Model p95 in ms at an instance count; None when the instances can't keep up."""
+        p95 = response_time_quantile(arrival_rate, service_time, instances * self.workers_per_instance)
+        return round(p95 * 1000, 1) if math.isfinite(p95) else None
+
+    def required_instances(self, arrival_rate: float, service_time: float) -> Tuple[int, bool]:
+        """
+        Smallest instance count that meets the target and utilisation ceiling.
+
+        Returns:
+            Tuple[int, bool]: The count, and whether the target is reachable.
+                Service time alone can exceed the target; then the count only
+                satisfies the utilisation ceiling.
+        """
+        # Start from the fewest instances that keep utilisation under the ceiling, then add until p95 meets the target
+        instances = max(1, math.ceil(arrival_rate * service_time / (self.max_utilisation * self.workers_per_instance)))
+        reachable = -math.log(0.05) * service_time <= self.target_p95
+        if not reachable:
+            return instances, False
+        while (response_time_quantile(arrival_rate, service_time, instances * self.workers_per_instance) > self.target_p95
+               and instances < MAX_MODELLED_INSTANCES):
+            instances += 1
+        return instances, True
+
+    def plan(self, current: int, arrival_rate: Optional[float], service_time: Optional[float]) -> Dict[str, Any]:
+        """
+        Instance count to move to from `current` for the observed load.
+
+        Returns:
+            Dict[str, Any]: current, required, desired, the reason, and the
+                predicted p95 (ms) at the current and desired counts
+        """
+        if arrival_rate is None or service_time is None:
+            # No load to model: hold, or take the configured blind step
+            desired = min(self.max_instances, max(self.min_instances, current + self.no_metrics_step))
+            return {'current': current, 'required': None, 'desired': desired, 'reason': 'no_metrics'}
+
+        required, reachable = self.required_instances(arrival_rate, service_time)
+        bounded = min(self.max_instances, max(self.min_instances, required))
+        desired = min(current + self.max_step_up, max(current - self.max_step_down, bounded))
+
+        if not reachable:
+            reason = 'target_below_service_time'
+        elif desired != bounded:
+            reason = 'step_limited'
+        elif bounded < required:
+            reason = 'max_instances'
+        elif desired == current:
+            reason = 'capacity_sufficient'
+        else:
+            reason = 'scale_up' if desired > current else 'scale_down'
+
+        plan = {
+            'current': current,
+            'required': required,
+            'desired': desired,
+            'reason': reason,
+            'arrival_rate': round(arrival_rate, 3),
+            'service_time_ms': round(service_time * 1000, 2),
+            'current_p95_ms': self.predicted_p95_ms(current, arrival_rate, service_time),
+            'desired_p95_ms': self.predicted_p95_ms(desired, arrival_rate, service_time)
+        }
+        logger.info(f"Capacity plan: {plan}")
+        return plan
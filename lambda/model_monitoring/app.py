@@ -1,69 +1,134 @@
+from __future__ import annotations
+
+import importlib
 import json
-import boto3
+import os
 import time
-import numpy as np
-from datetime import datetime
-from typing import Dict, Any, Tuple, List, Union
+from typing import Dict, Any, Tuple, List, Union, TYPE_CHECKING
 import logging
-from botocore.exceptions import ClientError
+from aws_clients import get_client, get_resource
+from kinesis_batch import is_kinesis_batch
+
+# NumPy, boto3 and the metric modules that need them are imported where
+# they're first used, so invocations that fail validation never load them
+if TYPE_CHECKING:
+    import numpy as np
+    from baselines import BaselineCache, BaselineHistogram
+    from kinesis_batch import ModelVersionBatch
+    from metric_writer import MetricWriter
+    from sketches import Sketch
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialise AWS Clients with error handling
-def get_aws_client(service_name: str):
-    try:
-        return boto3.client(service_name)
-    except Exception as e:
-        logger.error(f"Failed to initialise {service_name} client: {e}")
-        raise
+# Drift baselines: registered once per model version, referenced by id in events
+BASELINE_STORE = os.getenv('BASELINE_STORE', 'dynamodb')  # 'dynamodb' or 'file'
+BASELINE_TABLE = os.getenv('BASELINE_TABLE', 'model-baselines')
+BASELINE_DIR = os.getenv('BASELINE_DIR', '/tmp/baselines')
+BASELINE_CACHE_TTL_SECONDS = float(os.getenv('BASELINE_CACHE_TTL_SECONDS', '300'))
+BASELINE_BINS = int(os.getenv('BASELINE_BINS', '20'))
 
-def get_aws_resource(service_name: str):
-    try:
-        return boto3.resource(service_name)
-    except Exception as e:
-        logger.error(f"Failed to initialise {service_name} resource: {e}")
-        raise
+# Metric writes are buffered and sent in batches; with METRIC_BUFFER_SECONDS=0
+# the buffer is written at the end of every invocation
+METRIC_BUFFER_RECORDS = int(os.getenv('METRIC_BUFFER_RECORDS', '100'))
+METRIC_BUFFER_SECONDS = float(os.getenv('METRIC_BUFFER_SECONDS', '0'))
+METRIC_STATISTIC_SETS = os.getenv('METRIC_STATISTIC_SETS', 'false').lower() == 'true'
+# 'api' calls put_metric_data; 'emf' writes Embedded Metric Format lines to the function's logs
+METRICS_BACKEND = os.getenv('METRICS_BACKEND', 'api').lower()
+
+# With EAGER_INIT=true everything is loaded during the init phase instead,
+# which suits provisioned concurrency
+EAGER_INIT = os.getenv('EAGER_INIT', 'false').lower() == 'true'
+
+# Created on first use by get_baseline_cache() and get_metric_writer()
+baseline_cache = None
+metric_writer = None
+
+def get_baseline_cache() -> BaselineCache:
+    """The baseline cache, created on first use."""
+    global baseline_cache
+    if baseline_cache is None:
+        from baselines import BaselineCache, DynamoDBBaselineStore, LocalFileBaselineStore
+        try:
+            if BASELINE_STORE == 'file':
+                baseline_store = LocalFileBaselineStore(BASELINE_DIR)
+            else:
+                baseline_store = DynamoDBBaselineStore(get_resource('dynamodb').Table(BASELINE_TABLE))
+        except Exception as e:
+            logger.error(f"Failed to initialise baseline store: {e}")
+            raise
+        baseline_cache = BaselineCache(baseline_store, BASELINE_CACHE_TTL_SECONDS)
+    return baseline_cache
 
-# Initialise AWS clients
-try:
-    dynamodb = get_aws_resource('dynamodb')
-    cloudwatch = get_aws_client('cloudwatch')
-    table = dynamodb.Table('model-metrics')
-except Exception as e:
-    logger.error(f"Failed to initialise AWS services: {e}")
-    raise
+def get_metric_writer() -> MetricWriter:
+    """The metric writer, created on first use."""
+    global metric_writer
+    if metric_writer is None:
+        from metric_writer import MetricWriter
+        try:
+            table = get_resource('dynamodb').Table('model-metrics')
+            # The EMF backend never calls CloudWatch, so it doesn't need a client
+            cloudwatch = get_client('cloudwatch') if METRICS_BACKEND == 'api' else None
+        except Exception as e:
+            logger.error(f"Failed to initialise AWS services: {e}")
+            raise
+        metric_writer = MetricWriter(table, cloudwatch,
+                                     namespace='Healthcare/ML',
+                                     max_records=METRIC_BUFFER_RECORDS,
+                                     max_age_seconds=METRIC_BUFFER_SECONDS,
+                                     statistic_sets=METRIC_STATISTIC_SETS,
+                                     backend=METRICS_BACKEND)
+    return metric_writer
 
-def calculate_accuracy(predictions: List[float], actuals: List[float]) -> float:
+def calculate_accuracy(predictions: List[float], actuals: List[float], threshold: float = 0.5) -> float:
     """
     Calculate model accuracy with input validation.
     
     Args:
-        predictions: List of model predictions
+        predictions: List of model predictions (labels or probabilities)
         actuals: List of actual values
+        threshold: Decision threshold for probabilistic predictions
         
     Returns:
         float: Accuracy score between 0 and 1
     """
     try:
-        if not predictions or not actuals:
+        if len(predictions) == 0 or len(actuals) == 0:
             logger.warning("Empty predictions or actuals list")
             return 0.0
-            
-        if len(predictions) != len(actuals):
-            logger.error("Predictions and actuals lists have different lengths")
-            return 0.0
-            
-        correct = sum(1 for p, a in zip(predictions, actuals) if p == a)
-        return correct / len(predictions)
+
+        from evaluation import evaluate_predictions
+        return evaluate_predictions(predictions, actuals, threshold)['accuracy']
     except Exception as e:
         logger.error(f"Error calculating accuracy: {e}")
         return 0.0
 
+def calculate_quality_metrics(predictions: List[float], actuals: List[float], threshold: float = 0.5) -> Dict[str, Any]:
+    """
+    Calculate accuracy, precision/recall/F1, Brier score, ROC-AUC and the confusion matrix.
+    
+    Args:
+        predictions: List of model predictions (labels or probabilities)
+        actuals: List of actual values
+        threshold: Decision threshold for probabilistic predictions
+        
+    Returns:
+        Dict[str, Any]: Quality metrics, with accuracy 0.0 if they can't be computed
+    """
+    try:
+        from evaluation import evaluate_predictions
+        return evaluate_predictions(predictions, actuals, threshold)
+    except Exception as e:
+        logger.error(f"Error calculating quality metrics: {e}")
+        return {'accuracy': 0.0}
+
 def calculate_drift(current_data: np.array, baseline_data: np.array) -> float:
     """
-    Calculate data drift using KL divergence with enhanced error handling.
+    Calculate data drift using KL divergence against raw baseline data.
+
+    The baseline is histogrammed on every call; prefer registering it once
+    and using calculate_baseline_drift.
     
     Args:
         current_data: numpy array of current data
@@ -78,26 +143,155 @@ def calculate_drift(current_data: np.array, baseline_data: np.array) -> float:
             logger.warning("Empty data arrays provided for drift calculation")
             return 0.0
 
-        # Normalise data
-        current_dist, _ = np.histogram(current_data, bins=20, density=True)
-        baseline_dist, _ = np.histogram(baseline_data, bins=20, density=True)
-        
-        # small epsilon to avoid division by zero
-        epsilon = 1e-10
-        current_dist = current_dist + epsilon
-        baseline_dist = baseline_dist + epsilon
-        
-        # Calculate KL divergence
-        kl_div = np.sum(current_dist * np.log(current_dist / baseline_dist))
-        
+        from baselines import BaselineHistogram
+        baseline = BaselineHistogram.from_data('inline', baseline_data, BASELINE_BINS)
+        kl_div = baseline.kl_divergence(current_data)
+
         # Log drift value for monitoring
         logger.info(f"Calculated drift value: {kl_div}")
-        return float(kl_div)
+        return kl_div
         
     except Exception as e:
         logger.error(f"Error calculating drift: {str(e)}", exc_info=True)
         return 0.0
 
+def calculate_baseline_drift(current_data: np.array, baseline: BaselineHistogram) -> float:
+    """
+    Calculate data drift using KL divergence against a registered baseline.
+
+    The current data is binned on the baseline's edges, so both distributions
+    are compared bin for bin.
+    
+    Args:
+        current_data: numpy array of current data
+        baseline: Registered baseline histogram
+        
+    Returns:
+        float: KL divergence score
+    """
+    try:
+        if len(current_data) == 0:
+            logger.warning("Empty data array provided for drift calculation")
+            return 0.0
+
+        kl_div = baseline.kl_divergence(current_data)
+        logger.info(f"Calculated drift value against baseline {baseline.baseline_id}: {kl_div}")
+        return kl_div
+
+    except Exception as e:
+        logger.error(f"Error calculating drift: {str(e)}", exc_info=True)
+        return 0.0
+
+def calculate_sketch_drift(current_sketch: Sketch, baseline: BaselineHistogram) -> float:
+    """
+    Calculate data drift using KL divergence from a sketch of the current data.
+
+    A histogram sketch binned on the baseline's edges gives the exact value;
+    a KLL sketch is binned through its estimated CDF.
+    
+    Args:
+        current_sketch: Sketch of the current data
+        baseline: Registered or inline baseline histogram
+        
+    Returns:
+        float: KL divergence score
+    """
+    try:
+        if len(current_sketch) == 0:
+            logger.warning("Empty sketch provided for drift calculation")
+            return 0.0
+
+        from sketches import bin_counts
+        kl_div = baseline.kl_divergence_counts(bin_counts(current_sketch, baseline.edges))
+        logger.info(f"Calculated drift value from {len(current_sketch)} sketched values: {kl_div}")
+        return kl_div
+
+    except Exception as e:
+        logger.error(f"Error calculating drift: {str(e)}", exc_info=True)
+        return 0.0
+
+def calculate_feature_drift(current_data: np.ndarray, baseline_data: np.ndarray,
+                            feature_names: List[str] = None) -> Dict[str, Any]:
+    """
+    Calculate per-feature PSI, KS and JS drift for multi-channel vitals.
+    
+    Args:
+        current_data: numpy array of current data, shape (samples, features)
+        baseline_data: numpy array of baseline data, shape (samples, features)
+        feature_names: Optional names for the feature columns
+        
+    Returns:
+        Dict[str, Any]: Per-feature drift, ranked features and drifted features
+            (empty if drift can't be computed)
+    """
+    try:
+        from drift import feature_drift
+        report = feature_drift(current_data, baseline_data, feature_names)
+        logger.info(f"Feature drift ranking: {report['ranked_features']}, drifted: {report['drifted_features']}")
+        return report
+    except Exception as e:
+        logger.error(f"Error calculating feature drift: {str(e)}", exc_info=True)
+        return {}
+
+def load_sketch(value: Union[str, List[str]]) -> Sketch:
+    """
+    Decode a base64 sketch, or merge a list of them (e.g. one per invocation or window).
+    
+    Args:
+        value: Base64 sketch or list of base64 sketches
+        
+    Returns:
+        Sketch: Decoded (and merged) sketch
+    """
+    from sketches import decode_sketch, merge_sketches
+    if isinstance(value, list):
+        return merge_sketches([decode_sketch(item) for item in value])
+    return decode_sketch(value)
+
+def calculate_latency_percentiles(latency_sketch: Sketch) -> Dict[str, float]:
+    """
+    Calculate p50/p95/p99 latency from a KLL sketch of latencies in milliseconds.
+    
+    Args:
+        latency_sketch: KLL sketch of prediction latencies
+        
+    Returns:
+        Dict[str, float]: latency_p50, latency_p95 and latency_p99
+    """
+    p50, p95, p99 = latency_sketch.quantiles([0.5, 0.95, 0.99])
+    return {
+        'latency_p50': round(float(p50), 2),
+        'latency_p95': round(float(p95), 2),
+        'latency_p99': round(float(p99), 2)
+    }
+
+def register_baseline(event: Dict) -> Dict:
+    """
+    Register a drift baseline from raw data, usually once per model version.
+    
+    Args:
+        event: Lambda event with baseline_data and either baseline_id or model_version
+        
+    Returns:
+        Dict: Response dictionary
+    """
+    baseline_id = event.get('baseline_id') or event.get('model_version')
+    if not baseline_id or 'baseline_data' not in event:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': "Baseline registration needs baseline_data and baseline_id or model_version"})
+        }
+
+    baseline = get_baseline_cache().register(baseline_id, event['baseline_data'], int(event.get('bins', BASELINE_BINS)))
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'baseline_id': baseline.baseline_id,
+            'bins': len(baseline.probabilities),
+            'sample_count': baseline.sample_count
+        })
+    }
+
 def measure_latency(start_time: float) -> float:
     """
     Calculate prediction latency in milliseconds.
@@ -115,69 +309,69 @@ def measure_latency(start_time: float) -> float:
         logger.error(f"Error measuring latency: {e}")
         return 0.0
 
-def store_metrics(metrics: Dict[str, Any], model_version: str) -> bool:
+def cloudwatch_metrics(metrics: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Store metrics in DynamoDB and CloudWatch with enhanced error handling.
+    Map a metrics record to CloudWatch metric names (None values are skipped).
+    
+    Args:
+        metrics: Dictionary of calculated metrics
+        
+    Returns:
+        Dict[str, Any]: CloudWatch metric name to value
+    """
+    return {
+        'ModelAccuracy': metrics['accuracy'],
+        'ModelPrecision': metrics.get('precision'),
+        'ModelRecall': metrics.get('recall'),
+        'ModelF1': metrics.get('f1'),
+        'BrierScore': metrics.get('brier_score'),
+        'ModelRocAuc': metrics.get('roc_auc'),
+        'PredictionLatency': metrics['latency'],
+        'PredictionLatencyP50': metrics.get('latency_p50'),
+        'PredictionLatencyP95': metrics.get('latency_p95'),
+        'PredictionLatencyP99': metrics.get('latency_p99'),
+        'DataDrift': metrics['drift'],
+        'DriftedFeatureCount': len(metrics['feature_drift'].get('drifted_features', []))
+        if 'feature_drift' in metrics else None
+    }
+
+def store_metrics(metrics: Dict[str, Any], model_version: str, flush: bool = True) -> bool:
+    """
+    Buffer metrics for DynamoDB and CloudWatch and write them in batches.
+
+    Records and data points are written by the metric writer once its buffer
+    is full or old enough (METRIC_BUFFER_RECORDS / METRIC_BUFFER_SECONDS);
+    pass flush=False when adding a batch of records and flush once at the end.
     
     Args:
         metrics: Dictionary of metrics to store
         model_version: Version identifier of the model
+        flush: Write the buffer if it is due
         
     Returns:
         bool: Success status
     """
     timestamp = int(time.time())
-    success = True
 
-    # Store in DynamoDB
     try:
-        table.put_item(
-            Item={
-                'ModelVersion': model_version,
-                'Timestamp': timestamp,
-                'Metrics': metrics,
-                'CreatedAt': datetime.utcnow().isoformat()
-            }
-        )
-        logger.info(f"Successfully stored metrics in DynamoDB for model version {model_version}")
-    except ClientError as e:
-        logger.error(f"DynamoDB ClientError: {e.response['Error']['Message']}")
-        success = False
+        writer = get_metric_writer()
+        writer.add_record(model_version, metrics, timestamp)
+        dimensions = {'ModelVersion': model_version, 'Environment': 'production'}
+        for metric_name, value in cloudwatch_metrics(metrics).items():
+            if value is not None:
+                unit = 'Milliseconds' if metric_name.startswith('PredictionLatency') else 'None'
+                writer.add_metric(metric_name, value, unit, dimensions, timestamp)
     except Exception as e:
-        logger.error(f"Error storing metrics in DynamoDB: {e}")
-        success = False
+        logger.error(f"Error buffering metrics for model version {model_version}: {e}")
+        return False
 
-    # Send to CloudWatch
+    if not flush:
+        return True
     try:
-        cloudwatch.put_metric_data(
-            Namespace='Healthcare/ML',
-            MetricData=[
-                {
-                    'MetricName': metric_name,
-                    'Value': value,
-                    'Unit': 'None' if metric_name != 'PredictionLatency' else 'Milliseconds',
-                    'Timestamp': datetime.fromtimestamp(timestamp),
-                    'Dimensions': [
-                        {'Name': 'ModelVersion', 'Value': model_version},
-                        {'Name': 'Environment', 'Value': 'production'}
-                    ]
-                }
-                for metric_name, value in {
-                    'ModelAccuracy': metrics['accuracy'],
-                    'PredictionLatency': metrics['latency'],
-                    'DataDrift': metrics['drift']
-                }.items()
-            ]
-        )
-        logger.info(f"Successfully sent metrics to CloudWatch for model version {model_version}")
-    except ClientError as e:
-        logger.error(f"CloudWatch ClientError: {e.response['Error']['Message']}")
-        success = False
+        return writer.flush_if_due()
     except Exception as e:
-        logger.error(f"Error sending metrics to CloudWatch: {e}")
-        success = False
-
-    return success
+        logger.error(f"Error writing metrics: {e}")
+        return False
 
 def validate_input(event: Dict) -> Tuple[bool, str]:
     """
@@ -189,18 +383,117 @@ def validate_input(event: Dict) -> Tuple[bool, str]:
     Returns:
         Tuple[bool, str]: Validation status and error message
     """
-    required_fields = ['predictions', 'actuals', 'current_data', 'baseline_data', 
-                      'model_version', 'start_time']
+    required_fields = ['predictions', 'actuals', 'model_version']
     
     for field in required_fields:
         if field not in event:
             return False, f"Missing required field: {field}"
+
+    # Each of these can be sent raw or summarised
+    for raw, alternative in (('current_data', 'current_sketch'),
+                             ('baseline_data', 'baseline_id'),
+                             ('start_time', 'latency_sketch')):
+        if raw not in event and alternative not in event:
+            return False, f"Missing required field: {raw} or {alternative}"
             
     if not isinstance(event['predictions'], list) or not isinstance(event['actuals'], list):
         return False, "Predictions and actuals must be lists"
         
     return True, ""
 
+def calculate_batch_metrics(batch: ModelVersionBatch) -> Dict[str, Any]:
+    """
+    Calculate metrics for one model version across a Kinesis batch.
+    
+    Args:
+        batch: Telemetry gathered for the model version
+        
+    Returns:
+        Dict[str, Any]: Metrics record (quality metrics only when labels were present)
+    """
+    import numpy as np
+    metrics: Dict[str, Any] = {'accuracy': None, 'latency': None, 'drift': None}
+
+    if batch.labelled_predictions:
+        metrics.update(calculate_quality_metrics(batch.labelled_predictions, batch.actuals))
+
+    if batch.latencies_ms:
+        p50, p95, p99 = np.percentile(batch.latencies_ms, [50, 95, 99])
+        metrics.update({
+            'latency': round(float(np.mean(batch.latencies_ms)), 2),
+            'latency_p50': round(float(p50), 2),
+            'latency_p95': round(float(p95), 2),
+            'latency_p99': round(float(p99), 2)
+        })
+
+    if batch.current_data:
+        baseline = get_baseline_cache().get(batch.baseline_id or batch.model_version)
+        if baseline is not None:
+            metrics['drift'] = calculate_baseline_drift(np.array(batch.current_data), baseline)
+        else:
+            logger.warning(f"No baseline registered for {batch.baseline_id or batch.model_version}, skipping drift")
+
+    metrics.update({
+        'records': len(batch.sequence_numbers),
+        'unlabelled_predictions': batch.unlabelled_predictions,
+        'timestamp': int(time.time())
+    })
+    return metrics
+
+def handle_kinesis_batch(event: Dict) -> Dict:
+    """
+    Process a Kinesis batch of telemetry records, one metrics record per model version.
+
+    Kinesis checkpoints a shard at the lowest failed sequence number and
+    replays everything after it, so only a failed write is reported, and then
+    for the whole batch. Records that can't be decoded or are invalid, and
+    model versions whose metrics can't be calculated, would fail the same way
+    on every retry: they are logged, dropped and counted in the
+    DroppedTelemetryRecords metric instead.
+    
+    Args:
+        event: Kinesis event with a 'Records' list
+        
+    Returns:
+        Dict: Partial batch response
+    """
+    from kinesis_batch import group_records
+    records = event['Records']
+    batches, rejected = group_records(records)
+    logger.info(f"Processing {len(records)} Kinesis records for {len(batches)} model versions, "
+                f"{len(rejected)} invalid")
+
+    dropped = {'invalid': len(rejected)}
+    written = True
+    for model_version, batch in batches.items():
+        try:
+            metrics = calculate_batch_metrics(batch)
+        except Exception as e:
+            logger.error(f"Dropping {len(batch.sequence_numbers)} records for model version {model_version}: "
+                         f"could not calculate metrics: {e}", exc_info=True)
+            dropped['metrics_error'] = dropped.get('metrics_error', 0) + len(batch.sequence_numbers)
+            continue
+        logger.info(f"Calculated metrics for model version {model_version}: {metrics}")
+        written &= store_metrics(metrics, model_version, flush=False)
+
+    try:
+        writer = get_metric_writer()
+        for reason, count in dropped.items():
+            if count:
+                writer.add_metric('DroppedTelemetryRecords', count, 'Count',
+                                  {'Reason': reason, 'Environment': 'production'})
+        written &= writer.flush()
+    except Exception as e:
+        logger.error(f"Error writing metrics: {e}")
+        written = False
+
+    if written:
+        return {'batchItemFailures': []}
+    # The whole batch is replayed, so anything the writer kept would be counted twice
+    if metric_writer is not None:
+        metric_writer.discard()
+    return {'batchItemFailures': [{'itemIdentifier': record['kinesis']['sequenceNumber']} for record in records]}
+
 def handler(event: Dict, context: Any) -> Dict:
     """
     Lambda handler for model monitoring with enhanced error handling and logging.
@@ -214,7 +507,13 @@ def handler(event: Dict, context: Any) -> Dict:
     """
     logger.info(f"Processing monitoring event for model")
     
+    if is_kinesis_batch(event):
+        return handle_kinesis_batch(event)
+
     try:
+        if event.get('action') == 'register_baseline':
+            return register_baseline(event)
+
         # Validate input
         is_valid, error_message = validate_input(event)
         if not is_valid:
@@ -224,23 +523,65 @@ def handler(event: Dict, context: Any) -> Dict:
                 'body': json.dumps({'error': error_message})
             }
 
+        import numpy as np
+
         # Extract and log event data
         predictions = event['predictions']
         actuals = event['actuals']
-        current_data = np.array(event['current_data'])
-        baseline_data = np.array(event['baseline_data'])
         model_version = event['model_version']
-        start_time = event['start_time']
+        current_data = np.array(event['current_data']) if 'current_data' in event else None
 
         logger.info(f"Processing metrics for model version: {model_version}")
 
+        # Multi-channel vitals arrive as (samples, features) and are compared feature by feature
+        feature_report = None
+        if current_data is not None and current_data.ndim == 2:
+            if 'baseline_data' not in event:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': "Multi-feature drift needs baseline_data with the same features"})
+                }
+            feature_report = calculate_feature_drift(current_data, np.array(event['baseline_data']),
+                                                     event.get('feature_names'))
+            baseline = None
+        elif 'baseline_id' in event:
+            baseline = get_baseline_cache().get(event['baseline_id'])
+            if baseline is None:
+                logger.error(f"Unknown baseline: {event['baseline_id']}")
+                return {
+                    'statusCode': 404,
+                    'body': json.dumps({'error': f"Unknown baseline: {event['baseline_id']}"})
+                }
+        elif 'current_sketch' in event:
+            from baselines import BaselineHistogram
+            baseline = BaselineHistogram.from_data('inline', event['baseline_data'], BASELINE_BINS)
+        else:
+            baseline = None
+
+        if feature_report is not None:
+            drift = feature_report.get('max_psi', 0.0)
+        elif 'current_sketch' in event:
+            drift = calculate_sketch_drift(load_sketch(event['current_sketch']), baseline)
+        elif baseline is not None:
+            drift = calculate_baseline_drift(current_data, baseline)
+        else:
+            drift = calculate_drift(current_data, np.array(event['baseline_data']))
+
+        # Latency percentiles come from a sketch; a bare start_time gives one latency
+        latency_metrics = {}
+        if 'latency_sketch' in event:
+            latency_metrics = calculate_latency_percentiles(load_sketch(event['latency_sketch']))
+
         # Calculate metrics
         metrics = {
-            'accuracy': calculate_accuracy(predictions, actuals),
-            'latency': measure_latency(start_time),
-            'drift': calculate_drift(current_data, baseline_data),
+            **calculate_quality_metrics(predictions, actuals, float(event.get('threshold', 0.5))),
+            'latency': measure_latency(event['start_time']) if 'start_time' in event else latency_metrics['latency_p50'],
+            **latency_metrics,
+            'drift': drift,
             'timestamp': int(time.time())
         }
+        if feature_report is not None:
+            metrics['feature_drift'] = feature_report
 
         logger.info(f"Calculated metrics: {metrics}")
 
@@ -263,4 +604,10 @@ def handler(event: Dict, context: Any) -> Dict:
                 'error': str(e),
                 'type': str(type(e).__name__)
             })
-        }
\ No newline at end of file
+        }
+
+if EAGER_INIT:
+    for module_name in ('numpy', 'evaluation', 'baselines', 'sketches', 'drift'):
+        importlib.import_module(module_name)
+    get_baseline_cache()
+    get_metric_writer()
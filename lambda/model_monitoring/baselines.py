@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger()
+
+# Probabilities of empty bins are floored at this before taking logs
+EPSILON = 1e-10
+
+
+class BaselineHistogram:
+    """
+    Precomputed reference distribution for drift checks: bin edges plus the
+    fraction of baseline samples in each bin.
+
+    Args:
+        baseline_id: Identifier events use to reference the baseline (usually the model version)
+        edges: Monotonic bin edges, one more than the number of bins
+        probabilities: Fraction of baseline samples per bin (sums to 1)
+        sample_count: Number of baseline samples the histogram was built from
+        created_at: ISO timestamp of registration
+    """
+
+    def __init__(self, baseline_id: str, edges: np.ndarray, probabilities: np.ndarray,
+                 sample_count: int = 0, created_at: Optional[str] = None):
+        self.baseline_id = baseline_id
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.probabilities = np.asarray(probabilities, dtype=np.float64)
+        self.sample_count = sample_count
+        self.created_at = created_at or datetime.utcnow().isoformat()
+        if self.edges.size != self.probabilities.size + 1:
+            raise ValueError(f"Baseline {baseline_id} has {self.edges.size} edges for {self.probabilities.size} bins")
+
+    @classmethod
+    def from_data(cls, baseline_id: str, data: Any, bins: int = 20) -> 'BaselineHistogram':
+        values = np.asarray(data, dtype=np.float64).reshape(-1)
+        if values.size == 0:
+            raise ValueError("Cannot build a baseline from empty data")
+        counts, edges = np.histogram(values, bins=bins)
+        return cls(baseline_id, edges, counts / values.size, int(values.size))
+
+    def bin_counts(self, data: Any) -> np.ndarray:
+        """Count data into this baseline's bins; values outside the range land in the outer bins."""
+        values = np.asarray(data, dtype=np.float64).reshape(-1)
+        index = np.searchsorted(self.edges[1:-1], values, side='right')
+        return np.bincount(index, minlength=self.probabilities.size)
+
+    def kl_divergence(self, data: Any) -> float:
+        """KL(current || baseline) with the current data binned on the baseline's edges."""
+        return self.kl_divergence_counts(self.bin_counts(data))
+
+    def kl_divergence_counts(self, counts: np.ndarray) -> float:
+        """KL(current || baseline) from per-bin counts (or estimated counts) of the current data."""
+        counts = np.asarray(counts, dtype=np.float64)
+        total = counts.sum()
+        if total == 0:
+            return 0.0
+        current = counts / total + EPSILON
+        baseline = self.probabilities + EPSILON
+        return float(np.sum(current * np.log(current / baseline)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'baseline_id': self.baseline_id,
+            'edges': self.edges.tolist(),
+            'probabilities': self.probabilities.tolist(),
+            'sample_count': self.sample_count,
+            'created_at': self.created_at,
+        }
+
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any]) -> 'BaselineHistogram':
+        return cls(item['baseline_id'], item['edges'], item['probabilities'],
+                   int(item.get('sample_count', 0)), item.get('created_at'))
+
+
+class LocalFileBaselineStore:
+    """Baselines as JSON files in a directory (local runs, tests and warm /tmp)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, baseline_id: str) -> str:
+        return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9._-]', '_', baseline_id) + '.json')
+
+    def get(self, baseline_id: str) -> Optional[BaselineHistogram]:
+        try:
+            with open(self._path(baseline_id)) as f:
+                return BaselineHistogram.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def put(self, baseline: BaselineHistogram) -> None:
+        path = self._path(baseline.baseline_id)
+        # Write then rename so concurrent readers never see a partial file
+        with open(path + '.tmp', 'w') as f:
+            json.dump(baseline.to_dict(), f)
+        os.replace(path + '.tmp', path)
+
+
+class DynamoDBBaselineStore:
+    """
+    Baselines in a DynamoDB table keyed by BaselineId.
+
+    Edges and probabilities are stored as little-endian float64 binary
+    attributes, which keeps them exact and avoids DynamoDB's Decimal handling.
+    """
+
+    def __init__(self, table: Any):
+        self.table = table
+
+    def get(self, baseline_id: str) -> Optional[BaselineHistogram]:
+        item = self.table.get_item(Key={'BaselineId': baseline_id}).get('Item')
+        if item is None:
+            return None
+        return BaselineHistogram(baseline_id,
+                                 np.frombuffer(_binary_value(item['Edges']), dtype='<f8'),
+                                 np.frombuffer(_binary_value(item['Probabilities']), dtype='<f8'),
+                                 int(item.get('SampleCount', 0)), item.get('CreatedAt'))
+
+    def put(self, baseline: BaselineHistogram) -> None:
+        self.table.put_item(Item={
+            'BaselineId': baseline.baseline_id,
+            'Edges': baseline.edges.astype('<f8').tobytes(),
+            'Probabilities': baseline.probabilities.astype('<f8').tobytes(),
+            'SampleCount': baseline.sample_count,
+            'CreatedAt': baseline.created_at,
+        })
+
+
+def _binary_value(value: Any) -> bytes:
+    # boto3 wraps binary attributes in a Binary object
+    return bytes(getattr(value, 'value', value))
+
+
+class BaselineCache:
+    """
+    In-memory TTL cache in front of a baseline store.
+
+    Baselines only change on retraining, so after the first lookup a warm
+    Lambda container serves them from memory until the TTL expires.
+
+    Args:
+        store: Backing store with get(baseline_id) and put(baseline)
+        ttl_seconds: How long a cached baseline is served before re-reading the store
+    """
+
+    def __init__(self, store: Any, ttl_seconds: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: Dict[str, Tuple[float, BaselineHistogram]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, baseline_id: str) -> Optional[BaselineHistogram]:
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(baseline_id)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self.stats['hits'] += 1
+                return entry[1]
+
+        self.stats['misses'] += 1
+        baseline = self.store.get(baseline_id)
+        if baseline is not None:
+            with self._lock:
+                self._entries[baseline_id] = (now, baseline)
+        return baseline
+
+    def register(self, baseline_id: str, data: Any, bins: int = 20) -> BaselineHistogram:
+        """Build a baseline from raw data, persist it and cache it."""
+        baseline = BaselineHistogram.from_data(baseline_id, data, bins)
+        self.store.put(baseline)
+        with self._lock:
+            self._entries[baseline_id] = (self.clock(), baseline)
+        logger.info(f"Registered baseline {baseline_id} with {len(baseline.probabilities)} bins "
+                    f"from {baseline.sample_count} samples")
+        return baseline
+
+    def invalidate(self, baseline_id: Optional[str] = None) -> None:
+        with self._lock:
+            if baseline_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(baseline_id, None)
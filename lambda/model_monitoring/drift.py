@@ -0,0 +1,139 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger()
+
+# Probabilities of empty bins are floored at this before taking logs
+EPSILON = 1e-6
+
+# Common rule of thumb: PSI above 0.2 is a significant population shift
+PSI_DRIFT_THRESHOLD = 0.2
+
+
+def _as_matrix(data: Any) -> np.ndarray:
+    matrix = np.asarray(data, dtype=np.float64)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(-1, 1)
+    if matrix.ndim != 2 or matrix.shape[0] == 0:
+        raise ValueError(f"Expected a non-empty (samples, features) array, got shape {matrix.shape}")
+    return matrix
+
+
+def _ks_pvalue(statistic: float, n: int, m: int) -> float:
+    """Asymptotic two-sample Kolmogorov-Smirnov p-value."""
+    effective = n * m / (n + m)
+    lam = (np.sqrt(effective) + 0.12 + 0.11 / np.sqrt(effective)) * statistic
+    if lam < 0.2:
+        return 1.0
+    k = np.arange(1, 101)
+    return float(np.clip(2 * np.sum((-1.0) ** (k - 1) * np.exp(-2 * (k * lam) ** 2)), 0.0, 1.0))
+
+
+class DriftEngine:
+    """
+    Per-feature drift of (samples, features) data against a fixed baseline.
+
+    The baseline is sorted once per feature when the engine is built, and
+    each comparison sorts the current data once per feature. Everything after
+    the sorts works on the sorted columns without further sorting:
+
+    - PSI and Jensen-Shannon divergence over the baseline's quantile bins
+      (duplicate edges from discrete readings like SpO2 are merged)
+    - the exact two-sample Kolmogorov-Smirnov statistic, from a linear merge
+      of the two sorted columns
+
+    Args:
+        baseline: Baseline data, shape (samples, features)
+        feature_names: Names reported for each column (defaults to feature_0, ...)
+        bins: Number of quantile bins for PSI and JS
+        psi_threshold: PSI above which a feature is flagged as drifted
+    """
+
+    def __init__(self, baseline: Any, feature_names: Optional[Sequence[str]] = None,
+                 bins: int = 10, psi_threshold: float = PSI_DRIFT_THRESHOLD):
+        matrix = _as_matrix(baseline)
+        self.feature_names = list(feature_names) if feature_names else [f'feature_{i}' for i in range(matrix.shape[1])]
+        if len(self.feature_names) != matrix.shape[1]:
+            raise ValueError(f"Got {len(self.feature_names)} feature names for {matrix.shape[1]} features")
+        self.psi_threshold = psi_threshold
+
+        # Sorted features are kept as contiguous rows, which sorts and searches faster than columns
+        self._sorted = np.sort(matrix.T, axis=1)
+        self._count = matrix.shape[0]
+        quantiles = np.linspace(0, 1, bins + 1)[1:-1]
+        # Interior edges only: outer bins are open-ended so current data outside
+        # the baseline's range is still counted
+        self._edges: List[np.ndarray] = []
+        self._proportions: List[np.ndarray] = []
+        for column in self._sorted:
+            edges = np.unique(column[np.minimum((quantiles * self._count).astype(np.intp), self._count - 1)])
+            self._edges.append(edges)
+            self._proportions.append(self._bin_proportions(column, edges))
+
+    @staticmethod
+    def _bin_proportions(sorted_column: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        below = np.searchsorted(sorted_column, edges, side='left')
+        return np.diff(np.r_[0, below, sorted_column.size]) / sorted_column.size
+
+    def _ks(self, column: np.ndarray, baseline_column: np.ndarray) -> Dict[str, float]:
+        """Two-sample KS statistic: the largest gap between the two empirical CDFs."""
+        n = column.size
+        combined = np.concatenate([column, baseline_column])
+        # Both halves are already sorted, so a stable sort is a linear merge of two runs
+        order = np.argsort(combined, kind='stable')
+        gap = np.cumsum(np.where(order < n, 1.0 / n, -1.0 / self._count))
+        values = combined[order]
+        # Only compare after the last of each run of tied readings
+        run_ends = np.r_[values[1:] != values[:-1], True]
+        ks = float(np.abs(gap[run_ends]).max())
+        return {'ks': ks, 'ks_pvalue': _ks_pvalue(ks, n, self._count)}
+
+    def compare(self, current: Any) -> Dict[str, Any]:
+        """
+        Compare current data with the baseline, feature by feature.
+
+        Args:
+            current: Current data, shape (samples, features)
+
+        Returns:
+            Dict[str, Any]: Per-feature psi, js, ks and ks_pvalue, the features
+                ranked by PSI, and the ones over the drift threshold
+        """
+        matrix = _as_matrix(current)
+        if matrix.shape[1] != len(self.feature_names):
+            raise ValueError(f"Current data has {matrix.shape[1]} features, baseline has {len(self.feature_names)}")
+        current_sorted = np.sort(matrix.T, axis=1)
+        n = matrix.shape[0]
+
+        features = {}
+        for i, name in enumerate(self.feature_names):
+            column = current_sorted[i]
+            baseline_column = self._sorted[i]
+
+            expected = np.maximum(self._proportions[i], EPSILON)
+            actual = np.maximum(self._bin_proportions(column, self._edges[i]), EPSILON)
+            psi = float(np.sum((actual - expected) * np.log(actual / expected)))
+
+            mixture = (actual + expected) / 2
+            js = float(0.5 * np.sum(actual * np.log2(actual / mixture))
+                       + 0.5 * np.sum(expected * np.log2(expected / mixture)))
+
+            features[name] = {'psi': psi, 'js': js, **self._ks(column, baseline_column),
+                              'drifted': psi > self.psi_threshold}
+
+        ranked = sorted(features, key=lambda name: features[name]['psi'], reverse=True)
+        return {
+            'features': features,
+            'ranked_features': ranked,
+            'drifted_features': [name for name in ranked if features[name]['drifted']],
+            'max_psi': features[ranked[0]]['psi'],
+            'samples': n,
+        }
+
+
+def feature_drift(current: Any, baseline: Any, feature_names: Optional[Sequence[str]] = None,
+                  bins: int = 10) -> Dict[str, Any]:
+    """One-off comparison; build a DriftEngine instead to reuse a baseline across calls."""
+    return DriftEngine(baseline, feature_names, bins).compare(current)
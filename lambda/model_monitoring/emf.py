@@ -0,0 +1,92 @@
+# Copied from shared/emf.py by scripts/sync_shared_modules.py; edit that file instead
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional, TextIO
+
+# CloudWatch Embedded Metric Format limits per document
+MAX_METRICS_PER_DOCUMENT = 100
+MAX_VALUES_PER_METRIC = 100
+
+
+def emf_documents(namespace: str,
+                  metrics: List[Dict[str, Any]],
+                  dimensions: Optional[Dict[str, str]] = None,
+                  timestamp: Optional[float] = None,
+                  properties: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Build Embedded Metric Format documents for one set of dimensions.
+
+    Each metric is a dict with 'name', 'value' (a number or a list of
+    numbers), and optional 'unit' and 'high_resolution'. Metrics are split
+    across documents to stay within the EMF limits.
+
+    Args:
+        namespace: CloudWatch namespace
+        metrics: Metrics to emit
+        dimensions: Dimension names and values shared by every metric
+        timestamp: Epoch seconds the values belong to (defaults to now)
+        properties: Extra fields logged alongside the metrics (not dimensions)
+
+    Returns:
+        List[Dict[str, Any]]: EMF documents, one JSON log line each
+    """
+    dimensions = dimensions or {}
+    clashes = {metric['name'] for metric in metrics} & (set(dimensions) | set(properties or {}))
+    if clashes:
+        raise ValueError(f"Metric names clash with dimensions or properties: {sorted(clashes)}")
+    timestamp_ms = int((time.time() if timestamp is None else timestamp) * 1000)
+
+    # Split long value lists so no metric carries more than 100 values per document
+    entries = []
+    for metric in metrics:
+        values = metric['value'] if isinstance(metric['value'], (list, tuple)) else [metric['value']]
+        for start in range(0, len(values), MAX_VALUES_PER_METRIC):
+            entries.append((metric, list(values[start:start + MAX_VALUES_PER_METRIC])))
+
+    documents = []
+    while entries:
+        document: Dict[str, Any] = {**(properties or {}), **dimensions}
+        definitions = []
+        remaining = []
+        for metric, values in entries:
+            # A document can only hold one value list per metric name
+            if len(definitions) == MAX_METRICS_PER_DOCUMENT or metric['name'] in document:
+                remaining.append((metric, values))
+                continue
+            definitions.append({
+                'Name': metric['name'],
+                'Unit': metric.get('unit', 'None'),
+                'StorageResolution': 1 if metric.get('high_resolution') else 60
+            })
+            document[metric['name']] = values[0] if len(values) == 1 else values
+        document['_aws'] = {
+            'Timestamp': timestamp_ms,
+            'CloudWatchMetrics': [{
+                'Namespace': namespace,
+                'Dimensions': [list(dimensions)],
+                'Metrics': definitions
+            }]
+        }
+        documents.append(document)
+        entries = remaining
+    return documents
+
+
+def emit_emf(namespace: str,
+             metrics: List[Dict[str, Any]],
+             dimensions: Optional[Dict[str, str]] = None,
+             timestamp: Optional[float] = None,
+             properties: Optional[Dict[str, Any]] = None,
+             stream: Optional[TextIO] = None) -> int:
+    """
+    Write metrics as EMF JSON lines; CloudWatch Logs extracts them asynchronously.
+
+    Returns:
+        int: Number of documents written
+    """
+    stream = stream or sys.stdout
+    documents = emf_documents(namespace, metrics, dimensions, timestamp, properties)
+    stream.write(''.join(json.dumps(document, separators=(',', ':')) + '\n' for document in documents))
+    stream.flush()
+    return len(documents)
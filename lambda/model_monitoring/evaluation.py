@@ -0,0 +1,73 @@
+import logging
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger()
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+
+def _roc_auc(y_true: np.ndarray, scores: np.ndarray) -> Optional[float]:
+    """
+    Area under the ROC curve via the Mann-Whitney U statistic.
+
+    Each positive is ranked against the sorted negatives with a binary search
+    (ties count as half a correct ordering), which is cheaper than an argsort
+    of the full array. Returns None when only one class is present, as the
+    curve is undefined.
+    """
+    positive_scores = np.sort(scores[y_true])
+    negative_scores = np.sort(scores[~y_true])
+    if positive_scores.size == 0 or negative_scores.size == 0:
+        return None
+
+    # Searching with sorted positives keeps the binary searches cache-friendly
+    below = np.searchsorted(negative_scores, positive_scores, 'left').sum()
+    below_or_tied = np.searchsorted(negative_scores, positive_scores, 'right').sum()
+    return float((below + below_or_tied) / 2 / (positive_scores.size * negative_scores.size))
+
+
+def evaluate_predictions(predictions: ArrayLike, actuals: ArrayLike, threshold: float = 0.5) -> Dict[str, Any]:
+    """
+    Evaluate binary predictions against actual labels.
+
+    Predictions may be hard 0/1 labels or probabilities; either way a
+    prediction counts as positive when it is >= threshold. The Brier score
+    and ROC-AUC use the raw prediction values, so they are only meaningful
+    for probabilistic predictions.
+
+    Args:
+        predictions: Model outputs (labels or probabilities of the positive class)
+        actuals: Actual labels, positive where non-zero
+        threshold: Decision threshold for turning probabilities into labels
+
+    Returns:
+        Dict[str, Any]: accuracy, precision, recall, f1, brier_score, roc_auc,
+            confusion_matrix ({'tn', 'fp', 'fn', 'tp'}) and count
+    """
+    scores = np.asarray(predictions, dtype=np.float64).reshape(-1)
+    y_true = np.asarray(actuals, dtype=np.float64).reshape(-1) != 0
+    if scores.size != y_true.size:
+        raise ValueError(f"Got {scores.size} predictions for {y_true.size} actuals")
+    if scores.size == 0:
+        raise ValueError("No predictions to evaluate")
+
+    y_pred = scores >= threshold
+    # One bincount gives all four confusion matrix cells: index = 2 * actual + predicted
+    tn, fp, fn, tp = np.bincount(2 * y_true.astype(np.intp) + y_pred, minlength=4).tolist()
+
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+    return {
+        'accuracy': (tp + tn) / scores.size,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'brier_score': float(np.mean(np.square(scores - y_true))),
+        'roc_auc': _roc_auc(y_true, scores),
+        'confusion_matrix': {'tn': tn, 'fp': fp, 'fn': fn, 'tp': tp},
+        'count': int(scores.size),
+    }
@@ -0,0 +1,114 @@
+import base64
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger()
+
+# One telemetry record per Kinesis record, for example:
+#   {"model_version": "v3", "prediction": 0.91, "actual": 1, "latency_ms": 12.4, "value": 72.0}
+# List forms ("predictions", "actuals", "latencies_ms", "current_data") are
+# accepted too, so producers can pre-aggregate. "actual" may be missing when
+# the label isn't known yet; such predictions count towards latency and drift only.
+SCALAR_FIELDS = {'prediction': 'predictions', 'actual': 'actuals', 'latency_ms': 'latencies_ms', 'value': 'current_data'}
+
+
+def is_kinesis_batch(event: Dict[str, Any]) -> bool:
+    records = event.get('Records')
+    return bool(records) and records[0].get('eventSource') == 'aws:kinesis'
+
+
+def _parse(payloads: List[bytes]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Parse each JSON payload on its own; None for one that is malformed.
+
+    Payloads are never parsed joined together: two malformed payloads can
+    combine into valid JSON, which would attribute one record's data to another.
+    """
+    results = []
+    for payload in payloads:
+        try:
+            results.append(json.loads(payload))
+        except ValueError:
+            results.append(None)
+    return results
+
+
+class ModelVersionBatch:
+    """Telemetry for one model version, gathered from every record in a Kinesis batch."""
+
+    def __init__(self, model_version: str):
+        self.model_version = model_version
+        self.sequence_numbers: List[str] = []
+        self.baseline_id: Optional[str] = None
+        self.labelled_predictions: List[float] = []
+        self.actuals: List[float] = []
+        self.unlabelled_predictions = 0
+        self.latencies_ms: List[float] = []
+        self.current_data: List[float] = []
+
+    def add(self, sequence_number: str, record: Dict[str, Any]) -> None:
+        fields = {plural: record[plural] for plural in SCALAR_FIELDS.values() if plural in record}
+        for singular, plural in SCALAR_FIELDS.items():
+            if singular in record:
+                fields[plural] = [record[singular]]
+
+        predictions = [float(p) for p in fields.get('predictions', [])]
+        actuals = [float(a) for a in fields.get('actuals', [])]
+        if actuals and len(actuals) != len(predictions):
+            raise ValueError(f"{len(predictions)} predictions but {len(actuals)} actuals")
+        latencies = [float(l) for l in fields.get('latencies_ms', [])]
+        if any(isinstance(v, (list, tuple, dict)) for v in fields.get('current_data', [])):
+            raise ValueError("current_data in a Kinesis record must be one-dimensional")
+        current_data = [float(v) for v in fields.get('current_data', [])]
+
+        # Only mutate once the whole record is known to be valid
+        if actuals:
+            self.labelled_predictions.extend(predictions)
+            self.actuals.extend(actuals)
+        else:
+            self.unlabelled_predictions += len(predictions)
+        self.latencies_ms.extend(latencies)
+        self.current_data.extend(current_data)
+        self.baseline_id = record.get('baseline_id', self.baseline_id)
+        self.sequence_numbers.append(sequence_number)
+
+
+def group_records(records: List[Dict[str, Any]]) -> Tuple[Dict[str, ModelVersionBatch], List[str]]:
+    """
+    Decode a Kinesis batch and group its telemetry by model version.
+
+    Args:
+        records: The 'Records' list of a Kinesis event
+
+    Returns:
+        Tuple[Dict[str, ModelVersionBatch], List[str]]: Batches by model version, and
+            the sequence numbers of records that could not be decoded or were invalid
+            (retrying those can't help, so callers drop them)
+    """
+    sequence_numbers = []
+    payloads = []
+    rejected = []
+    for record in records:
+        sequence_number = record['kinesis']['sequenceNumber']
+        try:
+            payloads.append(base64.b64decode(record['kinesis']['data'], validate=True))
+            sequence_numbers.append(sequence_number)
+        except (ValueError, KeyError) as e:
+            logger.error(f"Could not decode Kinesis record {sequence_number}: {e}")
+            rejected.append(sequence_number)
+
+    batches: Dict[str, ModelVersionBatch] = {}
+    for sequence_number, parsed in zip(sequence_numbers, _parse(payloads)):
+        try:
+            if not isinstance(parsed, dict) or 'model_version' not in parsed:
+                raise ValueError("record is not a JSON object with a model_version")
+            model_version = str(parsed['model_version'])
+            if model_version not in batches:
+                batches[model_version] = ModelVersionBatch(model_version)
+            batches[model_version].add(sequence_number, parsed)
+        except (ValueError, TypeError) as e:
+            logger.error(f"Invalid Kinesis record {sequence_number}: {e}")
+            rejected.append(sequence_number)
+
+    return batches, rejected
@@ -0,0 +1,328 @@
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import BotoCoreError, ClientError
+
+from emf import emit_emf
+
+logger = logging.getLogger()
+
+# Service limits
+DYNAMODB_BATCH_SIZE = 25
+CLOUDWATCH_BATCH_SIZE = 1000
+CLOUDWATCH_MAX_VALUES = 150
+
+RETRYABLE_ERRORS = {'ProvisionedThroughputExceededException', 'ThrottlingException', 'Throttling',
+                    'RequestLimitExceeded', 'InternalServerError', 'ServiceUnavailable'}
+
+# (name, unit, dimensions, period start, high resolution)
+MetricKey = Tuple[str, str, Tuple[Tuple[str, str], ...], int, bool]
+
+
+def to_dynamodb(value: Any) -> Any:
+    """Convert floats (including nested ones) to Decimal; NaN and infinity become NULL."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value)) if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: to_dynamodb(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_dynamodb(item) for item in value]
+    if hasattr(value, 'item'):
+        # NumPy scalars
+        return to_dynamodb(value.item())
+    return value
+
+
+class MetricWriter:
+    """
+    Buffer metric records and CloudWatch data points, then write them in batches.
+
+    DynamoDB items go out 25 per BatchWriteItem call. CloudWatch points with
+    the same name, unit, dimensions and minute are aggregated into one datum
+    using Values/Counts (or StatisticValues when statistic_sets is set), and up
+    to 1000 datums are sent per put_metric_data call. Throttling, connection
+    errors, timeouts and unprocessed items are retried with exponential backoff
+    and full jitter. Whatever is still unwritten after max_attempts goes back
+    into the buffer for the next flush; only batches rejected outright (an
+    invalid parameter, say) are dropped.
+
+    boto3's batch_writer re-sends unprocessed items immediately, so the writer
+    issues the same batch calls itself to add backoff.
+
+    With backend='emf' the data points are written to stdout in CloudWatch
+    Embedded Metric Format instead, so no CloudWatch API call is made and
+    CloudWatch Logs extracts the metrics asynchronously.
+
+    Args:
+        table: DynamoDB Table resource for metric records
+        cloudwatch: CloudWatch client
+        namespace: CloudWatch namespace
+        max_records: Flush once this many records are buffered
+        max_age_seconds: Flush once the oldest buffered record is this old (0 flushes every time)
+        statistic_sets: Send SampleCount/Sum/Minimum/Maximum instead of the value distribution
+        backend: 'api' for put_metric_data or 'emf' for Embedded Metric Format log lines
+        max_attempts: Attempts per batch before giving up on it
+        base_delay: First retry delay in seconds (doubles each attempt, capped at max_delay)
+    """
+
+    def __init__(self,
+                 table: Any,
+                 cloudwatch: Any,
+                 namespace: str = 'Healthcare/ML',
+                 max_records: int = 100,
+                 max_age_seconds: float = 0.0,
+                 statistic_sets: bool = False,
+                 backend: str = 'api',
+                 emf_stream: Optional[TextIO] = None,
+                 max_attempts: int = 6,
+                 base_delay: float = 0.05,
+                 max_delay: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.table = table
+        self.cloudwatch = cloudwatch
+        self.namespace = namespace
+        self.max_records = max_records
+        self.max_age_seconds = max_age_seconds
+        self.statistic_sets = statistic_sets
+        if backend not in ('api', 'emf'):
+            raise ValueError(f"Unknown metrics backend: {backend}")
+        self.backend = backend
+        self.emf_stream = emf_stream
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.sleep = sleep
+
+        self._lock = threading.Lock()
+        self._items: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        self._points: Dict[MetricKey, Counter] = {}
+        self._oldest: Optional[float] = None
+        self._serializer = TypeSerializer()
+        self.stats = {'records': 0, 'points': 0, 'dynamodb_calls': 0, 'cloudwatch_calls': 0,
+                      'emf_documents': 0, 'retries': 0, 'failed_items': 0, 'failed_datums': 0,
+                      'requeued_items': 0, 'requeued_datums': 0}
+
+    def add_record(self, model_version: str, metrics: Dict[str, Any], timestamp: Optional[int] = None) -> None:
+        """Buffer one metrics record for the metrics table."""
+        timestamp = int(time.time()) if timestamp is None else int(timestamp)
+        item = {
+            'ModelVersion': model_version,
+            'Timestamp': timestamp,
+            'Metrics': to_dynamodb(metrics),
+            'CreatedAt': datetime.utcnow().isoformat()
+        }
+        with self._lock:
+            # A batch may not contain the same key twice; the latest record wins, as with put_item
+            self._items[(model_version, timestamp)] = item
+            self.stats['records'] += 1
+            self._touch()
+
+    def add_metric(self, name: str, value: float, unit: str = 'None',
+                   dimensions: Optional[Dict[str, str]] = None, timestamp: Optional[float] = None,
+                   high_resolution: bool = False) -> None:
+        """Buffer one CloudWatch data point; points in the same minute (second if high resolution) are aggregated."""
+        if value is None or not math.isfinite(value):
+            return
+        period = 1 if high_resolution else 60
+        start = int((time.time() if timestamp is None else timestamp) // period * period)
+        key = (name, unit, tuple(sorted((dimensions or {}).items())), start, high_resolution)
+        with self._lock:
+            self._points.setdefault(key, Counter())[float(value)] += 1
+            self.stats['points'] += 1
+            self._touch()
+
+    def _touch(self) -> None:
+        if self._oldest is None:
+            self._oldest = self.clock()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._items) + len(self._points)
+
+    def flush_due(self) -> bool:
+        with self._lock:
+            if self._oldest is None:
+                return False
+            return len(self._items) >= self.max_records or self.clock() - self._oldest >= self.max_age_seconds
+
+    def flush_if_due(self) -> bool:
+        """Flush if the buffer is full or old enough. Returns False if anything failed to write."""
+        return self.flush() if self.flush_due() else True
+
+    def flush(self) -> bool:
+        """
+        Write everything buffered. Returns False if anything failed to write.
+
+        Records and data points that are still unwritten after max_attempts
+        go back into the buffer for the next flush.
+        """
+        with self._lock:
+            items = list(self._items.values())
+            points = self._points
+            self._items, self._points, self._oldest = {}, {}, None
+
+        success = True
+        unwritten: List[Dict[str, Any]] = []
+        for start in range(0, len(items), DYNAMODB_BATCH_SIZE):
+            written, retry = self._write_items(items[start:start + DYNAMODB_BATCH_SIZE])
+            success &= written
+            unwritten += retry
+
+        if self.backend == 'emf':
+            datums = []
+            self._emit_emf(points)
+        else:
+            datums = self._datums(points)
+        unsent: List[Tuple[MetricKey, Counter]] = []
+        for start in range(0, len(datums), CLOUDWATCH_BATCH_SIZE):
+            sent, retry = self._put_datums(datums[start:start + CLOUDWATCH_BATCH_SIZE])
+            success &= sent
+            unsent += retry
+
+        if items or datums:
+            logger.info(f"Flushed {len(items)} metric records and {len(datums)} CloudWatch datums")
+        if unwritten or unsent:
+            self._requeue(unwritten, unsent)
+        return success
+
+    def discard(self) -> None:
+        """Drop everything buffered, e.g. when the source records will be replayed."""
+        with self._lock:
+            self._items, self._points, self._oldest = {}, {}, None
+
+    def _requeue(self, items: List[Dict[str, Any]], points: List[Tuple[MetricKey, Counter]]) -> None:
+        with self._lock:
+            for item in items:
+                # A record added since the flush is newer, as with put_item
+                self._items.setdefault((item['ModelVersion'], item['Timestamp']), item)
+            for key, counts in points:
+                self._points.setdefault(key, Counter()).update(counts)
+            self._touch()
+        self.stats['requeued_items'] += len(items)
+        self.stats['requeued_datums'] += len(points)
+        logger.warning(f"Kept {len(items)} metric records and {len(points)} CloudWatch datums for the next flush")
+
+    def _backoff(self, attempt: int) -> None:
+        self.stats['retries'] += 1
+        self.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    @staticmethod
+    def _retryable(error: Exception) -> bool:
+        # BotoCoreError covers connection errors and read timeouts; neither says
+        # anything about the request itself
+        if isinstance(error, ClientError):
+            return error.response['Error']['Code'] in RETRYABLE_ERRORS
+        return True
+
+    def _write_items(self, items: List[Dict[str, Any]]) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Write up to 25 records.
+
+        Returns:
+            Tuple[bool, List[Dict[str, Any]]]: Whether all were written, and
+                the records to try again on the next flush
+        """
+        client = self.table.meta.client
+        by_key = {(item['ModelVersion'], item['Timestamp']): item for item in items}
+        requests = [{'PutRequest': {'Item': {key: self._serializer.serialize(value) for key, value in item.items()}}}
+                    for item in items]
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self._backoff(attempt - 1)
+            try:
+                self.stats['dynamodb_calls'] += 1
+                response = client.batch_write_item(RequestItems={self.table.name: requests})
+            except (ClientError, BotoCoreError) as e:
+                if not self._retryable(e):
+                    self.stats['failed_items'] += len(requests)
+                    logger.error(f"Dropping {len(requests)} metric records rejected by DynamoDB: {e}")
+                    return False, []
+                logger.warning(f"DynamoDB batch write failed, retrying: {e}")
+                continue
+            requests = response.get('UnprocessedItems', {}).get(self.table.name, [])
+            if not requests:
+                return True, []
+
+        logger.error(f"Failed to write {len(requests)} metric records to DynamoDB after {self.max_attempts} attempts")
+        keys = [(request['PutRequest']['Item']['ModelVersion']['S'],
+                 int(request['PutRequest']['Item']['Timestamp']['N'])) for request in requests]
+        return False, [by_key[key] for key in keys]
+
+    def _put_datums(self, datums: List[Tuple[MetricKey, Counter, Dict[str, Any]]]
+                    ) -> Tuple[bool, List[Tuple[MetricKey, Counter]]]:
+        """
+        Send up to 1000 datums.
+
+        Returns:
+            Tuple[bool, List[Tuple[MetricKey, Counter]]]: Whether all were
+                sent, and the data points to try again on the next flush
+        """
+        metric_data = [datum for _, _, datum in datums]
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self._backoff(attempt - 1)
+            try:
+                self.stats['cloudwatch_calls'] += 1
+                self.cloudwatch.put_metric_data(Namespace=self.namespace, MetricData=metric_data)
+                return True, []
+            except (ClientError, BotoCoreError) as e:
+                if not self._retryable(e):
+                    self.stats['failed_datums'] += len(datums)
+                    logger.error(f"Dropping {len(datums)} datums rejected by CloudWatch: {e}")
+                    return False, []
+                logger.warning(f"CloudWatch put_metric_data failed, retrying: {e}")
+
+        logger.error(f"Failed to send {len(datums)} datums to CloudWatch after {self.max_attempts} attempts")
+        return False, [(key, counts) for key, counts, _ in datums]
+
+    def _datums(self, points: Dict[MetricKey, Counter]) -> List[Tuple[MetricKey, Counter, Dict[str, Any]]]:
+        """CloudWatch datums, each with the key and data points it was built from."""
+        datums = []
+        for key, counts in points.items():
+            name, unit, dimensions, start, high_resolution = key
+            base = {
+                'MetricName': name,
+                'Unit': unit,
+                'Timestamp': datetime.fromtimestamp(start, tz=timezone.utc),
+                'Dimensions': [{'Name': dim, 'Value': value} for dim, value in dimensions],
+                'StorageResolution': 1 if high_resolution else 60
+            }
+            if self.statistic_sets:
+                datums.append((key, counts, {**base, 'StatisticValues': {
+                    'SampleCount': float(sum(counts.values())),
+                    'Sum': float(sum(value * count for value, count in counts.items())),
+                    'Minimum': min(counts),
+                    'Maximum': max(counts)
+                }}))
+                continue
+            # Values/Counts keep the distribution, so CloudWatch percentiles still work
+            distinct = sorted(counts.items())
+            for offset in range(0, len(distinct), CLOUDWATCH_MAX_VALUES):
+                chunk = distinct[offset:offset + CLOUDWATCH_MAX_VALUES]
+                datums.append((key, Counter(dict(chunk)), {**base,
+                               'Values': [value for value, _ in chunk],
+                               'Counts': [float(count) for _, count in chunk]}))
+        return datums
+
+    def _emit_emf(self, points: Dict[MetricKey, Counter]) -> None:
+        # One set of EMF documents per dimension set and period
+        groups: Dict[Tuple[Any, ...], List[Dict[str, Any]]] = {}
+        for (name, unit, dimensions, start, high_resolution), counts in points.items():
+            values = [value for value, count in sorted(counts.items()) for _ in range(count)]
+            groups.setdefault((dimensions, start), []).append(
+                {'name': name, 'value': values, 'unit': unit, 'high_resolution': high_resolution})
+        for (dimensions, start), metrics in groups.items():
+            self.stats['emf_documents'] += emit_emf(self.namespace, metrics, dict(dimensions), start,
+                                                    stream=self.emf_stream)
@@ -0,0 +1,235 @@
+import base64
+import struct
+from typing import Any, List, Optional, Sequence, Union
+
+import numpy as np
+
+# Binary layouts (little-endian), base64-encoded when carried in JSON events:
+#   KLL:       magic b'HCKL' | version u8 | level count u8 | k u16 | n u64 | min f64 | max f64 |
+#              level sizes u32 * levels | values f32 (level 0 first)
+#   histogram: magic b'HCHS' | version u8 | pad | bins u16 | edges f64 * (bins + 1) | counts u64 * bins
+KLL_MAGIC = b'HCKL'
+HISTOGRAM_MAGIC = b'HCHS'
+SKETCH_VERSION = 1
+_KLL_HEADER = struct.Struct('<4sBBHQdd')
+_HISTOGRAM_HEADER = struct.Struct('<4sBxH')
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch: a mergeable summary of a stream of values in a few
+    hundred items, with rank error around 1% at k=200.
+
+    Level h holds items that each stand for 2^h original values. When the
+    sketch is over its total capacity, the lowest full level is sorted and
+    every other item (from a random offset) is promoted to the next level, so
+    the total weight always equals the number of values added.
+
+    Args:
+        k: Accuracy parameter; capacity of the top level
+        seed: Seed for the compaction offsets (for reproducible sketches)
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values: Any) -> 'KLLSketch':
+        """Add a batch of values (NaNs are ignored)."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        self.n += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Fold another sketch into this one."""
+        if other.n == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        # Compact the lowest full level until everything fits in the total capacity
+        while sum(items.size for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            level = next(h for h, items in enumerate(self.levels) if items.size >= self._capacity(h))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # An odd item out stays behind at its own weight
+            keep, items = (items[:1], items[1:]) if items.size % 2 else (items[:0], items)
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[self._rng.integers(2)::2]])
+
+    def _weighted(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(items.size, 2 ** level, dtype=np.int64)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """Estimate the values at quantiles qs (each in [0, 1])."""
+        if self.n == 0:
+            raise ValueError("Sketch is empty")
+        qs = np.asarray(qs, dtype=np.float64)
+        values, cumulative = self._weighted()
+        index = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        result = values[np.clip(index, 0, values.size - 1)]
+        result = np.where(qs <= 0, self.min, result)
+        return np.where(qs >= 1, self.max, result)
+
+    def cdf(self, points: Sequence[float]) -> np.ndarray:
+        """Estimate the fraction of values <= each point."""
+        if self.n == 0:
+            raise ValueError("Sketch is empty")
+        values, cumulative = self._weighted()
+        index = np.searchsorted(values, np.asarray(points, dtype=np.float64), side='right')
+        return np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0) / cumulative[-1]
+
+    def to_bytes(self) -> bytes:
+        sizes = struct.pack(f'<{len(self.levels)}I', *(items.size for items in self.levels))
+        values = np.concatenate(self.levels).astype('<f4').tobytes()
+        return _KLL_HEADER.pack(KLL_MAGIC, SKETCH_VERSION, len(self.levels), self.k,
+                                self.n, self.min, self.max) + sizes + values
+
+    @classmethod
+    def from_bytes(cls, body: bytes) -> 'KLLSketch':
+        magic, version, level_count, k, n, minimum, maximum = _KLL_HEADER.unpack_from(body, 0)
+        if magic != KLL_MAGIC or version != SKETCH_VERSION:
+            raise ValueError("Not a KLL sketch")
+        offset = _KLL_HEADER.size
+        sizes = struct.unpack_from(f'<{level_count}I', body, offset)
+        offset += 4 * level_count
+        if len(body) != offset + 4 * sum(sizes):
+            raise ValueError("KLL sketch size does not match its header")
+        values = np.frombuffer(body, dtype='<f4', offset=offset).astype(np.float64)
+
+        sketch = cls(k)
+        sketch.n, sketch.min, sketch.max = n, minimum, maximum
+        bounds = np.cumsum((0,) + sizes)
+        sketch.levels = [values[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        return sketch
+
+
+class FixedBinHistogram:
+    """
+    Counts of values in fixed bins. Histograms with the same edges merge by
+    adding counts, so producers that bin on a baseline's edges give exact
+    drift numbers. Values outside the edges land in the outer bins.
+
+    Args:
+        edges: Monotonic bin edges, one more than the number of bins
+    """
+
+    def __init__(self, edges: Any, counts: Optional[Any] = None):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        bins = self.edges.size - 1
+        if bins < 1:
+            raise ValueError("A histogram needs at least two edges")
+        self.counts = np.zeros(bins, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        if self.counts.size != bins:
+            raise ValueError(f"Got {self.counts.size} counts for {bins} bins")
+
+    def __len__(self) -> int:
+        return int(self.counts.sum())
+
+    def update(self, values: Any) -> 'FixedBinHistogram':
+        """Add a batch of values (NaNs are ignored)."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        values = values[~np.isnan(values)]
+        index = np.searchsorted(self.edges[1:-1], values, side='right')
+        self.counts += np.bincount(index, minlength=self.counts.size)
+        return self
+
+    def merge(self, other: 'FixedBinHistogram') -> 'FixedBinHistogram':
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge histograms with different bin edges")
+        self.counts += other.counts
+        return self
+
+    def to_bytes(self) -> bytes:
+        return (_HISTOGRAM_HEADER.pack(HISTOGRAM_MAGIC, SKETCH_VERSION, self.counts.size)
+                + self.edges.astype('<f8').tobytes() + self.counts.astype('<u8').tobytes())
+
+    @classmethod
+    def from_bytes(cls, body: bytes) -> 'FixedBinHistogram':
+        magic, version, bins = _HISTOGRAM_HEADER.unpack_from(body, 0)
+        if magic != HISTOGRAM_MAGIC or version != SKETCH_VERSION:
+            raise ValueError("Not a histogram sketch")
+        if len(body) != _HISTOGRAM_HEADER.size + 8 * (bins + 1) + 8 * bins:
+            raise ValueError("Histogram size does not match its header")
+        edges = np.frombuffer(body, dtype='<f8', count=bins + 1, offset=_HISTOGRAM_HEADER.size)
+        counts = np.frombuffer(body, dtype='<u8', count=bins, offset=_HISTOGRAM_HEADER.size + 8 * (bins + 1))
+        return cls(edges, counts)
+
+
+Sketch = Union[KLLSketch, FixedBinHistogram]
+
+
+def encode_sketch(sketch: Sketch) -> str:
+    """Serialise a sketch to base64 for a JSON event."""
+    return base64.b64encode(sketch.to_bytes()).decode('ascii')
+
+
+def decode_sketch(data: Union[str, bytes]) -> Sketch:
+    """Deserialise a sketch from bytes or base64, whichever type it is."""
+    body = base64.b64decode(data) if isinstance(data, str) else bytes(data)
+    if body[:4] == KLL_MAGIC:
+        return KLLSketch.from_bytes(body)
+    if body[:4] == HISTOGRAM_MAGIC:
+        return FixedBinHistogram.from_bytes(body)
+    raise ValueError("Unknown sketch format")
+
+
+def merge_sketches(sketches: Sequence[Sketch]) -> Sketch:
+    """Merge sketches of the same type, e.g. from several invocations or windows."""
+    if not sketches:
+        raise ValueError("No sketches to merge")
+    merged = decode_sketch(sketches[0].to_bytes())
+    for sketch in sketches[1:]:
+        if type(sketch) is not type(merged):
+            raise ValueError("Cannot merge sketches of different types")
+        merged.merge(sketch)
+    return merged
+
+
+def bin_counts(sketch: Sketch, edges: Any) -> np.ndarray:
+    """
+    Count (or, for a KLL sketch, estimate) how many values fall in each bin.
+
+    Outer bins absorb values outside the edges, matching
+    FixedBinHistogram.update and the baseline binning.
+    """
+    edges = np.asarray(edges, dtype=np.float64)
+    if isinstance(sketch, FixedBinHistogram):
+        if not np.array_equal(sketch.edges, edges):
+            raise ValueError("Histogram was not binned on these edges")
+        return sketch.counts.astype(np.float64)
+    below = sketch.cdf(edges[1:-1])
+    return np.diff(np.r_[0.0, below, 1.0]) * sketch.n
@@ -0,0 +1,91 @@
+"""
+Copy the shared helper modules into every deploy unit that uses them.
+
+Each Lambda directory (and training/) is packaged on its own and imports its
+helpers flat, so shared/ holds the one source of each helper and this script
+writes the copies. Edit the module in shared/, then run:
+
+    python scripts/sync_shared_modules.py
+
+--check writes nothing and fails if any copy differs from its source, for CI.
+"""
+import argparse
+import os
+import sys
+from typing import Dict, List
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SHARED_DIR = os.path.join(ROOT, 'shared')
+
+# Shared module -> deploy units (relative to the repo root) that get a copy
+SHARED_MODULES: Dict[str, List[str]] = {
+    'aws_clients.py': [
+        'training',
+        'lambda/Lambda-Greengrass-Creation',
+        'lambda/Lambda-Neo-Compilation',
+        'lambda/Lambda-SageMaker-Training-Job',
+        'lambda/Lambda-WebSocket',
+        'lambda/model_alarm_response',
+        'lambda/model_monitoring',
+    ],
+    'emf.py': [
+        'training',
+        'lambda/model_alarm_response',
+        'lambda/model_monitoring',
+    ],
+}
+
+HEADER = "# Copied from shared/{name} by scripts/sync_shared_modules.py; edit that file instead\n"
+
+
+def expected_copy(name: str) -> str:
+    """Contents every copy of a shared module should have."""
+    with open(os.path.join(SHARED_DIR, name)) as f:
+        return HEADER.format(name=name) + f.read()
+
+
+def stale_copies() -> List[str]:
+    """Paths of copies that are missing or differ from their shared source."""
+    stale = []
+    for name, units in SHARED_MODULES.items():
+        contents = expected_copy(name)
+        for unit in units:
+            path = os.path.join(ROOT, unit, name)
+            try:
+                with open(path) as f:
+                    if f.read() == contents:
+                        continue
+            except FileNotFoundError:
+                pass
+            stale.append(os.path.relpath(path, ROOT))
+    return stale
+
+
+def sync() -> List[str]:
+    """Rewrite the stale copies. Returns their paths."""
+    stale = stale_copies()
+    for path in stale:
+        name = os.path.basename(path)
+        with open(os.path.join(ROOT, path), 'w') as f:
+            f.write(expected_copy(name))
+    return stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy shared/ modules into each deploy unit.")
+    parser.add_argument('--check', action='store_true', help='fail if a copy is out of date instead of writing')
+    args = parser.parse_args()
+
+    if args.check:
+        stale = stale_copies()
+        if stale:
+            sys.exit("Out of date, run scripts/sync_shared_modules.py: " + ", ".join(stale))
+        print("Shared modules are in sync")
+        return
+
+    for path in sync():
+        print(f"Updated {path}")
+
+
+if __name__ == "__main__":
+    main()
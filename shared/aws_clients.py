@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger()
+
+# boto3 and botocore are imported on first use: importing them costs ~200 ms
+# of cold start, which callers that never reach AWS shouldn't pay
+
+_lock = threading.Lock()
+_config: Any = None
+_session: Any = None
+_clients: Dict[Tuple[str, Optional[str], Optional[str]], Any] = {}
+_resources: Dict[Tuple[str, Optional[str]], Any] = {}
+
+
+def client_config() -> Any:
+    """
+    The botocore Config shared by every client.
+
+    A connection pool big enough for threaded callers, adaptive retries
+    (client-side rate limiting when throttled) and timeouts short enough that
+    a stuck connection fails well within a Lambda timeout.
+    """
+    global _config
+    if _config is None:
+        from botocore.config import Config
+        _config = Config(
+            max_pool_connections=int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '25')),
+            connect_timeout=float(os.getenv('AWS_CONNECT_TIMEOUT', '3')),
+            read_timeout=float(os.getenv('AWS_READ_TIMEOUT', '20')),
+            retries={'max_attempts': int(os.getenv('AWS_MAX_ATTEMPTS', '5')), 'mode': 'adaptive'},
+            tcp_keepalive=True
+        )
+    return _config
+
+
+def _get_session() -> Any:
+    # Sessions aren't thread-safe, so they're only used under the lock
+    global _session
+    if _session is None:
+        import boto3
+        _session = boto3.session.Session()
+    return _session
+
+
+def get_client(service_name: str, region_name: Optional[str] = None, endpoint_url: Optional[str] = None) -> Any:
+    """
+    Return a cached client for a service, creating it on first use.
+
+    Clients are cached per service, region and endpoint and shared across
+    threads (boto3 clients are thread-safe), so connections are reused.
+
+    Args:
+        service_name: AWS service, e.g. 'cloudwatch'
+        region_name: Region (defaults to the session's region)
+        endpoint_url: Custom endpoint, e.g. an API Gateway management endpoint
+
+    Returns:
+        Any: boto3 client
+    """
+    key = (service_name, region_name, endpoint_url)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        if key not in _clients:
+            try:
+                _clients[key] = _get_session().client(service_name, region_name=region_name,
+                                                      endpoint_url=endpoint_url, config=client_config())
+            except Exception as e:
+                logger.error(f"Failed to initialise {service_name} client: {e}")
+                raise
+        return _clients[key]
+
+
+def get_resource(service_name: str, region_name: Optional[str] = None) -> Any:
+    """
+    Return a cached boto3 resource, creating it on first use.
+
+    The resource is shared by every caller in the process, but boto3
+    resources aren't thread-safe: only use it from one thread (e.g. a Lambda
+    handler's). Code that calls AWS from several threads should use
+    get_client instead.
+    """
+    key = (service_name, region_name)
+    with _lock:
+        if key not in _resources:
+            try:
+                _resources[key] = _get_session().resource(service_name, region_name=region_name,
+                                                          config=client_config())
+            except Exception as e:
+                logger.error(f"Failed to initialise {service_name} resource: {e}")
+                raise
+        return _resources[key]
+
+
+def clear_clients() -> None:
+    """Drop every cached client and resource, e.g. after changing credentials or settings in tests."""
+    global _config, _session
+    with _lock:
+        _clients.clear()
+        _resources.clear()
+        _config = None
+        _session = None
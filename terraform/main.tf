@@ -65,6 +65,7 @@ module "lambda" {
         model_alarm_response = module.iam.lambda_execution_role_arn
     }
     model_alarm_rule_arn = module.monitoring.model_alarm_rule_arn
+    alarm_action_leases_table_name = module.databases.alarm_action_leases_table_name
 
     lambda_source_dir = "${path.root}/lambda"
 }
@@ -109,6 +110,7 @@ module "iam" {
 
     environment = var.environment
     dynamodb_table_arn = module.databases.dynamodb_table_arn
+    alarm_action_leases_table_arn = module.databases.alarm_action_leases_table_arn
     api_gateway_execution_arn = module.api-gateway.websocket_api_execution_arn
     aurora_cluster_arn = module.databases.aurora_cluster_arn
     iot_bucket_arn = module.s3.iot_bucket_arn
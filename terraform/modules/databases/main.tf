@@ -166,5 +166,47 @@ resource "aws_dynamodb_table" "model_metrics" {
     }
 }
 
+# DynamoDB Table for drift baselines (bin edges + probabilities per model version)
+resource "aws_dynamodb_table" "model_baselines" {
+    name = "${var.environment}-model-baselines"
+    billing_mode = "PAY_PER_REQUEST"
+    hash_key = "BaselineId"
+
+    attribute {
+        name = "BaselineId"
+        type = "S"
+    }
+
+    tags = {
+        Environment = var.environment
+        Name = "${var.environment}-model-baselines"
+        Component = "MLOps"
+    }
+}
+
+# DynamoDB Table for alarm response leases (one item per alarm/endpoint/action cooldown)
+resource "aws_dynamodb_table" "alarm_action_leases" {
+    name = "${var.environment}-alarm-action-leases"
+    billing_mode = "PAY_PER_REQUEST"
+    hash_key = "LeaseKey"
+
+    attribute {
+        name = "LeaseKey"
+        type = "S"
+    }
+
+    # Expired leases are removed by TTL; the lambda also treats them as free
+    ttl {
+        attribute_name = "ExpiresAt"
+        enabled = true
+    }
+
+    tags = {
+        Environment = var.environment
+        Name = "${var.environment}-alarm-action-leases"
+        Component = "MLOps"
+    }
+}
+
 # Data source for current region
 data "aws_region" "current" {}
\ No newline at end of file
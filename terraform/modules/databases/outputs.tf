@@ -31,4 +31,19 @@ output "dynamodb_table_arn" {
 output "dynamodb_endpoint_id" {
     description = "ID of the DynamoDB VPC endpoint"
     value = aws_vpc_endpoint.dynamodb_endpoint.id
-}
\ No newline at end of file
+}
+
+output "model_baselines_table_name" {
+    description = "Name of the DynamoDB table holding drift baselines"
+    value = aws_dynamodb_table.model_baselines.name
+}
+
+output "alarm_action_leases_table_name" {
+    description = "Name of the DynamoDB table holding alarm response leases"
+    value = aws_dynamodb_table.alarm_action_leases.name
+}
+
+output "alarm_action_leases_table_arn" {
+    description = "ARN of the DynamoDB table holding alarm response leases"
+    value = aws_dynamodb_table.alarm_action_leases.arn
+}
@@ -41,6 +41,15 @@ resource "aws_iam_policy" "lambda_execution_policy" {
                 ]
                 Resource = var.dynamodb_table_arn
             },
+            {
+                # Alarm response leases: conditional put to take one, delete to release it
+                Effect = "Allow"
+                Action = [
+                    "dynamodb:PutItem",
+                    "dynamodb:DeleteItem"
+                ]
+                Resource = var.alarm_action_leases_table_arn
+            },
             {
                 Effect = "Allow"
                 Action = [
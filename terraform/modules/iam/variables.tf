@@ -8,6 +8,11 @@ variable "dynamodb_table_arn" {
     type        = string
 }
 
+variable "alarm_action_leases_table_arn" {
+    description = "ARN of the DynamoDB table holding alarm response leases"
+    type        = string
+}
+
 variable "aurora_cluster_arn" {
     description = "ARN of the Aurora cluster"
     type        = string
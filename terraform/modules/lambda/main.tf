@@ -49,6 +49,13 @@ locals {
             filename    = "${path.root}/../lambda/model_alarm_response/model_alarm_response.zip"
         }
     }
+
+    # Environment variables, for the functions that take any
+    lambda_environment = {
+        model_alarm_response = {
+            LEASE_TABLE = var.alarm_action_leases_table_name
+        }
+    }
 }
 
 # Lambda Functions
@@ -64,6 +71,13 @@ resource "aws_lambda_function" "functions" {
     filename = each.value.filename
     publish = true
 
+    dynamic "environment" {
+        for_each = contains(keys(local.lambda_environment), each.key) ? [local.lambda_environment[each.key]] : []
+        content {
+            variables = environment.value
+        }
+    }
+
     tags = {
         Environment = var.environment
         Name = each.value.name
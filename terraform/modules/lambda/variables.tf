@@ -33,6 +33,11 @@ variable "lambda_source_dir" {
     type = string
 }
 
+variable "alarm_action_leases_table_name" {
+    description = "Name of the DynamoDB table holding alarm response leases"
+    type = string
+}
+
 variable "model_alarm_rule_arn" {
     description = "ARN of the EventBridge Rule that triggers the alarm response"
     type = string
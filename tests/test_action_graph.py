@@ -0,0 +1,87 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'model_alarm_response'))
+
+from action_graph import ActionGraph, ActionSkipped
+
+
+def sleeper(seconds, result=None):
+    def run():
+        time.sleep(seconds)
+        return result
+    return run
+
+
+def test_independent_actions_run_concurrently():
+    graph = ActionGraph()
+    graph.add('switch', sleeper(0.2))
+    graph.add('retrain', sleeper(0.2))
+
+    start = time.perf_counter()
+    results = graph.run()
+
+    assert time.perf_counter() - start < 0.35
+    assert {name: result['status'] for name, result in results.items()} == {'switch': 'succeeded',
+                                                                           'retrain': 'succeeded'}
+
+
+def test_dependents_wait_for_their_dependencies():
+    graph = ActionGraph()
+    graph.add('switch', sleeper(0.1, 'switched'))
+    graph.add('retrain', sleeper(0.05))
+    graph.add('notify', lambda: graph.results['switch']['status'], depends_on=['switch'])
+
+    results = graph.run()
+
+    assert results['notify']['result'] == 'succeeded'
+    assert results['notify']['start_ms'] >= results['switch']['start_ms'] + results['switch']['duration_ms']
+    assert results['switch']['result'] == 'switched'
+    assert results['retrain']['start_ms'] < results['switch']['duration_ms']
+
+
+def test_timed_out_action_does_not_hold_up_the_graph():
+    release = threading.Event()
+    graph = ActionGraph(default_timeout=5)
+    graph.add('switch', release.wait, timeout=0.1)
+    graph.add('notify', lambda: graph.results['switch']['status'], depends_on=['switch'])
+
+    start = time.perf_counter()
+    results = graph.run()
+    release.set()
+
+    assert time.perf_counter() - start < 1
+    assert results['switch']['status'] == 'timed_out'
+    assert results['notify'] == {**results['notify'], 'status': 'succeeded', 'result': 'timed_out'}
+
+
+def test_failed_and_skipped_actions_are_reported():
+    def fail():
+        raise RuntimeError("endpoint not found")
+
+    def skip():
+        raise ActionSkipped("cooling down")
+
+    graph = ActionGraph()
+    graph.add('switch', fail)
+    graph.add('retrain', skip)
+    graph.add('notify', lambda: None, depends_on=['switch', 'retrain'])
+
+    results = graph.run()
+
+    assert results['switch']['status'] == 'failed' and results['switch']['error'] == 'endpoint not found'
+    assert results['retrain']['status'] == 'skipped' and results['retrain']['error'] == 'cooling down'
+    assert results['notify']['status'] == 'succeeded'
+
+
+def test_dependencies_must_be_added_first():
+    graph = ActionGraph()
+    with pytest.raises(ValueError):
+        graph.add('notify', lambda: None, depends_on=['switch'])
+    graph.add('switch', lambda: None)
+    with pytest.raises(ValueError):
+        graph.add('switch', lambda: None)
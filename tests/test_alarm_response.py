@@ -0,0 +1,262 @@
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from botocore.exceptions import ClientError
+
+ALARM_DIR = os.path.join(os.path.dirname(__file__), '..', 'lambda', 'model_alarm_response')
+sys.path.insert(0, ALARM_DIR)
+
+from action_leases import ActionGuard, DynamoDBLeaseStore, InMemoryLeaseStore
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class StubDynamoDBClient:
+    """put_item/delete_item stand-in that evaluates the lease conditions atomically on typed items."""
+
+    def __init__(self):
+        self.items = {}
+        self.lock = threading.Lock()
+
+    def put_item(self, TableName, Item, ConditionExpression, ExpressionAttributeValues):
+        with self.lock:
+            existing = self.items.get((TableName, Item['LeaseKey']['S']))
+            if existing is not None and int(existing['ExpiresAt']['N']) > int(ExpressionAttributeValues[':now']['N']):
+                raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException', 'Message': ''}}, 'PutItem')
+            self.items[(TableName, Item['LeaseKey']['S'])] = Item
+
+    def delete_item(self, TableName, Key, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        with self.lock:
+            existing = self.items.get((TableName, Key['LeaseKey']['S']))
+            if existing is None or existing['Owner'] != ExpressionAttributeValues[':owner']:
+                raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException', 'Message': ''}}, 'DeleteItem')
+            del self.items[(TableName, Key['LeaseKey']['S'])]
+
+
+def test_lease_blocks_until_it_expires():
+    clock = Clock()
+    store = InMemoryLeaseStore(clock)
+
+    assert store.acquire('k', 'a', 60)
+    assert not store.acquire('k', 'b', 60)
+    clock.now += 61
+    assert store.acquire('k', 'b', 60)
+
+
+def test_only_the_owner_releases_a_lease():
+    store = InMemoryLeaseStore(Clock())
+    store.acquire('k', 'a', 60)
+
+    store.release('k', 'b')
+    assert not store.acquire('k', 'c', 60)
+    store.release('k', 'a')
+    assert store.acquire('k', 'c', 60)
+
+
+@pytest.mark.parametrize('make_store', [lambda clock: InMemoryLeaseStore(clock),
+                                        lambda clock: DynamoDBLeaseStore(StubDynamoDBClient(), 'leases', clock)])
+def test_concurrent_invocations_run_the_action_once(make_store):
+    store = make_store(Clock())
+    runs = []
+    barrier = threading.Barrier(8)
+
+    def invoke(i):
+        guard = ActionGuard(store, {'retrain': 3600}, owner=f'invocation-{i}')
+        barrier.wait()
+        return guard.run('prod-model-accuracy', 'endpoint', 'retrain', runs.append, i)[0]
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(invoke, range(8)))
+
+    assert results.count(True) == 1
+    assert len(runs) == 1
+
+
+def test_dynamodb_lease_can_be_retaken_after_expiry():
+    clock = Clock()
+    store = DynamoDBLeaseStore(StubDynamoDBClient(), 'leases', clock)
+
+    assert store.acquire('k', 'a', 60)
+    assert not store.acquire('k', 'b', 60)
+    clock.now += 60
+    assert store.acquire('k', 'b', 60)
+    # Only the current owner's release frees it
+    store.release('k', 'a')
+    assert not store.acquire('k', 'c', 60)
+    store.release('k', 'b')
+    assert store.acquire('k', 'c', 60)
+
+
+def test_failed_action_releases_its_lease():
+    guard = ActionGuard(InMemoryLeaseStore(Clock()), {'retrain': 3600})
+
+    def fail():
+        raise RuntimeError("dispatch failed")
+
+    with pytest.raises(RuntimeError):
+        guard.run('alarm', 'endpoint', 'retrain', fail)
+    assert guard.run('alarm', 'endpoint', 'retrain', lambda: 'ok') == (True, 'ok')
+    assert guard.stats == {'executed': 1, 'suppressed': 0, 'failed': 1, 'unguarded': 0}
+
+
+class UnreachableLeaseStore:
+    def acquire(self, key, owner, ttl_seconds):
+        raise ClientError({'Error': {'Code': 'AccessDeniedException', 'Message': 'denied'}}, 'PutItem')
+
+    def release(self, key, owner):
+        raise AssertionError("nothing was leased")
+
+
+def test_lease_store_errors_fail_open_only_for_listed_actions(capsys):
+    guard = ActionGuard(UnreachableLeaseStore(), {'retrain': 3600, 'switch_to_backup': 1800},
+                        fail_open=['switch_to_backup'])
+
+    assert guard.run('alarm', 'endpoint', 'switch_to_backup', lambda: 'switched') == (True, 'switched')
+    with pytest.raises(ClientError):
+        guard.run('alarm', 'endpoint', 'retrain', lambda: 'retrained')
+
+    assert guard.stats['unguarded'] == 1 and guard.stats['executed'] == 0
+    documents = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [d['Action'] for d in documents if 'AlarmActionUnguarded' in d] == ['switch_to_backup']
+
+
+def test_suppressed_actions_emit_a_metric(capsys):
+    guard = ActionGuard(InMemoryLeaseStore(Clock()), {'retrain': 3600})
+
+    guard.run('alarm', 'endpoint', 'retrain', lambda: None)
+    assert guard.run('alarm', 'endpoint', 'retrain', lambda: None) == (False, None)
+    # Other endpoints and actions have their own leases
+    assert guard.run('alarm', 'other-endpoint', 'retrain', lambda: None)[0]
+    assert guard.run('alarm', 'endpoint', 'scale_up', lambda: None)[0]
+
+    documents = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    suppressed = [d for d in documents if 'AlarmActionSuppressed' in d]
+    assert len(suppressed) == 1
+    assert suppressed[0]['Action'] == 'retrain' and suppressed[0]['AlarmName'] == 'alarm'
+    assert guard.stats['suppressed'] == 1
+
+
+class StubClient:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda **kwargs: self.calls.append((name, kwargs))
+
+
+@pytest.fixture
+def alarm_app(monkeypatch):
+    monkeypatch.setenv('LEASE_STORE', 'memory')
+    spec = importlib.util.spec_from_file_location('model_alarm_response_app', os.path.join(ALARM_DIR, 'app.py'))
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    clients = {}
+    monkeypatch.setattr(app, 'get_client', lambda service: clients.setdefault(service, StubClient()))
+    retrains = []
+    monkeypatch.setattr(app.ModelMonitoringResponse, 'trigger_retraining_pipeline', lambda self: retrains.append(1))
+    return app, clients, retrains
+
+
+def alarm_event(name, value):
+    return {'detail': {'alarmName': name, 'configuration': {
+        'metrics': [{'value': value}], 'dimensions': {'EndpointName': 'vitals-endpoint'}}}}
+
+
+def test_duplicate_accuracy_alarm_is_debounced(alarm_app):
+    app, clients, retrains = alarm_app
+
+    first = app.handler(alarm_event('prod-model-accuracy', 0.7), None)
+    second = app.handler(alarm_event('prod-model-accuracy', 0.7), None)
+
+    assert retrains == [1]
+    assert [name for name, _ in clients['sagemaker'].calls] == ['update_endpoint']
+    assert json.loads(first['body'])['suppressed_actions'] == []
+    assert json.loads(second['body'])['suppressed_actions'] == ['switch_to_backup', 'retrain']
+    assert json.loads(second['body'])['actions']['retrain']['status'] == 'skipped'
+    # The alert still goes out, saying what was skipped
+    alerts = [kwargs for name, kwargs in clients['sns'].calls if name == 'publish']
+    assert len(alerts) == 2
+    assert 'switch_to_backup: skipped' in alerts[1]['Message']
+
+
+def test_accuracy_actions_run_concurrently_and_alert_after_the_switch(alarm_app, monkeypatch):
+    app, clients, _ = alarm_app
+    monkeypatch.setattr(app.ModelMonitoringResponse, 'switch_to_backup_model', lambda self, name: time.sleep(0.2))
+    monkeypatch.setattr(app.ModelMonitoringResponse, 'trigger_retraining_pipeline', lambda self: time.sleep(0.2))
+
+    start = time.perf_counter()
+    actions = json.loads(app.handler(alarm_event('prod-model-accuracy', 0.7), None)['body'])['actions']
+
+    assert time.perf_counter() - start < 0.35
+    assert {name: action['status'] for name, action in actions.items()} == {
+        'switch_to_backup': 'succeeded', 'retrain': 'succeeded', 'notify': 'succeeded'}
+    switch = actions['switch_to_backup']
+    assert actions['notify']['start_ms'] >= switch['start_ms'] + switch['duration_ms']
+    alert = [kwargs for name, kwargs in clients['sns'].calls if name == 'publish'][0]
+    assert 'switch_to_backup: succeeded' in alert['Message']
+
+
+def test_failed_action_sends_an_error_alert(alarm_app):
+    app, clients, _ = alarm_app
+    clients['sagemaker'] = StubClient()
+    clients['sagemaker'].describe_endpoint = lambda **kwargs: (_ for _ in ()).throw(RuntimeError("throttled"))
+
+    actions = json.loads(app.handler(alarm_event('prod-model-latency', 900), None)['body'])['actions']
+
+    assert actions['scale_up']['status'] == 'failed'
+    assert actions['notify']['status'] == 'succeeded'
+    subjects = [kwargs['Subject'] for name, kwargs in clients['sns'].calls if name == 'publish']
+    assert subjects == ["WARNING: High Latency Detected", "ERROR: Failed to handle high latency"]
+
+
+class StubResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def test_github_token_is_cached_and_refreshed_on_401(monkeypatch):
+    monkeypatch.setenv('LEASE_STORE', 'memory')
+    spec = importlib.util.spec_from_file_location('model_alarm_response_app', os.path.join(ALARM_DIR, 'app.py'))
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    secrets = iter(['old-token', 'new-token'])
+    lookups = []
+
+    class StubSecrets:
+        def get_secret_value(self, SecretId):
+            lookups.append(SecretId)
+            return {'SecretString': next(secrets)}
+
+    monkeypatch.setattr(app, 'get_client', lambda service: StubSecrets())
+    sent = []
+
+    def post(url, headers, json, timeout):
+        # Both attempts, each at its connect and read timeouts, fit in the action's timeout
+        assert 2 * sum(timeout) < app.ACTION_TIMEOUTS['retrain']
+        sent.append(headers['Authorization'])
+        return StubResponse(401 if headers['Authorization'] == 'token old-token' and len(sent) > 2 else 204)
+
+    monkeypatch.setitem(sys.modules, 'requests', types.SimpleNamespace(post=post))
+    response_handler = app.ModelMonitoringResponse(alarm_event('prod-model-drift', 0.5),
+                                                   ActionGuard(InMemoryLeaseStore(Clock())))
+
+    response_handler.trigger_retraining_pipeline()
+    response_handler.trigger_retraining_pipeline()
+    assert lookups == [app.GITHUB_TOKEN_SECRET]
+    # The token was rotated: one retry with a fresh token
+    response_handler.trigger_retraining_pipeline()
+    assert sent == ['token old-token'] * 3 + ['token new-token']
+    assert len(lookups) == 2
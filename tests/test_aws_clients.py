@@ -0,0 +1,66 @@
+import importlib.util
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+TRAINING_DIR = os.path.join(os.path.dirname(__file__), '..', 'training')
+sys.path.insert(0, TRAINING_DIR)
+
+import aws_clients
+from aws_clients import clear_clients, get_client, get_resource
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-west-2')
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+    clear_clients()
+    yield
+    clear_clients()
+
+
+def test_clients_are_cached_per_service_region_and_endpoint():
+    cloudwatch = get_client('cloudwatch')
+
+    assert get_client('cloudwatch') is cloudwatch
+    assert get_client('cloudwatch', region_name='us-east-1') is not cloudwatch
+    assert get_client('cloudwatch', endpoint_url='http://localhost:4566') is not cloudwatch
+    assert get_client('sns') is not cloudwatch
+
+
+def test_clients_use_the_tuned_config():
+    config = get_client('sagemaker').meta.config
+
+    assert config.max_pool_connections == aws_clients.client_config().max_pool_connections
+    assert config.retries['mode'] == 'adaptive'
+    assert config.connect_timeout == aws_clients.client_config().connect_timeout
+    assert config.read_timeout == aws_clients.client_config().read_timeout
+
+
+def test_concurrent_first_use_creates_one_client():
+    with ThreadPoolExecutor(8) as pool:
+        clients = list(pool.map(lambda _: get_client('cloudwatch'), range(32)))
+
+    assert all(client is clients[0] for client in clients)
+
+
+def test_resources_are_cached():
+    assert get_resource('dynamodb') is get_resource('dynamodb')
+
+
+def test_training_clients_are_created_on_first_access(monkeypatch):
+    spec = importlib.util.spec_from_file_location('training_utils', os.path.join(TRAINING_DIR, 'utils.py'))
+    utils = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(utils)
+    created = []
+    monkeypatch.setattr(utils, 'get_client', lambda service: created.append(service) or object())
+
+    clients = utils.setup_aws_clients()
+    assert created == []
+
+    runtime = clients['runtime']
+    assert clients['runtime'] is runtime
+    assert created == ['sagemaker-runtime']
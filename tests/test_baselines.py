@@ -0,0 +1,120 @@
+import importlib.util
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+MONITORING_DIR = os.path.join(os.path.dirname(__file__), '..', 'lambda', 'model_monitoring')
+sys.path.insert(0, MONITORING_DIR)
+
+from baselines import BaselineCache, BaselineHistogram, DynamoDBBaselineStore, LocalFileBaselineStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingStore:
+    def __init__(self, store):
+        self.store = store
+        self.gets = 0
+
+    def get(self, baseline_id):
+        self.gets += 1
+        return self.store.get(baseline_id)
+
+    def put(self, baseline):
+        self.store.put(baseline)
+
+
+class StubTable:
+    """Minimal DynamoDB Table stand-in keyed on BaselineId."""
+
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, Item):
+        self.items[Item['BaselineId']] = dict(Item)
+
+    def get_item(self, Key):
+        item = self.items.get(Key['BaselineId'])
+        return {'Item': item} if item is not None else {}
+
+
+def test_identical_distribution_has_no_drift_and_shift_does():
+    rng = np.random.default_rng(0)
+    baseline = BaselineHistogram.from_data('v1', rng.normal(72, 5, size=50000))
+
+    assert baseline.probabilities.sum() == pytest.approx(1.0)
+    assert baseline.kl_divergence(rng.normal(72, 5, size=50000)) < 0.01
+    assert baseline.kl_divergence(rng.normal(85, 5, size=50000)) > 1.0
+
+
+def test_out_of_range_values_land_in_outer_bins():
+    baseline = BaselineHistogram('v1', np.array([0.0, 1.0, 2.0, 3.0]), np.array([0.25, 0.5, 0.25]))
+    np.testing.assert_array_equal(baseline.bin_counts([-5, 0.5, 1.5, 2.5, 3.0, 99]), [2, 1, 3])
+
+
+@pytest.mark.parametrize('make_store', [
+    lambda tmp_path: LocalFileBaselineStore(str(tmp_path / 'baselines')),
+    lambda tmp_path: DynamoDBBaselineStore(StubTable()),
+])
+def test_store_round_trip(tmp_path, make_store):
+    store = make_store(tmp_path)
+    baseline = BaselineHistogram.from_data('model/v2', np.arange(1000.0), bins=10)
+    store.put(baseline)
+
+    loaded = store.get('model/v2')
+    np.testing.assert_array_equal(loaded.edges, baseline.edges)
+    np.testing.assert_array_equal(loaded.probabilities, baseline.probabilities)
+    assert loaded.sample_count == 1000
+    assert store.get('missing') is None
+
+
+def test_cache_serves_from_memory_until_ttl(tmp_path):
+    store = CountingStore(LocalFileBaselineStore(str(tmp_path)))
+    store.put(BaselineHistogram.from_data('v1', np.arange(100.0)))
+    clock = FakeClock()
+    cache = BaselineCache(store, ttl_seconds=60, clock=clock)
+
+    for _ in range(5):
+        assert cache.get('v1') is not None
+    assert store.gets == 1
+
+    clock.now = 61
+    cache.get('v1')
+    assert store.gets == 2
+    assert cache.stats == {'hits': 4, 'misses': 2}
+
+
+@pytest.fixture
+def monitoring_app(monkeypatch, tmp_path):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-west-2')
+    monkeypatch.setenv('BASELINE_STORE', 'file')
+    monkeypatch.setenv('BASELINE_DIR', str(tmp_path))
+    spec = importlib.util.spec_from_file_location('model_monitoring_app', os.path.join(MONITORING_DIR, 'app.py'))
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    monkeypatch.setattr(app, 'store_metrics', lambda metrics, model_version: True)
+    return app
+
+
+def test_handler_registers_and_references_baseline(monitoring_app):
+    rng = np.random.default_rng(1)
+    response = monitoring_app.handler({'action': 'register_baseline', 'model_version': 'v3',
+                                       'baseline_data': rng.normal(72, 5, size=5000).tolist()}, None)
+    assert response['statusCode'] == 200
+
+    event = {'predictions': [1, 0], 'actuals': [1, 0], 'model_version': 'v3', 'start_time': 0,
+             'baseline_id': 'v3', 'current_data': rng.normal(90, 5, size=500).tolist()}
+    metrics = json.loads(monitoring_app.handler(event, None)['body'])['metrics']
+    assert metrics['drift'] > 1.0
+
+    event['baseline_id'] = 'v4'
+    assert monitoring_app.handler(event, None)['statusCode'] == 404
@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'Lambda-Greengrass-LSTM'))
+
+from batching import MicroBatcher
+
+
+def fake_predict(batch):
+    # Mean of each window, shaped like a single-output Keras model
+    return batch.mean(axis=1)
+
+
+def test_flush_groups_by_sequence_length():
+    results = {}
+    calls = []
+
+    def predict(batch):
+        calls.append(batch.shape)
+        return fake_predict(batch)
+
+    batcher = MicroBatcher(predict, lambda pid, pred: results.__setitem__(pid, pred), max_batch_size=10)
+    batcher.submit('p1', [1.0, 2.0, 3.0])
+    batcher.submit('p2', [4.0, 5.0, 6.0])
+    batcher.submit('p3', [1.0, 1.0])
+
+    assert batcher.flush() == 3
+    assert sorted(calls) == [(1, 2, 1), (2, 3, 1)]
+    assert results['p1'] == [[2.0]]
+    assert results['p2'] == [[5.0]]
+    assert results['p3'] == [[1.0]]
+
+
+def test_batched_results_match_per_event_predict():
+    rng = np.random.default_rng(0)
+    windows = {f'p{i}': rng.normal(size=30).astype(np.float32) for i in range(20)}
+    results = {}
+
+    batcher = MicroBatcher(fake_predict, lambda pid, pred: results.__setitem__(pid, pred), max_batch_size=8)
+    for patient_id, window in windows.items():
+        batcher.submit(patient_id, window)
+    batcher.flush()
+
+    for patient_id, window in windows.items():
+        expected = fake_predict(window.reshape(1, -1, 1)).tolist()
+        np.testing.assert_allclose(results[patient_id], expected, rtol=1e-6)
+    assert batcher.stats['batches'] == 3
+
+
+def test_worker_flushes_on_max_wait():
+    results = {}
+    batcher = MicroBatcher(fake_predict, lambda pid, pred: results.__setitem__(pid, pred),
+                           max_batch_size=100, max_wait_ms=10)
+    batcher.start()
+    try:
+        batcher.submit('p1', [1.0, 3.0])
+        deadline = time.time() + 2
+        while 'p1' not in results and time.time() < deadline:
+            time.sleep(0.005)
+    finally:
+        batcher.stop(timeout=1)
+
+    assert results['p1'] == [[2.0]]
+
+
+def test_failed_batch_reports_every_patient():
+    failures = []
+
+    def broken_predict(batch):
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(broken_predict, lambda pid, pred: None,
+                           on_error=lambda pids, e: failures.append((pids, str(e))))
+    batcher.submit('p1', [1.0])
+    batcher.submit('p2', [2.0])
+    batcher.flush()
+
+    assert failures == [(['p1', 'p2'], 'model unavailable')]
+    assert batcher.stats['errors'] == 1
+
+
+def test_worker_takes_backlog_in_full_batches():
+    results = {}
+    batcher = MicroBatcher(fake_predict, lambda pid, pred: results.__setitem__(pid, pred),
+                           max_batch_size=50, max_wait_ms=0)
+    for i in range(200):
+        batcher.submit(f'p{i}', [float(i)])
+    batcher.start()
+    try:
+        deadline = time.time() + 2
+        while len(results) < 200 and time.time() < deadline:
+            time.sleep(0.005)
+    finally:
+        batcher.stop(timeout=1)
+
+    assert len(results) == 200
+    assert batcher.stats['batches'] == 4
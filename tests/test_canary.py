@@ -0,0 +1,224 @@
+import math
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from botocore.exceptions import ClientError
+
+TRAINING_DIR = os.path.join(os.path.dirname(__file__), '..', 'training')
+sys.path.insert(0, TRAINING_DIR)
+
+import canary
+import rollback
+import rollout
+from canary import CanaryController, SequentialComparison, error_rate_llr, sprt_bounds
+from metric_queries import MetricQueryEngine
+from rollout import ModelRollout
+
+
+class SimulatedEndpoint:
+    """
+    An endpoint with an old and a new variant, serving as both the SageMaker
+    and the CloudWatch client.
+
+    Traffic is generated a minute at a time as the simulated clock advances:
+    Poisson requests split by the current weights, binomial errors and a
+    noisy per-minute mean latency for each variant's configured behaviour.
+
+    Like SageMaker, an update leaves the endpoint Updating for
+    update_minutes, and further updates are rejected until it is back
+    InService.
+    """
+
+    def __init__(self, behaviour, requests_per_minute=600, seed=0, update_minutes=2):
+        self.behaviour = behaviour
+        self.requests_per_minute = requests_per_minute
+        self.rng = np.random.default_rng(seed)
+        self.clock = datetime(2024, 11, 5, 9, 0, tzinfo=timezone.utc)
+        self.update_minutes = update_minutes
+        self.updating_until = None
+        self.weights = {'old': 1.0, 'new': 0.0}
+        self.weight_changes = []
+        self.endpoint_config_updates = []
+        self.datapoints = {}  # (metric, variant) -> {minute: value}
+
+    def now(self):
+        return self.clock
+
+    def sleep(self, seconds):
+        end = self.clock + timedelta(seconds=seconds)
+        while self.clock < end:
+            self._serve_minute(self.clock)
+            self.clock += timedelta(minutes=1)
+
+    def _serve_minute(self, minute):
+        total = sum(self.weights.values())
+        for variant, weight in self.weights.items():
+            requests = int(self.rng.poisson(self.requests_per_minute * weight / total)) if total else 0
+            if not requests:
+                continue
+            behaviour = self.behaviour[variant]
+            errors = int(self.rng.binomial(requests, behaviour['error_rate']))
+            # Exponential service times: the mean of n has sd mean / sqrt(n)
+            latency = self.rng.normal(behaviour['latency_ms'], behaviour['latency_ms'] / math.sqrt(requests))
+            for metric, value in (('Invocations', requests), ('Invocation5XXErrors', errors),
+                                  ('Invocation4XXErrors', 0), ('ModelLatency', latency * 1000)):
+                self.datapoints.setdefault((metric, variant), {})[minute] = float(value)
+
+    # SageMaker
+
+    def status(self):
+        return 'Updating' if self.updating_until and self.clock < self.updating_until else 'InService'
+
+    def _start_update(self, operation):
+        if self.status() == 'Updating':
+            raise ClientError({'Error': {'Code': 'ValidationException',
+                                         'Message': 'Cannot update in-progress endpoint'}}, operation)
+        self.updating_until = self.clock + timedelta(minutes=self.update_minutes)
+
+    def describe_endpoint(self, EndpointName):
+        return {'EndpointName': EndpointName, 'EndpointStatus': self.status(), 'ProductionVariants': [
+            {'VariantName': variant, 'CurrentWeight': weight} for variant, weight in self.weights.items()]}
+
+    def update_endpoint_weights_and_capacities(self, EndpointName, DesiredWeightsAndCapacities):
+        self._start_update('UpdateEndpointWeightsAndCapacities')
+        for desired in DesiredWeightsAndCapacities:
+            self.weights[desired['VariantName']] = desired['DesiredWeight']
+        self.weight_changes.append(round(self.weights['new'] * 100))
+
+    def describe_endpoint_config(self, EndpointConfigName):
+        return {'EndpointConfigName': EndpointConfigName}
+
+    def update_endpoint(self, EndpointName, EndpointConfigName):
+        self._start_update('UpdateEndpoint')
+        self.endpoint_config_updates.append(EndpointConfigName)
+
+    def get_waiter(self, name):
+        assert name == 'endpoint_in_service'
+        return SimulatedWaiter(self)
+
+    # CloudWatch
+
+    def get_metric_data(self, MetricDataQueries, StartTime, EndTime, ScanBy, NextToken=None):
+        results = []
+        for query in MetricDataQueries:
+            metric = query['MetricStat']['Metric']
+            variant = {d['Name']: d['Value'] for d in metric['Dimensions']}['VariantName']
+            points = sorted((t, v) for t, v in self.datapoints.get((metric['MetricName'], variant), {}).items()
+                            if StartTime <= t < EndTime)
+            results.append({'Id': query['Id'], 'Timestamps': [t for t, _ in points],
+                            'Values': [v for _, v in points], 'StatusCode': 'Complete'})
+        return {'MetricDataResults': results}
+
+
+class SimulatedWaiter:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+
+    def wait(self, EndpointName, WaiterConfig):
+        while self.endpoint.status() == 'Updating':
+            self.endpoint.sleep(WaiterConfig['Delay'])
+
+
+@pytest.fixture(autouse=True)
+def no_metrics(monkeypatch):
+    for module in (canary, rollout, rollback):
+        monkeypatch.setattr(module, 'log_metric', lambda *args, **kwargs: True)
+
+
+def run_canary(old, new, seed=0, **kwargs):
+    endpoint = SimulatedEndpoint({'old': old, 'new': new}, seed=seed)
+    controller = CanaryController(ModelRollout('endpoint', {'sagemaker': endpoint}),
+                                  MetricQueryEngine(endpoint), now=endpoint.now, sleep=endpoint.sleep, **kwargs)
+    return controller.run(), endpoint
+
+
+HEALTHY = {'error_rate': 0.01, 'latency_ms': 40}
+
+
+def test_sprt_bounds():
+    lower, upper = sprt_bounds(0.05, 0.05)
+
+    assert upper == pytest.approx(math.log(19))
+    assert lower == pytest.approx(-math.log(19))
+
+
+def test_error_llr_moves_with_the_evidence():
+    assert error_rate_llr(1000, 10, 0.01) < 0
+    assert error_rate_llr(1000, 50, 0.01) > 0
+    # No baseline errors yet still gives a finite answer
+    assert math.isfinite(error_rate_llr(100, 0, 0.0))
+
+
+def test_comparison_needs_latency_points_before_clearing_a_variant():
+    comparison = SequentialComparison(min_latency_points=3)
+    old = {'invocations': 20000, 'errors': 200, 'latency_ms': {0: 40.0, 1: 41.0}, 'requests': {0: 8000, 1: 8000}}
+    new = {'invocations': 5000, 'errors': 50, 'latency_ms': {0: 40.5, 1: 40.0}, 'requests': {0: 2000, 1: 2000}}
+
+    assert comparison.evaluate(old, new)['decision'] == 'continue'
+    old['latency_ms'][2], new['latency_ms'][2] = 40.0, 39.0
+    old['requests'][2], new['requests'][2] = 4000, 1000
+    assert comparison.evaluate(old, new)['decision'] == 'no_regression'
+
+
+def test_healthy_variant_is_promoted_early():
+    result, endpoint = run_canary(HEALTHY, HEALTHY)
+
+    assert result['decision'] == 'promoted_early'
+    assert endpoint.weights['new'] == 1.0
+    # Promoted before walking the whole 5/10/25/50 schedule
+    assert endpoint.weight_changes[-1] == 100 and 50 not in endpoint.weight_changes
+    assert endpoint.endpoint_config_updates == []
+
+
+def test_error_regression_is_rolled_back():
+    result, endpoint = run_canary(HEALTHY, {'error_rate': 0.05, 'latency_ms': 40})
+
+    assert result['decision'] == 'rolled_back'
+    assert result['history'][-1]['error_llr'] >= math.log(19)
+    assert endpoint.weight_changes == [5, 0]
+    # The rollback waited for the traffic shift to finish
+    assert endpoint.endpoint_config_updates == ['previous-config']
+
+
+def test_latency_regression_is_rolled_back():
+    result, endpoint = run_canary(HEALTHY, {'error_rate': 0.01, 'latency_ms': 60})
+
+    assert result['decision'] == 'rolled_back'
+    assert result['history'][-1]['latency_llr'] >= math.log(19)
+    assert endpoint.weights['new'] == 0.0
+
+
+def test_without_early_promotion_the_whole_schedule_is_walked():
+    result, endpoint = run_canary(HEALTHY, HEALTHY, min_invocations=10 ** 9, schedule=(10, 50), step_minutes=4)
+
+    assert result['decision'] == 'promoted'
+    assert endpoint.weight_changes == [10, 50, 100]
+    assert [entry['percentage'] for entry in result['history']] == [10, 10, 50, 50]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_equivalent_variants_are_not_rolled_back(seed):
+    result, _ = run_canary(HEALTHY, HEALTHY, seed=seed)
+
+    assert result['decision'] != 'rolled_back'
+
+
+def test_schedule_is_validated():
+    with pytest.raises(ValueError):
+        CanaryController(ModelRollout('endpoint', {'sagemaker': None}), MetricQueryEngine(None), schedule=(10, 100))
+
+
+def test_rolled_back_canary_tells_the_workflow_not_to_roll_back_again(monkeypatch, tmp_path):
+    output = tmp_path / 'github_output'
+    monkeypatch.setenv('GITHUB_OUTPUT', str(output))
+    monkeypatch.setattr(sys, 'argv', ['rollout.py', '--canary'])
+    monkeypatch.setattr(rollout, 'setup_aws_clients', lambda: {})
+    monkeypatch.setattr(canary, 'get_query_engine', lambda: None)
+    monkeypatch.setattr(CanaryController, 'run', lambda self: {'decision': 'rolled_back', 'reason': 'errors'})
+
+    with pytest.raises(Exception, match='rolled back'):
+        rollout.main()
+    assert output.read_text() == 'decision=rolled_back\n'
@@ -0,0 +1,205 @@
+import importlib.util
+import json
+import math
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+ALARM_DIR = os.path.join(os.path.dirname(__file__), '..', 'lambda', 'model_alarm_response')
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'capacity')
+sys.path.insert(0, ALARM_DIR)
+
+from capacity_planner import (CapacityPlanner, endpoint_load, erlang_c, fetch_endpoint_load,
+                              response_time_quantile)
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, f'{name}.json')) as f:
+        return json.load(f)
+
+
+def test_erlang_c_matches_closed_forms():
+    # M/M/1: P(wait) is the utilisation; M/M/2 at a = 1: 1/3
+    assert erlang_c(1, 0.6) == pytest.approx(0.6)
+    assert erlang_c(2, 1.0) == pytest.approx(1 / 3)
+    assert erlang_c(4, 4.0) == 1.0
+
+
+def test_response_time_quantile():
+    # M/M/1 response time is Exp(μ - λ)
+    assert response_time_quantile(5, 0.1, 1) == pytest.approx(math.log(20) / 5)
+    assert response_time_quantile(0, 0.1, 3) == pytest.approx(math.log(20) * 0.1)
+    assert response_time_quantile(20, 0.1, 2) == math.inf
+    p95s = [response_time_quantile(30, 0.05, servers) for servers in range(2, 6)]
+    assert p95s == sorted(p95s, reverse=True)
+
+
+# Recorded GetMetricData responses and the endpoint's instance count at the time,
+# planned against a 500 ms p95 with the Lambda's default bounds
+@pytest.mark.parametrize('fixture, required, desired, reason', [
+    ('surge', 3, 3, 'scale_up'),
+    ('blip', 2, 2, 'capacity_sufficient'),
+    ('sustained_overload', 7, 4, 'step_limited'),
+    ('at_max_instances', 12, 8, 'max_instances'),
+    ('slow_model', 2, 2, 'target_below_service_time'),
+    ('no_traffic', None, 1, 'no_metrics'),
+])
+def test_plans_for_recorded_metrics(fixture, required, desired, reason):
+    recorded = load_fixture(fixture)
+    current = recorded['endpoint']['ProductionVariants'][0]['CurrentInstanceCount']
+
+    arrival_rate, service_time = endpoint_load(recorded['metric_data']['MetricDataResults'], 60)
+    plan = CapacityPlanner(500, min_instances=1, max_instances=8, max_step_up=2).plan(current, arrival_rate, service_time)
+
+    assert (plan['required'], plan['desired'], plan['reason']) == (required, desired, reason)
+    if reason in ('scale_up', 'capacity_sufficient'):
+        assert plan['desired_p95_ms'] <= 500
+
+
+def test_single_spiky_minute_is_smoothed():
+    recorded = load_fixture('blip')['metric_data']['MetricDataResults']
+
+    spiky_rate, _ = endpoint_load(recorded, 60, smoothing=1)
+    smoothed_rate, service_time = endpoint_load(recorded, 60)
+
+    assert spiky_rate == pytest.approx(45)
+    assert smoothed_rate < 26
+    assert 0.04 < service_time < 0.06
+
+
+def test_scaling_without_metrics_is_opt_in():
+    assert CapacityPlanner(500).plan(3, None, None)['desired'] == 3
+    assert CapacityPlanner(500, no_metrics_step=1).plan(3, None, None)['desired'] == 4
+    assert CapacityPlanner(500, max_instances=3, no_metrics_step=1).plan(3, None, None)['desired'] == 3
+
+
+def test_step_down_is_limited():
+    plan = CapacityPlanner(500, max_step_down=1).plan(6, 5, 0.04)
+
+    assert plan['required'] == 1
+    assert (plan['desired'], plan['reason']) == (5, 'step_limited')
+
+
+def test_bounds_are_validated():
+    with pytest.raises(ValueError):
+        CapacityPlanner(500, min_instances=0)
+    with pytest.raises(ValueError):
+        CapacityPlanner(500, min_instances=4, max_instances=2)
+
+
+class PagedCloudWatch:
+    """Returns the recorded results split over two pages."""
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def get_metric_data(self, **kwargs):
+        self.calls.append(kwargs)
+        if 'NextToken' in kwargs:
+            return {'MetricDataResults': [dict(r, Timestamps=r['Timestamps'][7:], Values=r['Values'][7:])
+                                          for r in self.results]}
+        return {'MetricDataResults': [dict(r, Timestamps=r['Timestamps'][:7], Values=r['Values'][:7])
+                                      for r in self.results],
+                'NextToken': 'page-2'}
+
+
+def test_fetch_follows_pagination_and_sets_dimensions():
+    recorded = load_fixture('surge')['metric_data']['MetricDataResults']
+    cloudwatch = PagedCloudWatch(recorded)
+    now = datetime(2024, 11, 5, 14, 30, tzinfo=timezone.utc)
+
+    fetched = fetch_endpoint_load(cloudwatch, 'prod-lstm-endpoint', 'variant1', window_minutes=15, now=now)
+
+    assert len(cloudwatch.calls) == 2 and cloudwatch.calls[1]['NextToken'] == 'page-2'
+    assert (now - cloudwatch.calls[0]['StartTime']).total_seconds() == 900
+    metric = cloudwatch.calls[0]['MetricDataQueries'][0]['MetricStat']['Metric']
+    assert metric['Dimensions'] == [{'Name': 'EndpointName', 'Value': 'prod-lstm-endpoint'},
+                                    {'Name': 'VariantName', 'Value': 'variant1'}]
+    assert endpoint_load(fetched['MetricDataResults'], 60) == endpoint_load(recorded, 60)
+
+
+class StubSageMaker:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.updates = []
+
+    def describe_endpoint(self, EndpointName):
+        return self.endpoint
+
+    def update_endpoint_weights_and_capacities(self, **kwargs):
+        self.updates.append(kwargs)
+
+
+class StubCloudWatch:
+    def __init__(self, metric_data):
+        self.metric_data = metric_data
+
+    def get_metric_data(self, **kwargs):
+        return self.metric_data
+
+
+class StubSNS:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, **kwargs):
+        self.messages.append(kwargs['Message'])
+
+
+@pytest.fixture
+def scale_with(monkeypatch):
+    monkeypatch.setenv('LEASE_STORE', 'memory')
+    spec = importlib.util.spec_from_file_location('model_alarm_response_app', os.path.join(ALARM_DIR, 'app.py'))
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+
+    def scale(fixture):
+        recorded = load_fixture(fixture)
+        clients = {'sagemaker': StubSageMaker(recorded['endpoint']),
+                   'cloudwatch': StubCloudWatch(recorded['metric_data']),
+                   'sns': StubSNS()}
+        monkeypatch.setattr(app, 'get_client', lambda service: clients[service])
+        event = {'detail': {'alarmName': 'prod-prediction-latency', 'configuration': {
+            'metrics': [{'value': 0.8}], 'dimensions': {'EndpointName': 'prod-lstm-endpoint'}}}}
+        body = json.loads(app.handler(event, None)['body'])
+        return body, clients
+    return scale
+
+
+def test_latency_alarm_scales_to_the_planned_count(scale_with):
+    body, clients = scale_with('surge')
+
+    assert clients['sagemaker'].updates == [{
+        'EndpointName': 'prod-lstm-endpoint',
+        'DesiredWeightsAndCapacities': [{'VariantName': 'variant1', 'DesiredInstanceCount': 3}]
+    }]
+    assert body['actions']['scale_up']['result']['desired'] == 3
+    assert 'Instances: 2 -> 3 (scale_up)' in clients['sns'].messages[0]
+
+
+def test_latency_blip_does_not_scale(scale_with):
+    body, clients = scale_with('blip')
+
+    assert clients['sagemaker'].updates == []
+    assert body['actions']['scale_up']['status'] == 'succeeded'
+    assert 'capacity_sufficient' in clients['sns'].messages[0]
+
+
+def test_latency_alarm_without_metrics_does_not_scale(scale_with):
+    body, clients = scale_with('no_traffic')
+
+    assert clients['sagemaker'].updates == []
+    assert body['actions']['scale_up']['result']['reason'] == 'no_metrics'
+    assert 'Instances: 1 -> 1 (no_metrics).' in clients['sns'].messages[0]
+
+
+def test_serverless_variant_is_left_alone(scale_with):
+    body, clients = scale_with('serverless')
+
+    assert clients['sagemaker'].updates == []
+    assert body['actions']['scale_up']['status'] == 'succeeded'
+    assert body['actions']['scale_up']['result']['reason'] == 'not_instance_based'
+    assert 'Not scaled (not_instance_based).' in clients['sns'].messages[0]
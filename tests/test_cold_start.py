@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import bench_cold_start
+from bench_cold_start import parse_importtime
+
+MONITORING_DIR = os.path.join(os.path.dirname(__file__), '..', 'lambda', 'model_monitoring')
+
+PROBE = """
+import importlib.util, json, sys
+sys.path.insert(0, {lambda_dir!r})
+spec = importlib.util.spec_from_file_location('app', {path!r})
+app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app)
+loaded = sorted(name for name in ('numpy', 'boto3', 'botocore') if name in sys.modules)
+response = app.handler({{'predictions': [1]}}, None)
+invoked = sorted(name for name in ('numpy', 'boto3', 'botocore') if name in sys.modules)
+print(json.dumps({{'loaded': loaded, 'invoked': invoked, 'status': response['statusCode']}}))
+"""
+
+
+def run_probe(tmp_path, **env):
+    code = PROBE.format(lambda_dir=MONITORING_DIR, path=os.path.join(MONITORING_DIR, 'app.py'))
+    env = dict(os.environ, AWS_DEFAULT_REGION='eu-west-2', BASELINE_STORE='file',
+               BASELINE_DIR=str(tmp_path), **env)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            check=True, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_monitoring_init_and_invalid_events_skip_heavy_imports(tmp_path):
+    result = run_probe(tmp_path)
+
+    assert result == {'loaded': [], 'invoked': [], 'status': 400}
+
+
+def test_eager_init_loads_everything_up_front(tmp_path):
+    result = run_probe(tmp_path, EAGER_INIT='true')
+
+    assert result['loaded'] == ['boto3', 'botocore', 'numpy']
+
+
+def test_parse_importtime_keeps_imports_after_the_marker():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 | json",
+        bench_cold_start.MARKER,
+        "import time:        50 |         50 |   numpy.core",
+        "import time:       200 |        250 | numpy",
+    ])
+
+    imports = parse_importtime(stderr)
+
+    assert [entry['module'] for entry in imports] == ['numpy.core', 'numpy']
+    assert [entry['depth'] for entry in imports] == [1, 0]
+    assert imports[1]['cumulative_us'] == 250
+
+
+def test_profile_reports_an_init_breakdown():
+    report = bench_cold_start.profile('model_monitoring', dict(os.environ, BASELINE_STORE='file'))
+
+    assert report['init_ms'] > 0
+    assert report['import_ms'] <= report['init_ms']
+    assert report['first_invoke_ms'] is not None
+    assert report['modules_imported'] > 0
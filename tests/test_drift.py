@@ -0,0 +1,105 @@
+import importlib.util
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+MONITORING_DIR = os.path.join(os.path.dirname(__file__), '..', 'lambda', 'model_monitoring')
+sys.path.insert(0, MONITORING_DIR)
+
+from drift import DriftEngine, feature_drift
+
+FEATURES = ['heart_rate', 'spo2', 'systolic_bp', 'temperature']
+
+
+def vitals(rng, n, heart_rate_shift=0.0):
+    return np.column_stack([rng.normal(75 + heart_rate_shift, 10, n),
+                            np.round(rng.normal(97, 1.5, n)),
+                            rng.normal(120, 15, n),
+                            rng.normal(36.8, 0.4, n)])
+
+
+def brute_force_ks(a, b):
+    points = np.concatenate([a, b])
+    cdf_a = (a[None, :] <= points[:, None]).mean(axis=1)
+    cdf_b = (b[None, :] <= points[:, None]).mean(axis=1)
+    return np.abs(cdf_a - cdf_b).max()
+
+
+def test_ks_matches_brute_force_with_ties():
+    rng = np.random.default_rng(0)
+    # Rounded readings give many ties across and within samples
+    baseline = np.round(rng.normal(97, 1.5, size=(700, 1)))
+    current = np.round(rng.normal(96.5, 1.5, size=(500, 1)))
+
+    result = feature_drift(current, baseline)
+
+    assert result['features']['feature_0']['ks'] == pytest.approx(brute_force_ks(current[:, 0], baseline[:, 0]))
+
+
+def test_same_distribution_does_not_drift():
+    rng = np.random.default_rng(1)
+    result = feature_drift(vitals(rng, 20000), vitals(rng, 20000), FEATURES)
+
+    assert result['drifted_features'] == []
+    for metrics in result['features'].values():
+        assert metrics['psi'] < 0.01
+        assert metrics['js'] < 0.01
+        assert metrics['ks'] < 0.03
+
+
+def test_shifted_feature_is_ranked_first():
+    rng = np.random.default_rng(2)
+    engine = DriftEngine(vitals(rng, 20000), FEATURES)
+
+    result = engine.compare(vitals(rng, 5000, heart_rate_shift=10))
+
+    assert result['ranked_features'][0] == 'heart_rate'
+    assert result['drifted_features'] == ['heart_rate']
+    assert result['features']['heart_rate']['ks_pvalue'] < 1e-6
+    assert 0 < result['features']['heart_rate']['js'] <= 1
+    assert result['max_psi'] == result['features']['heart_rate']['psi']
+
+
+def test_out_of_range_current_data_counts_as_drift():
+    baseline = np.linspace(0, 1, 1000)
+    result = feature_drift(baseline + 5, baseline)
+
+    assert result['features']['feature_0']['ks'] == pytest.approx(1.0)
+    assert result['features']['feature_0']['drifted']
+
+
+def test_rejects_mismatched_features():
+    rng = np.random.default_rng(3)
+    engine = DriftEngine(vitals(rng, 100), FEATURES)
+    with pytest.raises(ValueError):
+        engine.compare(rng.normal(size=(100, 3)))
+    with pytest.raises(ValueError):
+        DriftEngine(vitals(rng, 100), ['heart_rate'])
+
+
+@pytest.fixture
+def monitoring_app(monkeypatch, tmp_path):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-west-2')
+    monkeypatch.setenv('BASELINE_STORE', 'file')
+    monkeypatch.setenv('BASELINE_DIR', str(tmp_path))
+    spec = importlib.util.spec_from_file_location('model_monitoring_app', os.path.join(MONITORING_DIR, 'app.py'))
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    monkeypatch.setattr(app, 'store_metrics', lambda metrics, model_version: True)
+    return app
+
+
+def test_handler_reports_feature_drift(monitoring_app):
+    rng = np.random.default_rng(4)
+    event = {'predictions': [1, 0], 'actuals': [1, 0], 'model_version': 'v1', 'start_time': 0,
+             'feature_names': FEATURES,
+             'baseline_data': vitals(rng, 2000).tolist(),
+             'current_data': vitals(rng, 2000, heart_rate_shift=10).tolist()}
+
+    metrics = json.loads(monitoring_app.handler(event, None)['body'])['metrics']
+
+    assert metrics['feature_drift']['drifted_features'] == ['heart_rate']
+    assert metrics['drift'] == metrics['feature_drift']['max_psi']
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import bench_edge_inference
+from bench_edge_inference import synthetic_vitals
+
+
+def test_synthetic_vitals_cover_every_patient():
+    stream = synthetic_vitals(patients=3, window=20, seed=1)
+    events = [next(stream) for _ in range(9)]
+
+    assert [patient_id for patient_id, _, _ in events[:3]] == ['patient-0000', 'patient-0001', 'patient-0002']
+    assert all(window.shape == (20,) for _, window, _ in events)
+    # Each patient's window slides by one reading per round
+    assert events[3][2] == events[0][2] + 1
+    assert (events[3][1][:-1] == events[0][1][1:]).all()
+
+
+def test_harness_drives_handler_end_to_end():
+    result = bench_edge_inference.run(patients=4, window=30, seconds=5.0, binary=True,
+                                      units=(8,), max_events=40)
+
+    assert result['events'] == 40
+    assert result['errors'] == 0
+    assert result['published_messages'] == 40
+    assert 0 < result['latency_ms']['p50'] <= result['latency_ms']['p99']
+    assert result['peak_rss_mb'] > 0
+
+
+def test_harness_batching_mode_drains_queue():
+    result = bench_edge_inference.run(patients=4, window=30, seconds=5.0, batching=True,
+                                      units=(8,), max_events=100)
+
+    assert result['events'] == 100
+    assert result['published_messages'] == 100
+
+
+def test_run_restores_environment_and_modules(monkeypatch):
+    monkeypatch.setenv('INFERENCE_ENGINE', 'keras')
+    monkeypatch.delenv('BATCH_INFERENCE', raising=False)
+    monkeypatch.delitem(sys.modules, 'greengrasssdk', raising=False)
+
+    bench_edge_inference.run(patients=2, window=30, seconds=5.0, units=(8,), max_events=5)
+
+    assert os.environ['INFERENCE_ENGINE'] == 'keras'
+    assert 'BATCH_INFERENCE' not in os.environ
+    assert 'greengrasssdk' not in sys.modules
+
+
+def test_gate_stats_can_be_turned_off(monkeypatch):
+    monkeypatch.setenv('GATE_STATS_EVERY', '0')
+
+    result = bench_edge_inference.run(patients=2, window=30, seconds=5.0, gate=True, units=(8,), max_events=20)
+
+    assert result['events'] == 20 and result['errors'] == 0
+
+
+@pytest.mark.parametrize('engine', ['int8', 'float16'])
+def test_harness_runs_quantised_bundles(engine):
+    result = bench_edge_inference.run(patients=4, window=30, seconds=5.0, units=(8,), max_events=20, engine=engine)
+
+    assert result['events'] == 20 and result['errors'] == 0
+    assert result['config']['engine'] == engine
+    assert result['quantization']['mode'] == engine and result['quantization']['decision_agreement'] > 0.9
+
+
+def test_harness_runs_keras_engine():
+    pytest.importorskip('keras')
+
+    result = bench_edge_inference.run(patients=2, window=30, seconds=5.0, units=(8,), max_events=3, engine='keras')
+
+    assert result['events'] == 3 and result['errors'] == 0
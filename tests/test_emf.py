@@ -0,0 +1,123 @@
+import importlib.util
+import io
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+MONITORING_DIR = os.path.join(os.path.dirname(__file__), '..', 'lambda', 'model_monitoring')
+TRAINING_DIR = os.path.join(os.path.dirname(__file__), '..', 'training')
+sys.path.insert(0, MONITORING_DIR)
+
+from emf import emf_documents, emit_emf
+from metric_writer import MetricWriter
+
+
+def read_documents(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_document_layout():
+    documents = emf_documents('Healthcare/ML',
+                              [{'name': 'ModelAccuracy', 'value': 0.93, 'unit': 'Percent'},
+                               {'name': 'PredictionLatencyP95', 'value': 18.0, 'unit': 'Milliseconds',
+                                'high_resolution': True}],
+                              dimensions={'ModelVersion': 'v3'},
+                              timestamp=1700000000.5,
+                              properties={'RequestId': 'abc'})
+
+    assert len(documents) == 1
+    document = documents[0]
+    assert document['ModelVersion'] == 'v3'
+    assert document['RequestId'] == 'abc'
+    assert document['ModelAccuracy'] == 0.93
+    assert document['_aws'] == {
+        'Timestamp': 1700000000500,
+        'CloudWatchMetrics': [{
+            'Namespace': 'Healthcare/ML',
+            'Dimensions': [['ModelVersion']],
+            'Metrics': [
+                {'Name': 'ModelAccuracy', 'Unit': 'Percent', 'StorageResolution': 60},
+                {'Name': 'PredictionLatencyP95', 'Unit': 'Milliseconds', 'StorageResolution': 1},
+            ]
+        }]
+    }
+
+
+def test_long_value_lists_are_split_across_documents():
+    documents = emf_documents('Healthcare/ML', [{'name': 'Latency', 'value': list(range(250))}])
+
+    assert [len(document['Latency']) for document in documents] == [100, 100, 50]
+    assert sum((document['Latency'] for document in documents), []) == list(range(250))
+
+
+def test_at_most_100_metrics_per_document():
+    metrics = [{'name': f'Metric{i}', 'value': i} for i in range(150)]
+
+    documents = emf_documents('Healthcare/ML', metrics)
+
+    assert [len(document['_aws']['CloudWatchMetrics'][0]['Metrics']) for document in documents] == [100, 50]
+
+
+def test_metric_name_clashing_with_dimension_is_rejected():
+    with pytest.raises(ValueError):
+        emf_documents('Healthcare/ML', [{'name': 'ModelVersion', 'value': 1}], dimensions={'ModelVersion': 'v3'})
+
+
+def test_emit_writes_one_json_line_per_document():
+    stream = io.StringIO()
+
+    count = emit_emf('Healthcare/ML', [{'name': 'Latency', 'value': list(range(150))}], stream=stream)
+
+    assert count == 2
+    assert len(read_documents(stream)) == 2
+
+
+def test_metric_writer_emf_backend_makes_no_cloudwatch_calls():
+    stream = io.StringIO()
+    cloudwatch = SimpleNamespace(put_metric_data=lambda **kwargs: pytest.fail("API backend used"))
+    table = SimpleNamespace(name='model-metrics',
+                            meta=SimpleNamespace(client=SimpleNamespace(batch_write_item=lambda RequestItems: {})))
+    writer = MetricWriter(table, cloudwatch, backend='emf', emf_stream=stream)
+
+    for value in (10.0, 12.0, 10.0):
+        writer.add_metric('PredictionLatency', value, unit='Milliseconds',
+                          dimensions={'ModelVersion': 'v3'}, timestamp=1700000005)
+    writer.add_metric('ModelAccuracy', 0.9, dimensions={'ModelVersion': 'v3'}, timestamp=1700000005,
+                      high_resolution=True)
+
+    assert writer.flush()
+    documents = read_documents(stream)
+    assert writer.stats['emf_documents'] == len(documents) == 2
+    assert writer.stats['cloudwatch_calls'] == 0
+
+    by_metric = {document['_aws']['CloudWatchMetrics'][0]['Metrics'][0]['Name']: document for document in documents}
+    latency = by_metric['PredictionLatency']
+    # Aggregated counts are expanded back into individual values
+    assert sorted(latency['PredictionLatency']) == [10.0, 10.0, 12.0]
+    assert latency['_aws']['Timestamp'] == 1699999980000
+    assert by_metric['ModelAccuracy']['_aws']['Timestamp'] == 1700000005000
+    assert by_metric['ModelAccuracy']['_aws']['CloudWatchMetrics'][0]['Metrics'][0]['StorageResolution'] == 1
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        MetricWriter(table=None, cloudwatch=None, backend='statsd')
+
+
+def test_training_log_metric_emf_backend(monkeypatch, capsys):
+    sys.path.insert(0, TRAINING_DIR)
+    spec = importlib.util.spec_from_file_location('training_utils', os.path.join(TRAINING_DIR, 'utils.py'))
+    utils = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(utils)
+    monkeypatch.setattr(utils, 'METRICS_BACKEND', 'emf')
+    monkeypatch.setattr(utils, 'setup_aws_clients', lambda: pytest.fail("API backend used"))
+
+    utils.log_metric('HealthCheckScore', 0.99, dimensions=[{'Name': 'CheckType', 'Value': 'canary'}])
+
+    document = json.loads(capsys.readouterr().out)
+    assert document['HealthCheckScore'] == 0.99
+    assert document['CheckType'] == 'canary'
+    assert document['_aws']['CloudWatchMetrics'][0]['Namespace'] == 'MLOps/ModelMetrics'
@@ -0,0 +1,65 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'model_monitoring'))
+
+from evaluation import evaluate_predictions
+
+
+def pairwise_auc(y_true, scores):
+    """Reference ROC-AUC: fraction of positive/negative pairs ranked correctly, ties as half."""
+    pos = scores[y_true == 1][:, None]
+    neg = scores[y_true == 0][None, :]
+    return ((pos > neg).sum() + 0.5 * (pos == neg).sum()) / (pos.size * neg.size)
+
+
+def test_hard_labels_match_hand_counts():
+    predictions = [1, 0, 1, 1, 0, 0, 1, 0]
+    actuals = [1, 0, 0, 1, 1, 0, 1, 0]
+
+    result = evaluate_predictions(predictions, actuals)
+
+    assert result['confusion_matrix'] == {'tn': 3, 'fp': 1, 'fn': 1, 'tp': 3}
+    assert result['accuracy'] == pytest.approx(6 / 8)
+    assert result['precision'] == pytest.approx(3 / 4)
+    assert result['recall'] == pytest.approx(3 / 4)
+    assert result['f1'] == pytest.approx(3 / 4)
+    assert result['brier_score'] == pytest.approx(2 / 8)
+    assert result['count'] == 8
+
+
+def test_probabilities_use_threshold():
+    predictions = [0.9, 0.6, 0.4, 0.2]
+    actuals = [1, 0, 1, 0]
+
+    default = evaluate_predictions(predictions, actuals)
+    strict = evaluate_predictions(predictions, actuals, threshold=0.7)
+
+    assert default['confusion_matrix'] == {'tn': 1, 'fp': 1, 'fn': 1, 'tp': 1}
+    assert strict['confusion_matrix'] == {'tn': 2, 'fp': 0, 'fn': 1, 'tp': 1}
+    # Threshold only changes the labels, not the ranking or calibration metrics
+    assert default['roc_auc'] == strict['roc_auc'] == pytest.approx(0.75)
+    assert default['brier_score'] == pytest.approx((0.01 + 0.36 + 0.36 + 0.04) / 4)
+
+
+def test_roc_auc_matches_pairwise_definition_with_ties():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, size=2000)
+    # Rounding forces plenty of tied scores
+    scores = np.round(np.clip(0.3 * y_true + rng.normal(0.35, 0.2, size=2000), 0, 1), 1)
+
+    assert evaluate_predictions(scores, y_true)['roc_auc'] == pytest.approx(pairwise_auc(y_true, scores))
+
+
+def test_degenerate_inputs():
+    single_class = evaluate_predictions([0.2, 0.8], [1, 1])
+    assert single_class['roc_auc'] is None
+    assert evaluate_predictions([0, 0], [0, 0])['precision'] == 0.0
+
+    with pytest.raises(ValueError):
+        evaluate_predictions([1, 0], [1])
+    with pytest.raises(ValueError):
+        evaluate_predictions([], [])
@@ -0,0 +1,166 @@
+import base64
+import importlib.util
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+MONITORING_DIR = os.path.join(os.path.dirname(__file__), '..', 'lambda', 'model_monitoring')
+sys.path.insert(0, MONITORING_DIR)
+
+from kinesis_batch import group_records, is_kinesis_batch
+
+
+def kinesis_event(payloads):
+    records = []
+    for i, payload in enumerate(payloads):
+        data = payload if isinstance(payload, str) else base64.b64encode(json.dumps(payload).encode()).decode()
+        records.append({'eventSource': 'aws:kinesis',
+                        'kinesis': {'sequenceNumber': f'{i:05d}', 'data': data}})
+    return {'Records': records}
+
+
+class RecordingWriter:
+    """Stands in for MetricWriter and keeps what would have been written."""
+
+    def __init__(self, fail_flush=False):
+        self.records = {}
+        self.metrics = []
+        self.flushes = 0
+        self.fail_flush = fail_flush
+        self.discarded = False
+
+    def add_record(self, model_version, metrics, timestamp=None):
+        self.records[model_version] = metrics
+
+    def add_metric(self, name, value, unit='None', dimensions=None, timestamp=None):
+        self.metrics.append((name, value, (dimensions or {}).get('ModelVersion', dimensions)))
+
+    def flush(self):
+        self.flushes += 1
+        return not self.fail_flush
+
+    def discard(self):
+        self.discarded = True
+
+
+@pytest.fixture
+def monitoring_app(monkeypatch, tmp_path):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-west-2')
+    monkeypatch.setenv('BASELINE_STORE', 'file')
+    monkeypatch.setenv('BASELINE_DIR', str(tmp_path))
+    spec = importlib.util.spec_from_file_location('model_monitoring_app', os.path.join(MONITORING_DIR, 'app.py'))
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    monkeypatch.setattr(app, 'metric_writer', RecordingWriter())
+    return app
+
+
+def test_detects_kinesis_events():
+    assert is_kinesis_batch(kinesis_event([{'model_version': 'v1'}]))
+    assert not is_kinesis_batch({'predictions': [1], 'actuals': [1]})
+    assert not is_kinesis_batch({'Records': [{'eventSource': 'aws:sqs'}]})
+
+
+def test_groups_scalar_and_list_records_by_model_version():
+    event = kinesis_event([
+        {'model_version': 'v1', 'prediction': 0.9, 'actual': 1, 'latency_ms': 10},
+        {'model_version': 'v2', 'predictions': [0.1, 0.2], 'actuals': [0, 0], 'latencies_ms': [5, 6]},
+        {'model_version': 'v1', 'prediction': 0.4, 'value': 71.0},
+    ])
+
+    batches, rejected = group_records(event['Records'])
+
+    assert rejected == []
+    assert batches['v1'].labelled_predictions == [0.9] and batches['v1'].unlabelled_predictions == 1
+    assert batches['v1'].current_data == [71.0]
+    assert batches['v2'].actuals == [0.0, 0.0] and batches['v2'].latencies_ms == [5.0, 6.0]
+    assert batches['v1'].sequence_numbers == ['00000', '00002']
+
+
+def test_bad_records_are_isolated():
+    event = kinesis_event([
+        {'model_version': 'v1', 'prediction': 1, 'actual': 1},
+        'not base64!',
+        base64.b64encode(b'{"model_version": "v1", ').decode(),
+        {'prediction': 1},
+        {'model_version': 'v1', 'predictions': [1, 0], 'actuals': [1]},
+        {'model_version': 'v1', 'prediction': 0, 'actual': 0},
+    ])
+
+    batches, rejected = group_records(event['Records'])
+
+    assert sorted(rejected) == ['00001', '00002', '00003', '00004']
+    assert batches['v1'].labelled_predictions == [1.0, 0.0]
+
+
+def test_malformed_payloads_cannot_pair_up_into_valid_records():
+    # Joined with commas these would parse as three objects
+    raw = [b'{"model_version": "v1", "value": "7', b'1"}', b'{"model_version": "v1"},{"model_version": "v2"}',
+           b'{"model_version": "v1", "value": 72}']
+    event = kinesis_event([base64.b64encode(payload).decode() for payload in raw])
+
+    batches, rejected = group_records(event['Records'])
+
+    assert rejected == ['00000', '00001', '00002']
+    assert list(batches) == ['v1'] and batches['v1'].sequence_numbers == ['00003']
+
+
+def test_handler_writes_one_record_per_model_version(monitoring_app):
+    rng = np.random.default_rng(0)
+    monitoring_app.handler({'action': 'register_baseline', 'model_version': 'v1',
+                            'baseline_data': rng.normal(72, 5, size=5000).tolist()}, None)
+    payloads = [{'model_version': 'v1', 'prediction': float(p), 'actual': int(p > 0.5),
+                 'latency_ms': float(l), 'value': float(v)}
+                for p, l, v in zip(rng.random(300), rng.gamma(4, 5, size=300), rng.normal(72, 5, size=300))]
+    payloads += [{'model_version': 'v2', 'prediction': 0.2, 'latency_ms': 8.0}] * 50
+    payloads.insert(100, {'model_version': 'v1', 'prediction': 'high'})
+
+    response = monitoring_app.handler(kinesis_event(payloads), None)
+
+    # The invalid record is dropped and counted, not retried
+    assert response == {'batchItemFailures': []}
+    writer = monitoring_app.metric_writer
+    assert ('DroppedTelemetryRecords', 1, {'Reason': 'invalid', 'Environment': 'production'}) in writer.metrics
+    assert writer.flushes == 1
+    v1, v2 = writer.records['v1'], writer.records['v2']
+    assert v1['records'] == 300 and v1['accuracy'] == 1.0 and v1['drift'] < 0.1
+    assert v1['latency_p50'] <= v1['latency_p95'] <= v1['latency_p99']
+    assert v2['accuracy'] is None and v2['unlabelled_predictions'] == 50 and v2['drift'] is None
+    assert ('ModelAccuracy', 1.0, 'v1') in writer.metrics
+    assert not any(name == 'ModelAccuracy' for name, _, version in writer.metrics if version == 'v2')
+
+
+def test_failed_write_retries_whole_batch(monitoring_app, monkeypatch):
+    monkeypatch.setattr(monitoring_app, 'metric_writer', RecordingWriter(fail_flush=True))
+    event = kinesis_event([{'model_version': 'v1', 'prediction': 1, 'actual': 1}] * 3)
+
+    response = monitoring_app.handler(event, None)
+
+    assert [failure['itemIdentifier'] for failure in response['batchItemFailures']] == ['00000', '00001', '00002']
+    # The replay writes the batch again, so nothing is kept back
+    assert monitoring_app.metric_writer.discarded
+
+
+def test_records_whose_metrics_fail_are_dropped(monitoring_app, monkeypatch):
+    calculate = monitoring_app.calculate_batch_metrics
+
+    def fail_for_v2(batch):
+        if batch.model_version == 'v2':
+            raise RuntimeError("bad batch")
+        return calculate(batch)
+
+    monkeypatch.setattr(monitoring_app, 'calculate_batch_metrics', fail_for_v2)
+    event = kinesis_event([{'model_version': 'v1', 'prediction': 1, 'actual': 1},
+                           {'model_version': 'v2', 'prediction': 1, 'actual': 1},
+                           {'model_version': 'v2', 'prediction': 0, 'actual': 0}])
+
+    response = monitoring_app.handler(event, None)
+
+    # v1 was written; replaying the batch would count it twice
+    assert response == {'batchItemFailures': []}
+    writer = monitoring_app.metric_writer
+    assert list(writer.records) == ['v1']
+    assert ('DroppedTelemetryRecords', 2, {'Reason': 'metrics_error', 'Environment': 'production'}) in writer.metrics
@@ -0,0 +1,273 @@
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+TRAINING_DIR = os.path.join(os.path.dirname(__file__), '..', 'training')
+sys.path.insert(0, TRAINING_DIR)
+
+from metric_queries import (MetricQueryEngine, endpoint_health, metric_query, summarize_endpoint_health,
+                            time_window)
+
+NOW = datetime(2024, 11, 5, 14, 37, 42, tzinfo=timezone.utc)
+
+
+class StubCloudWatch:
+    """
+    get_metric_data over canned values, newest first like CloudWatch, at most
+    page_size datapoints per series per page.
+
+    Values are keyed by (MetricName, Stat, VariantName or None) and laid out
+    one per period back from EndTime. Like SageMaker, AWS/SageMaker metrics
+    only exist per variant: queries on the endpoint alone return nothing.
+    """
+
+    def __init__(self, values, page_size=4, delay=0.0):
+        self.values = values
+        self.page_size = page_size
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get_metric_data(self, MetricDataQueries, StartTime, EndTime, ScanBy, NextToken=None):
+        with self.lock:
+            self.calls.append({'queries': MetricDataQueries, 'StartTime': StartTime, 'EndTime': EndTime,
+                               'NextToken': NextToken})
+        time.sleep(self.delay)
+        offset = int(NextToken or 0)
+        results, more = [], False
+        for query in MetricDataQueries:
+            stat = query['MetricStat']
+            dimensions = {d['Name']: d['Value'] for d in stat['Metric']['Dimensions']}
+            if stat['Metric']['Namespace'] == 'AWS/SageMaker' and 'VariantName' not in dimensions:
+                values = []
+            else:
+                values = self.values.get((stat['Metric']['MetricName'], stat['Stat'], dimensions.get('VariantName')),
+                                         [])
+            timestamps = [EndTime - timedelta(seconds=stat['Period'] * (i + 1)) for i in range(len(values))]
+            results.append({'Id': query['Id'], 'Timestamps': timestamps[offset:offset + self.page_size],
+                            'Values': values[offset:offset + self.page_size], 'StatusCode': 'Complete'})
+            more = more or len(values) > offset + self.page_size
+        response = {'MetricDataResults': results}
+        if more:
+            response['NextToken'] = str(offset + self.page_size)
+        return response
+
+
+class StubSageMaker:
+    def __init__(self, variants=('old', 'new')):
+        self.variants = variants
+
+    def describe_endpoint(self, EndpointName):
+        return {'EndpointName': EndpointName,
+                'ProductionVariants': [{'VariantName': variant} for variant in self.variants]}
+
+
+CLIENTS = {'sagemaker': StubSageMaker()}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def invocations_query(variant=None):
+    dimensions = [{'Name': 'EndpointName', 'Value': 'endpoint'}]
+    if variant:
+        dimensions.append({'Name': 'VariantName', 'Value': variant})
+    return metric_query('invocations', 'AWS/SageMaker', 'Invocations', 'Sum', dimensions)
+
+
+def test_time_window_is_aligned_to_the_period():
+    start, end = time_window(10, 60, NOW)
+
+    assert end == datetime(2024, 11, 5, 14, 37, tzinfo=timezone.utc)
+    assert end - start == timedelta(minutes=10)
+    assert time_window(10, 60, NOW + timedelta(seconds=15)) == (start, end)
+
+
+def test_fetch_follows_pagination_and_orders_oldest_first():
+    cloudwatch = StubCloudWatch({('Invocations', 'Sum', 'a'): [10, 9, 8, 7, 6, 5, 4, 3, 2, 1]})
+    engine = MetricQueryEngine(cloudwatch)
+    start, end = time_window(10, 60, NOW)
+
+    series = engine.fetch([invocations_query('a')], start, end)['invocations']
+
+    assert series['values'] == [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert series['timestamps'] == sorted(series['timestamps'])
+    assert [call['NextToken'] for call in cloudwatch.calls] == [None, '4', '8']
+    assert cloudwatch.calls[0]['StartTime'] == start and cloudwatch.calls[0]['EndTime'] == end
+
+
+def test_repeated_fetches_within_the_ttl_use_the_cache():
+    cloudwatch = StubCloudWatch({('Invocations', 'Sum', 'a'): [5, 5]})
+    clock = Clock()
+    engine = MetricQueryEngine(cloudwatch, cache_ttl=60, clock=clock)
+    start, end = time_window(10, 60, NOW)
+
+    first = engine.fetch([invocations_query('a')], start, end)
+    # Same metric under another Id is the same series
+    renamed = dict(invocations_query('a'), Id='calls')
+    assert engine.fetch([renamed], start, end)['calls'] == first['invocations']
+    assert len(cloudwatch.calls) == 1
+
+    engine.fetch([invocations_query('a')], start + timedelta(minutes=1), end + timedelta(minutes=1))
+    assert len(cloudwatch.calls) == 2
+    clock.now += 61
+    engine.fetch([invocations_query('a')], start, end)
+    assert len(cloudwatch.calls) == 3
+    assert engine.stats['cache_hits'] == 1
+
+
+def test_expired_entries_are_evicted_as_windows_slide():
+    cloudwatch = StubCloudWatch({('Invocations', 'Sum', 'a'): [5, 5]})
+    clock = Clock()
+    engine = MetricQueryEngine(cloudwatch, cache_ttl=60, clock=clock)
+    start, end = time_window(10, 60, NOW)
+
+    for minute in range(10):
+        engine.fetch([invocations_query('a')], start + timedelta(minutes=minute), end + timedelta(minutes=minute))
+        clock.now += 30
+
+    # Only the windows stored within the last TTL are kept
+    assert len(engine._cache) == 2
+
+
+def test_large_query_sets_are_split_into_parallel_calls():
+    cloudwatch = StubCloudWatch({}, delay=0.2)
+    engine = MetricQueryEngine(cloudwatch, max_workers=4)
+    queries = [dict(invocations_query(), Id=f'q{i}',
+                    MetricStat=dict(invocations_query()['MetricStat'], Period=60 * (i + 1)))
+               for i in range(1200)]
+
+    started = time.perf_counter()
+    results = engine.fetch(queries, *time_window(10, 60, NOW))
+
+    assert time.perf_counter() - started < 0.4
+    assert sorted(len(call['queries']) for call in cloudwatch.calls) == [200, 500, 500]
+    assert len(results) == 1200
+
+
+def test_fetch_many_runs_requests_concurrently():
+    cloudwatch = StubCloudWatch({('Invocations', 'Sum', 'a'): [1], ('Invocations', 'Sum', 'b'): [2]}, delay=0.2)
+    engine = MetricQueryEngine(cloudwatch)
+    start, end = time_window(10, 60, NOW)
+
+    started = time.perf_counter()
+    results = engine.fetch_many({'a': ([invocations_query('a')], start, end),
+                                 'b': ([invocations_query('b')], start, end)})
+
+    assert time.perf_counter() - started < 0.35
+    assert results['a']['invocations']['values'] == [1]
+    assert results['b']['invocations']['values'] == [2]
+
+
+def test_summary_derives_success_rate_and_latency_percentiles():
+    def series(*values):
+        return {'timestamps': list(range(len(values))), 'values': list(values)}
+
+    summary = summarize_endpoint_health({
+        'invocations': series(400, 600),
+        'errors_4xx': series(3, 2),
+        'errors_5xx': series(0, 5),
+        'latency_avg': series(21000),
+        'latency_p95': series(48000),
+        'latency_p99': series()
+    })
+
+    assert summary['success_rate'] == pytest.approx(0.99)
+    assert summary['latency_avg_ms'] == 21 and summary['latency_p95_ms'] == 48
+    assert summary['latency_p50_ms'] is None and summary['latency_p99_ms'] is None
+    assert summarize_endpoint_health({})['success_rate'] is None
+
+
+def rollout_metrics():
+    # Old variant healthy, new variant erroring; the endpoint total is above 98%
+    return {
+        ('Invocations', 'Sum', 'old'): [400] * 10,
+        ('Invocation5XXErrors', 'Sum', 'old'): [0] * 10,
+        ('ModelLatency', 'Average', 'old'): [30000],
+        ('ModelLatency', 'p95', 'old'): [40000],
+        ('Invocations', 'Sum', 'new'): [100] * 10,
+        ('Invocation5XXErrors', 'Sum', 'new'): [8] * 10,
+        ('ModelLatency', 'Average', 'new'): [80000],
+        ('ModelLatency', 'p95', 'new'): [90000],
+    }
+
+
+def test_endpoint_health_reports_each_variant_and_the_endpoint():
+    engine = MetricQueryEngine(StubCloudWatch(rollout_metrics()))
+
+    health = endpoint_health(engine, 'endpoint', ['old', 'new'], window_minutes=10, now=NOW)
+
+    assert health['old']['success_rate'] == 1.0
+    assert health['new']['success_rate'] == pytest.approx(0.92)
+    assert health['new']['latency_p95_ms'] == 90
+    assert health['new']['invocations'] == 1000
+    # Endpoint-wide numbers are combined from the variants
+    assert health[None]['invocations'] == 5000
+    assert health[None]['success_rate'] == pytest.approx(0.984)
+    assert health[None]['latency_avg_ms'] == pytest.approx(40)
+    assert health[None]['latency_p95_ms'] == 90 and health[None]['latency_p99_ms'] is None
+
+
+@pytest.fixture
+def checks(monkeypatch):
+    import health_check
+    import performance_check
+    logged = []
+    for module in (health_check, performance_check):
+        monkeypatch.setattr(module, 'log_metric', lambda *args, **kwargs: logged.append((args, kwargs)))
+    return health_check, performance_check, logged
+
+
+def test_rollout_health_check_fails_on_a_bad_variant(checks):
+    health_check, _, logged = checks
+    engine = MetricQueryEngine(StubCloudWatch(rollout_metrics()))
+
+    assert health_check.EndpointHealthCheck('endpoint', engine=engine, clients=CLIENTS).run_health_check(
+        'during-rollout')
+    assert not health_check.EndpointHealthCheck('endpoint', ['old', 'new'], engine=engine,
+                                                clients=CLIENTS).run_health_check('during-rollout')
+    # The second check reused the variants' series
+    assert engine.stats['cache_hits'] == 14
+    scores = [kwargs['dimensions'] for args, kwargs in logged if args[0] == 'HealthCheckScore']
+    assert {'Name': 'VariantName', 'Value': 'new'} in scores[-1]
+
+
+def test_health_check_without_traffic(checks):
+    health_check, _, _ = checks
+    engine = MetricQueryEngine(StubCloudWatch({}))
+
+    assert not health_check.EndpointHealthCheck('endpoint', engine=engine, clients=CLIENTS).run_health_check(
+        'pre-deployment')
+    assert health_check.EndpointHealthCheck('endpoint', allow_no_traffic=True, engine=engine,
+                                            clients=CLIENTS).run_health_check('pre-deployment')
+
+
+def test_health_check_rejects_unknown_variants(checks):
+    health_check, _, _ = checks
+    engine = MetricQueryEngine(StubCloudWatch(rollout_metrics()))
+
+    assert not health_check.EndpointHealthCheck('endpoint', ['canary'], engine=engine,
+                                                clients=CLIENTS).run_health_check('post-deployment')
+
+
+def test_performance_check_reads_accuracy_and_p95_latency(checks):
+    _, performance_check, logged = checks
+    engine = MetricQueryEngine(StubCloudWatch({('ModelAccuracy', 'Average', None): [0.97, 0.96],
+                                               ('ModelLatency', 'p95', 'old'): [85000],
+                                               ('ModelLatency', 'p95', 'new'): [60000]}))
+
+    # The endpoint's p95 is the slowest variant's
+    checker = performance_check.ModelPerformanceCheck('endpoint', engine=engine, clients=CLIENTS)
+
+    assert checker.get_performance_metrics() == {'accuracy': pytest.approx(0.965), 'latency': 85}
+    assert checker.validate_performance()
+    assert logged[-1][0] == ('PerformanceValidation', 1)
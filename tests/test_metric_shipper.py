@@ -0,0 +1,102 @@
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+TRAINING_DIR = os.path.join(os.path.dirname(__file__), '..', 'training')
+sys.path.insert(0, TRAINING_DIR)
+
+from metric_shipper import MetricShipper
+
+
+class RecordingSend:
+    def __init__(self, block=None, fail=False):
+        self.batches = []
+        self.block = block
+        self.fail = fail
+
+    def __call__(self, batch):
+        if self.block is not None:
+            self.block.wait()
+        if self.fail:
+            raise RuntimeError("CloudWatch unavailable")
+        self.batches.append(list(batch))
+
+
+def datum(i):
+    return {'MetricName': 'Test', 'Value': float(i)}
+
+
+def test_full_batches_are_sent_without_waiting_for_the_interval():
+    send = RecordingSend()
+    shipper = MetricShipper(send, batch_size=10, flush_interval=60)
+
+    for i in range(25):
+        shipper.put(datum(i))
+    assert shipper.flush(timeout=5)
+
+    assert [len(batch) for batch in send.batches] == [10, 10, 5]
+    assert [d['Value'] for batch in send.batches for d in batch] == [float(i) for i in range(25)]
+    assert shipper.stats['sent'] == 25
+
+
+def test_partial_batch_is_sent_after_the_interval():
+    send = RecordingSend()
+    shipper = MetricShipper(send, batch_size=100, flush_interval=0.05)
+
+    shipper.put(datum(1))
+    deadline = time.monotonic() + 5
+    while not send.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert send.batches == [[datum(1)]]
+
+
+def test_put_never_blocks_and_counts_drops_when_full():
+    release = threading.Event()
+    send = RecordingSend(block=release)
+    shipper = MetricShipper(send, max_queue=5, batch_size=1, flush_interval=60)
+
+    start = time.monotonic()
+    results = [shipper.put(datum(i)) for i in range(20)]
+    elapsed = time.monotonic() - start
+    release.set()
+    assert shipper.flush(timeout=5)
+
+    assert elapsed < 0.5
+    assert not all(results)
+    assert shipper.stats['dropped'] == results.count(False)
+    assert shipper.stats['sent'] == results.count(True)
+
+
+def test_send_failures_are_counted_not_raised():
+    shipper = MetricShipper(RecordingSend(fail=True), batch_size=2, flush_interval=60)
+
+    for i in range(3):
+        assert shipper.put(datum(i))
+    assert shipper.close(timeout=5)
+
+    assert shipper.stats['failed'] == 3
+    assert shipper.stats['sent'] == 0
+    assert not shipper.put(datum(4))
+
+
+def test_log_metric_queues_for_the_shipper(monkeypatch):
+    spec = importlib.util.spec_from_file_location('training_utils', os.path.join(TRAINING_DIR, 'utils.py'))
+    utils = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(utils)
+    release = threading.Event()
+    send = RecordingSend(block=release)
+    monkeypatch.setattr(utils, 'METRICS_BACKEND', 'api')
+    monkeypatch.setattr(utils, '_shipper', MetricShipper(send, flush_interval=0.01))
+
+    # A slow CloudWatch doesn't hold up the caller
+    assert utils.log_metric('RolloutPercentage', 10, dimensions=[{'Name': 'Endpoint', 'Value': 'e'}])
+    release.set()
+    assert utils.get_metric_shipper().flush(timeout=5)
+
+    (sent,), = send.batches
+    assert sent['MetricName'] == 'RolloutPercentage'
+    assert sent['Dimensions'] == [{'Name': 'Endpoint', 'Value': 'e'}]
+    assert 'Timestamp' in sent
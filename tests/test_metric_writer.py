@@ -0,0 +1,209 @@
+import importlib.util
+import os
+import sys
+from decimal import Decimal
+from types import SimpleNamespace
+
+from botocore.exceptions import ClientError, EndpointConnectionError, ReadTimeoutError
+
+MONITORING_DIR = os.path.join(os.path.dirname(__file__), '..', 'lambda', 'model_monitoring')
+sys.path.insert(0, MONITORING_DIR)
+
+from metric_writer import MetricWriter
+
+
+def client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'operation')
+
+
+class StubDynamoDBClient:
+    """batch_write_item stand-in that can leave items unprocessed or raise."""
+
+    def __init__(self, unprocessed_rounds=0, errors=()):
+        self.calls = []
+        self.written = []
+        self.unprocessed_rounds = unprocessed_rounds
+        self.errors = list(errors)
+
+    def batch_write_item(self, RequestItems):
+        (table_name, requests), = RequestItems.items()
+        self.calls.append(len(requests))
+        if self.errors:
+            raise self.errors.pop(0)
+        if self.unprocessed_rounds:
+            self.unprocessed_rounds -= 1
+            # Accept the first half, bounce the rest
+            keep = len(requests) // 2
+            self.written.extend(requests[:keep])
+            return {'UnprocessedItems': {table_name: requests[keep:]}}
+        self.written.extend(requests)
+        return {'UnprocessedItems': {}}
+
+
+class StubCloudWatch:
+    def __init__(self, errors=()):
+        self.calls = []
+        self.errors = list(errors)
+
+    def put_metric_data(self, Namespace, MetricData):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.calls.append(MetricData)
+
+
+def make_writer(dynamodb=None, cloudwatch=None, **kwargs):
+    dynamodb = dynamodb or StubDynamoDBClient()
+    cloudwatch = cloudwatch or StubCloudWatch()
+    table = SimpleNamespace(name='model-metrics', meta=SimpleNamespace(client=dynamodb))
+    sleeps = []
+    writer = MetricWriter(table, cloudwatch, sleep=sleeps.append, **kwargs)
+    return writer, dynamodb, cloudwatch, sleeps
+
+
+def test_records_go_out_25_per_batch_as_typed_items():
+    writer, dynamodb, _, _ = make_writer()
+    for i in range(60):
+        writer.add_record('v1', {'accuracy': 0.5, 'drift': float('nan'), 'count': 3}, timestamp=1000 + i)
+
+    assert writer.flush()
+    assert dynamodb.calls == [25, 25, 10]
+    item = dynamodb.written[0]['PutRequest']['Item']
+    assert item['ModelVersion'] == {'S': 'v1'}
+    assert item['Metrics']['M']['accuracy'] == {'N': '0.5'}
+    assert item['Metrics']['M']['drift'] == {'NULL': True}
+
+
+def test_duplicate_keys_keep_latest_record():
+    writer, dynamodb, _, _ = make_writer()
+    writer.add_record('v1', {'accuracy': 0.1}, timestamp=1000)
+    writer.add_record('v1', {'accuracy': 0.9}, timestamp=1000)
+
+    writer.flush()
+
+    assert dynamodb.calls == [1]
+    assert dynamodb.written[0]['PutRequest']['Item']['Metrics']['M']['accuracy'] == {'N': '0.9'}
+
+
+def test_unprocessed_items_are_retried_with_backoff():
+    writer, dynamodb, _, sleeps = make_writer(StubDynamoDBClient(unprocessed_rounds=2))
+    for i in range(20):
+        writer.add_record('v1', {'accuracy': 1.0}, timestamp=i)
+
+    assert writer.flush()
+    assert dynamodb.calls == [20, 10, 5]
+    assert len(dynamodb.written) == 20
+    assert len(sleeps) == 2 and sleeps[0] <= 0.05 and sleeps[1] <= 0.1
+
+
+def test_throttling_is_retried_and_other_errors_are_not():
+    throttled = StubDynamoDBClient(errors=[client_error('ProvisionedThroughputExceededException')])
+    writer, dynamodb, _, _ = make_writer(throttled)
+    writer.add_record('v1', {'accuracy': 1.0}, timestamp=1)
+    assert writer.flush()
+    assert dynamodb.calls == [1, 1]
+
+    writer, _, cloudwatch, sleeps = make_writer(cloudwatch=StubCloudWatch(errors=[client_error('InvalidParameterValue')]))
+    writer.add_metric('ModelAccuracy', 0.9, timestamp=60)
+    assert not writer.flush()
+    assert sleeps == [] and writer.stats['failed_datums'] == 1
+
+
+def test_gives_up_after_max_attempts():
+    writer, dynamodb, _, sleeps = make_writer(StubDynamoDBClient(unprocessed_rounds=100), max_attempts=3)
+    for i in range(8):
+        writer.add_record('v1', {'accuracy': 1.0}, timestamp=i)
+
+    assert not writer.flush()
+    assert dynamodb.calls == [8, 4, 2]
+    # The record still unprocessed stays buffered for the next flush
+    assert writer.stats['requeued_items'] == 1 and writer.pending() == 1
+    dynamodb.unprocessed_rounds = 0
+    assert writer.flush()
+    assert len(dynamodb.written) == 8 and writer.pending() == 0
+
+
+def test_connection_errors_are_retried_and_keep_the_buffer():
+    timeout = ReadTimeoutError(endpoint_url='https://dynamodb.eu-west-2.amazonaws.com')
+    writer, dynamodb, _, _ = make_writer(StubDynamoDBClient(errors=[timeout]))
+    writer.add_record('v1', {'accuracy': 1.0}, timestamp=1)
+    assert writer.flush()
+    assert dynamodb.calls == [1, 1]
+
+    unreachable = EndpointConnectionError(endpoint_url='https://monitoring.eu-west-2.amazonaws.com')
+    writer, _, cloudwatch, _ = make_writer(cloudwatch=StubCloudWatch(errors=[unreachable] * 3), max_attempts=3)
+    for value in (0.5, 0.5, 0.9):
+        writer.add_metric('ModelAccuracy', value, timestamp=60)
+    assert not writer.flush()
+    assert writer.pending() == 1 and writer.stats['failed_datums'] == 0
+
+    writer.add_metric('ModelAccuracy', 0.9, timestamp=60)
+    assert writer.flush()
+    (datums,) = cloudwatch.calls
+    assert datums[0]['Values'] == [0.5, 0.9] and datums[0]['Counts'] == [2.0, 2.0]
+
+
+def test_points_in_a_minute_aggregate_into_values_and_counts():
+    writer, _, cloudwatch, _ = make_writer()
+    dimensions = {'ModelVersion': 'v1', 'Environment': 'production'}
+    for i in range(500):
+        writer.add_metric('PredictionLatency', float(i % 200), 'Milliseconds', dimensions, timestamp=120 + i % 60)
+    writer.add_metric('PredictionLatency', 5.0, 'Milliseconds', dimensions, timestamp=180)
+
+    writer.flush()
+
+    (datums,) = cloudwatch.calls
+    first_minute = [d for d in datums if d['Timestamp'].timestamp() == 120]
+    assert [len(d['Values']) for d in first_minute] == [150, 50]
+    assert sum(sum(d['Counts']) for d in first_minute) == 500
+    assert first_minute[0]['Dimensions'] == [{'Name': 'Environment', 'Value': 'production'},
+                                             {'Name': 'ModelVersion', 'Value': 'v1'}]
+    assert len(datums) == 3
+
+
+def test_statistic_sets_collapse_each_minute_to_one_datum():
+    writer, _, cloudwatch, _ = make_writer(statistic_sets=True)
+    for value in (1.0, 2.0, 3.0, 10.0):
+        writer.add_metric('DataDrift', value, timestamp=60)
+
+    writer.flush()
+
+    (datums,) = cloudwatch.calls
+    assert datums[0]['StatisticValues'] == {'SampleCount': 4.0, 'Sum': 16.0, 'Minimum': 1.0, 'Maximum': 10.0}
+
+
+def test_flush_if_due_waits_for_size_or_age():
+    now = [0.0]
+    writer, dynamodb, _, _ = make_writer(max_records=3, max_age_seconds=10)
+    writer.clock = lambda: now[0]
+
+    writer.add_record('v1', {'accuracy': 1.0}, timestamp=1)
+    writer.flush_if_due()
+    assert dynamodb.calls == []
+
+    now[0] = 11
+    writer.flush_if_due()
+    assert dynamodb.calls == [1]
+
+    for i in range(3):
+        writer.add_record('v1', {'accuracy': 1.0}, timestamp=10 + i)
+    writer.flush_if_due()
+    assert dynamodb.calls == [1, 3]
+
+
+def test_store_metrics_goes_through_writer(monkeypatch, tmp_path):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-west-2')
+    monkeypatch.setenv('BASELINE_STORE', 'file')
+    monkeypatch.setenv('BASELINE_DIR', str(tmp_path))
+    spec = importlib.util.spec_from_file_location('model_monitoring_app', os.path.join(MONITORING_DIR, 'app.py'))
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    writer, dynamodb, cloudwatch, _ = make_writer()
+    monkeypatch.setattr(app, 'metric_writer', writer)
+
+    assert app.store_metrics({'accuracy': 0.75, 'latency': 12.5, 'drift': 0.01, 'roc_auc': None}, 'v2')
+
+    assert dynamodb.calls == [1]
+    names = {d['MetricName']: d for d in cloudwatch.calls[0]}
+    assert set(names) == {'ModelAccuracy', 'PredictionLatency', 'DataDrift'}
+    assert names['PredictionLatency']['Unit'] == 'Milliseconds'
+    assert dynamodb.written[0]['PutRequest']['Item']['Metrics']['M']['accuracy'] == {'N': str(Decimal('0.75'))}
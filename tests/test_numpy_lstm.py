@@ -0,0 +1,89 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'Lambda-Greengrass-LSTM'))
+
+import numpy_lstm
+from numpy_lstm import DenseLayer, LSTMLayer, NumpyLSTMModel
+
+
+def random_layers(seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        LSTMLayer(rng.normal(size=(1, 32)), rng.normal(scale=0.3, size=(8, 32)), rng.normal(size=32),
+                  return_sequences=True),
+        LSTMLayer(rng.normal(size=(8, 16)), rng.normal(scale=0.3, size=(4, 16)), rng.normal(size=16)),
+        DenseLayer(rng.normal(size=(4, 1)), rng.normal(size=1), activation='sigmoid'),
+    ]
+
+
+def test_batched_predict_matches_single_step_evaluation():
+    layers = random_layers()
+    model = NumpyLSTMModel(layers)
+    batch = np.random.default_rng(1).normal(size=(5, 12, 1)).astype(np.float32)
+
+    expected = []
+    for window in batch:
+        x = window[np.newaxis]
+        for layer in layers:
+            if isinstance(layer, LSTMLayer):
+                h, c = layer.initial_state(1)
+                steps = []
+                for t in range(x.shape[1]):
+                    h, c = layer.step(x[:, t, :], h, c)
+                    steps.append(h)
+                x = np.stack(steps, axis=1) if layer.return_sequences else h
+            else:
+                x = layer(x)
+        expected.append(x[0])
+
+    np.testing.assert_allclose(model.predict(batch), np.array(expected), rtol=1e-5)
+
+
+def test_bundle_round_trip(tmp_path):
+    layers = random_layers()
+    path = str(tmp_path / 'model.npz')
+    numpy_lstm.save_bundle(layers, path)
+
+    loaded = numpy_lstm.load_model(path)
+    batch = np.random.default_rng(2).normal(size=(3, 7, 1))
+    np.testing.assert_array_equal(loaded.predict(batch), NumpyLSTMModel(layers).predict(batch))
+    assert [type(layer) for layer in loaded.layers] == [LSTMLayer, LSTMLayer, DenseLayer]
+
+
+def test_rejects_unsupported_layers():
+    with pytest.raises(ValueError):
+        numpy_lstm.build_layer('Conv1D', {'name': 'conv'}, [])
+
+
+@pytest.fixture(scope='module')
+def keras_model_file(tmp_path_factory):
+    keras = pytest.importorskip('keras')
+    model = keras.Sequential([
+        keras.Input((None, 1)),
+        keras.layers.LSTM(16, return_sequences=True),
+        keras.layers.Dropout(0.2),
+        keras.layers.LSTM(8),
+        keras.layers.Dense(4, activation='relu'),
+        keras.layers.Dense(1, activation='sigmoid'),
+    ])
+    path = str(tmp_path_factory.mktemp('keras') / 'lstm_model.h5')
+    model.save(path)
+    return model, path
+
+
+def test_h5_model_matches_keras_output(keras_model_file):
+    keras_model, path = keras_model_file
+    batch = np.random.default_rng(3).normal(size=(16, 30, 1)).astype(np.float32)
+
+    model = numpy_lstm.load_model(path)
+
+    np.testing.assert_allclose(model.predict(batch), keras_model.predict(batch, verbose=0), atol=1e-5)
+    assert os.path.exists(path[:-3] + '.npz')
+
+    # Second load comes from the cached bundle and must give the same result
+    cached = numpy_lstm.load_model(path)
+    np.testing.assert_array_equal(cached.predict(batch), model.predict(batch))
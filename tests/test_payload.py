@@ -0,0 +1,71 @@
+import base64
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'Lambda-Greengrass-LSTM'))
+
+from payload import decode_metrics, encode_metrics, parse_request, single_feature_window
+
+
+def test_binary_round_trip_is_a_zero_copy_view():
+    window = np.random.default_rng(0).normal(size=120).astype(np.float32)
+    body = encode_metrics('patient-7', window, index=4242)
+
+    data = decode_metrics(body)
+
+    assert data['patient_id'] == 'patient-7'
+    assert data['index'] == 4242
+    assert data['metrics'].shape == (120, 1)
+    np.testing.assert_array_equal(data['metrics'][:, 0], window)
+    assert np.shares_memory(data['metrics'], np.frombuffer(body, dtype=np.uint8))
+    assert data['metrics'].ctypes.data % 4 == 0
+
+
+@pytest.mark.parametrize('patient_id', ['p', 'pa', 'pat', 'pati', 'patie'])
+def test_patient_id_padding_keeps_floats_aligned(patient_id):
+    body = encode_metrics(patient_id, [1.0, 2.0])
+    data = decode_metrics(body)
+    assert data['patient_id'] == patient_id
+    assert 'index' not in data
+    assert data['metrics'].flags['ALIGNED']
+
+
+def test_rejects_size_mismatch_and_foreign_bodies():
+    body = encode_metrics('p1', [1.0, 2.0, 3.0])
+    with pytest.raises(ValueError):
+        decode_metrics(body[:-4])
+    with pytest.raises(ValueError):
+        decode_metrics(b'NOPE' + body[4:])
+
+
+def test_parse_request_negotiates_format():
+    window = [70.0, 71.5, 72.0]
+    binary = encode_metrics('p1', window)
+
+    from_header = parse_request({'headers': {'Content-Type': 'application/octet-stream'}, 'body': binary})
+    from_base64 = parse_request({'body': base64.b64encode(binary).decode(), 'isBase64Encoded': True})
+    from_json = parse_request({'body': json.dumps({'patient_id': 'p1', 'metrics': window})})
+
+    for data in (from_header, from_base64):
+        assert data['patient_id'] == 'p1'
+        np.testing.assert_array_equal(data['metrics'].reshape(-1), window)
+    assert from_json == {'patient_id': 'p1', 'metrics': window}
+
+
+def test_binary_content_type_with_text_body_is_an_error():
+    with pytest.raises(ValueError):
+        parse_request({'contentType': 'application/octet-stream', 'body': 'not bytes'})
+
+
+def test_multi_feature_windows_are_rejected_not_flattened():
+    single = decode_metrics(encode_metrics('p1', [[70.0], [71.0], [72.0]]))['metrics']
+    multi = decode_metrics(encode_metrics('p1', [[70.0, 98.0], [71.0, 97.5]]))['metrics']
+
+    np.testing.assert_array_equal(single_feature_window(single), [70.0, 71.0, 72.0])
+    np.testing.assert_array_equal(single_feature_window([70.0, 71.0]), [70.0, 71.0])
+    with pytest.raises(ValueError, match='one feature per timestep'):
+        single_feature_window(multi)
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'Lambda-Greengrass-LSTM'))
+
+from prefilter import InferenceGate, PatientStats
+
+
+def run(gate, patient_id, readings):
+    decisions = []
+    for i, reading in enumerate(readings):
+        infer, _ = gate.check(patient_id, [reading])
+        if infer:
+            gate.record(patient_id, [[float(i)]])
+        decisions.append(infer)
+    return decisions
+
+
+def test_welford_matches_numpy():
+    values = np.random.default_rng(0).normal(72, 5, size=500)
+    stats = PatientStats()
+    for value in values:
+        stats.update(float(value))
+    assert abs(stats.mean - values.mean()) < 1e-9
+    assert abs(stats.std - values.std(ddof=1)) < 1e-9
+
+
+def test_stable_readings_are_skipped_after_warmup():
+    gate = InferenceGate(threshold_sigma=4, warmup_samples=10, refresh_seconds=1e9, clock=lambda: 0.0)
+    readings = 72 + np.random.default_rng(1).normal(0, 1, size=200)
+
+    decisions = run(gate, 'p1', readings)
+
+    assert all(decisions[:10])
+    assert gate.stats['inferred_new'] == 1 and gate.stats['inferred_warmup'] == 9
+    assert gate.skip_ratio() > 0.9
+
+
+def test_deviation_forces_inference_and_reuses_last_prediction_otherwise():
+    gate = InferenceGate(threshold_sigma=3, warmup_samples=5, refresh_seconds=1e9, clock=lambda: 0.0)
+    run(gate, 'p1', [72, 73, 71, 72, 73, 72, 71])
+
+    infer, last = gate.check('p1', [72.5])
+    assert infer is False and last == [[4.0]]
+
+    infer, last = gate.check('p1', [140.0])
+    assert infer is True and last is None
+    assert gate.stats['inferred_deviation'] == 1
+
+
+def test_refresh_interval_bounds_prediction_age():
+    now = [0.0]
+    gate = InferenceGate(threshold_sigma=10, warmup_samples=1, refresh_seconds=30, clock=lambda: now[0])
+    run(gate, 'p1', [72, 72, 72])
+    assert gate.check('p1', [72])[0] is False
+
+    now[0] = 31.0
+    assert gate.check('p1', [72])[0] is True
+    assert gate.stats['inferred_refresh'] == 1
+
+
+def test_patients_are_tracked_independently_and_bounded():
+    gate = InferenceGate(warmup_samples=1, refresh_seconds=1e9, max_patients=2, clock=lambda: 0.0)
+    run(gate, 'a', [72, 72])
+    run(gate, 'b', [98, 98])
+    run(gate, 'c', [36, 36])
+
+    # 'a' was dropped as least recently seen, so it starts over
+    assert gate.check('a', [72])[0] is True
+    assert gate.stats['inferred_new'] == 4
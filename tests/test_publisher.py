@@ -0,0 +1,107 @@
+import base64
+import importlib.util
+import json
+import os
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'Lambda-Greengrass-LSTM'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'Lambda-WebSocket'))
+
+from publisher import CoalescingPublisher, encode_record, encode_results
+from result_codec import decode_results, is_packed
+
+
+def test_round_trip_through_cloud_decoder():
+    payload = encode_results([encode_record('patient-1', [[0.25]]),
+                              encode_record('患者-2', [[0.5, 0.75]])])
+
+    assert is_packed(payload)
+    assert decode_results(payload) == [
+        {'patient_id': 'patient-1', 'prediction': [[0.25]]},
+        {'patient_id': '患者-2', 'prediction': [[0.5, 0.75]]},
+    ]
+
+
+def test_decoder_rejects_truncated_messages():
+    payload = encode_results([encode_record('p1', [[0.25]])])
+    with pytest.raises(Exception):
+        decode_results(payload[:-2])
+
+
+def test_packed_batch_is_smaller_than_json():
+    results = [(f'patient-{i}', [[0.123456789 * i]]) for i in range(100)]
+    json_bytes = sum(len(json.dumps({'patient_id': p, 'prediction': v})) for p, v in results)
+    packed_bytes = len(encode_results([encode_record(p, v) for p, v in results]))
+    assert packed_bytes < json_bytes / 2
+
+
+def test_flushes_before_exceeding_max_bytes():
+    sent = []
+    record_size = len(encode_record('p00', [[0.0]]))
+    publisher = CoalescingPublisher(lambda topic, payload: sent.append((topic, payload)),
+                                    max_bytes=8 + 3 * record_size)
+    for i in range(7):
+        publisher.add('results', f'p{i:02d}', [[float(i)]])
+    publisher.flush()
+
+    assert [len(decode_results(payload)) for _, payload in sent] == [3, 3, 1]
+    assert all(len(payload) <= publisher.max_bytes for _, payload in sent)
+    assert publisher.stats['messages'] == 3 and publisher.stats['records'] == 7
+
+
+def test_buffers_are_kept_per_topic():
+    sent = []
+    publisher = CoalescingPublisher(lambda topic, payload: sent.append((topic, payload)), max_records=2)
+    publisher.add('a', 'p1', [[1.0]])
+    publisher.add('b', 'p2', [[2.0]])
+    publisher.add('a', 'p3', [[3.0]])
+
+    assert [(topic, [r['patient_id'] for r in decode_results(p)]) for topic, p in sent] == [('a', ['p1', 'p3'])]
+    publisher.flush()
+    assert sent[-1][0] == 'b'
+
+
+def test_background_thread_flushes_after_max_delay():
+    sent = []
+    publisher = CoalescingPublisher(lambda topic, payload: sent.append(payload), max_delay_ms=20)
+    publisher.start()
+    try:
+        publisher.add('results', 'p1', [[0.5]])
+        deadline = time.time() + 2
+        while not sent and time.time() < deadline:
+            time.sleep(0.005)
+    finally:
+        publisher.stop(timeout=1)
+
+    assert decode_results(sent[0]) == [{'patient_id': 'p1', 'prediction': [[0.5]]}]
+
+
+def test_publish_failures_are_counted():
+    def broken(topic, payload):
+        raise ConnectionError("uplink down")
+
+    publisher = CoalescingPublisher(broken)
+    publisher.add('results', 'p1', [[0.5]])
+    publisher.flush()
+    assert publisher.stats['errors'] == 1
+
+
+def test_websocket_handler_fans_out_packed_results(monkeypatch):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-west-2')
+    spec = importlib.util.spec_from_file_location(
+        'websocket_app', os.path.join(ROOT, 'lambda', 'Lambda-WebSocket', 'app.py'))
+    websocket_app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(websocket_app)
+
+    alerts = []
+    monkeypatch.setattr(websocket_app, 'send_alert', lambda connection_id, message: alerts.append(message))
+    payload = encode_results([encode_record('p1', [[0.25]]), encode_record('p2', [[0.5]])])
+
+    websocket_app.handler({'body': base64.b64encode(payload).decode(), 'isBase64Encoded': True}, None)
+    websocket_app.handler({'body': json.dumps({'patient_id': 'p3', 'prediction': [[1.0]]})}, None)
+
+    assert [a['patient_id'] for a in alerts] == ['p1', 'p2', 'p3']
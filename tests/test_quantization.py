@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'Lambda-Greengrass-LSTM'))
+
+import numpy_lstm
+import quantization
+from numpy_lstm import DenseLayer, LSTMLayer, NumpyLSTMModel
+
+
+def model_layers(seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        LSTMLayer(rng.normal(scale=0.5, size=(1, 128)), rng.normal(scale=0.1, size=(32, 128)),
+                  rng.normal(scale=0.1, size=128), return_sequences=True),
+        LSTMLayer(rng.normal(scale=0.2, size=(32, 64)), rng.normal(scale=0.1, size=(16, 64)),
+                  rng.normal(scale=0.1, size=64)),
+        DenseLayer(rng.normal(scale=0.3, size=(16, 1)), np.zeros(1), activation='sigmoid'),
+    ]
+
+
+def patient_windows(count=64, length=40, seed=1):
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 4 * np.pi, length)
+    return (np.sin(t)[np.newaxis] + rng.normal(scale=0.3, size=(count, length))).astype(np.float32)
+
+
+def test_int8_tensor_round_trip_error_is_bounded():
+    tensor = np.random.default_rng(0).normal(size=(64, 64)).astype(np.float32)
+    quantized = quantization.quantize_tensor(tensor, 'int8')
+
+    assert quantized['values'].dtype == np.int8
+    restored = quantized['values'].astype(np.float32) * quantized['scale']
+    assert np.max(np.abs(restored - tensor)) <= quantized['scale'] / 2 + 1e-6
+
+
+def test_clipping_saturates_outliers():
+    tensor = np.concatenate([np.linspace(-1, 1, 999), [50.0]]).astype(np.float32)
+    quantized = quantization.quantize_tensor(tensor, 'int8', clip_percentile=99.0)
+    assert quantized['values'][-1] == 127
+    assert quantized['scale'] < 50.0 / 127
+
+
+@pytest.mark.parametrize('mode, max_ratio', [('int8', 0.4), ('float16', 0.6)])
+def test_calibrated_bundle_is_smaller_and_close(tmp_path, mode, max_ratio):
+    layers = model_layers()
+    windows = patient_windows()
+
+    calibrated = quantization.calibrate(layers, windows, mode)
+    report = calibrated['report']
+    assert report['size_ratio'] < max_ratio
+    assert report['max_abs_error'] < 0.02
+    assert report['decision_agreement'] >= 0.95
+
+    path = str(tmp_path / f'model.{mode}.npz')
+    quantization.save_quantized_bundle(calibrated, path)
+    loaded = numpy_lstm.load_model(path)
+    np.testing.assert_allclose(loaded.predict(windows), NumpyLSTMModel(layers).predict(windows), atol=0.02)
+
+
+def test_calibration_picks_lowest_error_percentile():
+    calibrated = quantization.calibrate(model_layers(), patient_windows(), 'int8',
+                                        clip_percentiles=(100.0, 50.0))
+    assert calibrated['report']['clip_percentile'] == 100.0
+
+
+def test_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        quantization.calibrate(model_layers(), patient_windows(), 'int4')
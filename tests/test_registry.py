@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'Lambda-Greengrass-LSTM'))
+
+from registry import ModelRegistry
+
+
+class ConstantModel:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def predict(self, input_data, verbose=0):
+        self.calls += 1
+        return np.full((input_data.shape[0], 1), self.value)
+
+
+def load_constant(path):
+    with open(path) as f:
+        content = f.read()
+    if content == 'corrupt':
+        raise ValueError("truncated model file")
+    return ConstantModel(float(content))
+
+
+def deploy(directory, name, content, age_seconds=60):
+    path = os.path.join(directory, name)
+    with open(path, 'w') as f:
+        f.write(content)
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_start_loads_newest_version_and_warms_it_up(tmp_path):
+    deploy(tmp_path, 'v1.h5', '1', age_seconds=120)
+    deploy(tmp_path, 'v2.h5', '2', age_seconds=60)
+    deploy(tmp_path, 'notes.txt', '3', age_seconds=10)
+    registry = ModelRegistry(str(tmp_path), load_constant, poll_seconds=60)
+
+    registry.start()
+    try:
+        assert registry.model.value == 2.0
+        assert registry.model.calls == 1
+        stats = registry.history[registry.active.version]
+        assert stats['load_ms'] >= 0 and stats['first_inference_ms'] >= 0
+    finally:
+        registry.stop()
+
+
+def test_refresh_swaps_in_new_version(tmp_path):
+    deploy(tmp_path, 'v1.h5', '1', age_seconds=120)
+    swapped = []
+    registry = ModelRegistry(str(tmp_path), load_constant, on_swap=lambda v: swapped.append(v.version))
+    registry.refresh()
+
+    assert registry.refresh() is False
+    deploy(tmp_path, 'v2.h5', '2', age_seconds=30)
+    assert registry.refresh() is True
+    assert registry.model.value == 2.0
+    assert [v.split('@')[0] for v in swapped] == ['v1.h5', 'v2.h5']
+
+
+def test_files_still_being_written_are_ignored(tmp_path):
+    deploy(tmp_path, 'v1.h5', '1', age_seconds=120)
+    registry = ModelRegistry(str(tmp_path), load_constant, settle_seconds=5)
+    registry.refresh()
+
+    deploy(tmp_path, 'v2.h5', '2', age_seconds=0)
+    assert registry.refresh() is False
+    assert registry.model.value == 1.0
+
+
+def test_failed_load_keeps_serving_current_version(tmp_path):
+    deploy(tmp_path, 'v1.h5', '1', age_seconds=120)
+    registry = ModelRegistry(str(tmp_path), load_constant)
+    registry.refresh()
+
+    deploy(tmp_path, 'v2.h5', 'corrupt', age_seconds=30)
+    assert registry.refresh() is False
+    assert registry.refresh() is False
+    assert registry.model.value == 1.0
+    assert 'error' in next(v for k, v in registry.history.items() if k.startswith('v2.h5'))
+
+
+def test_start_without_models_fails(tmp_path):
+    with pytest.raises(RuntimeError):
+        ModelRegistry(str(tmp_path), load_constant).start()
+
+
+def test_readers_never_see_a_gap_during_swaps(tmp_path):
+    deploy(tmp_path, 'v0.h5', '0', age_seconds=1000)
+    registry = ModelRegistry(str(tmp_path), load_constant)
+    registry.refresh()
+
+    errors = []
+    stop = threading.Event()
+
+    def serve():
+        while not stop.is_set():
+            try:
+                registry.model.predict(np.zeros((1, 5, 1)))
+            except Exception as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=serve)
+    reader.start()
+    for i in range(1, 20):
+        deploy(tmp_path, f'v{i}.h5', str(i), age_seconds=1000 - i)
+        registry.refresh()
+    stop.set()
+    reader.join()
+
+    assert errors == []
+    assert registry.model.value == 19.0
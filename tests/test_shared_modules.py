@@ -0,0 +1,29 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from sync_shared_modules import ROOT, SHARED_MODULES, stale_copies
+
+
+def test_copies_match_their_shared_source():
+    assert stale_copies() == []
+
+
+def test_every_unit_importing_a_shared_module_gets_a_copy():
+    for name, units in SHARED_MODULES.items():
+        module = name[:-len('.py')]
+        pattern = re.compile(rf'^\s*(from {module} import|import {module}\b)', re.MULTILINE)
+        importers = set()
+        for directory in ['training'] + [os.path.join('lambda', d) for d in os.listdir(os.path.join(ROOT, 'lambda'))]:
+            path = os.path.join(ROOT, directory)
+            if not os.path.isdir(path):
+                continue
+            for filename in os.listdir(path):
+                if filename.endswith('.py') and filename != name:
+                    with open(os.path.join(path, filename)) as f:
+                        if pattern.search(f.read()):
+                            importers.add(directory)
+        assert importers
+        assert importers <= set(units), f"{name} is imported by {sorted(importers - set(units))} without a copy"
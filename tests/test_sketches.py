@@ -0,0 +1,120 @@
+import importlib.util
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+MONITORING_DIR = os.path.join(os.path.dirname(__file__), '..', 'lambda', 'model_monitoring')
+sys.path.insert(0, MONITORING_DIR)
+
+from baselines import BaselineHistogram
+from sketches import FixedBinHistogram, KLLSketch, bin_counts, decode_sketch, encode_sketch, merge_sketches
+
+
+def max_rank_error(sketch, values):
+    qs = np.linspace(0.01, 0.99, 99)
+    ranks = np.searchsorted(np.sort(values), sketch.quantiles(qs)) / values.size
+    return np.abs(ranks - qs).max()
+
+
+def test_kll_quantiles_within_rank_error_and_bounded_size():
+    values = np.random.default_rng(0).lognormal(3, 0.5, size=200000)
+    sketch = KLLSketch(seed=1)
+    for chunk in np.array_split(values, 200):
+        sketch.update(chunk)
+
+    assert sketch.n == values.size
+    assert sum(level.size for level in sketch.levels) < 1000
+    assert max_rank_error(sketch, values) < 0.02
+    assert sketch.quantiles([0.0, 1.0]).tolist() == [values.min(), values.max()]
+
+
+def test_kll_merge_matches_single_stream():
+    values = np.random.default_rng(2).normal(50, 10, size=100000)
+    parts = [KLLSketch(seed=i).update(chunk) for i, chunk in enumerate(np.array_split(values, 24))]
+
+    merged = merge_sketches(parts)
+
+    assert merged.n == values.size
+    assert max_rank_error(merged, values) < 0.02
+    # merge_sketches leaves its inputs untouched
+    assert parts[0].n == len(np.array_split(values, 24)[0])
+
+
+def test_kll_round_trip_is_compact():
+    sketch = KLLSketch(seed=0).update(np.random.default_rng(3).exponential(20, size=500000))
+
+    encoded = encode_sketch(sketch)
+    restored = decode_sketch(encoded)
+
+    assert len(encoded) < 5000
+    assert restored.n == sketch.n and restored.k == sketch.k
+    np.testing.assert_allclose(restored.quantiles([0.5, 0.99]), sketch.quantiles([0.5, 0.99]), rtol=1e-6)
+
+
+def test_histograms_merge_and_round_trip():
+    edges = np.linspace(0, 10, 11)
+    first = FixedBinHistogram(edges).update([0.5, 1.5, 1.7, 20])
+    second = decode_sketch(encode_sketch(FixedBinHistogram(edges).update([-3, 9.9])))
+
+    merged = merge_sketches([first, second])
+
+    assert merged.counts.tolist() == [2, 2, 0, 0, 0, 0, 0, 0, 0, 2]
+    with pytest.raises(ValueError):
+        merged.merge(FixedBinHistogram(np.linspace(0, 5, 11)))
+
+
+def test_histogram_ignores_nans_like_kll():
+    histogram = FixedBinHistogram([0, 1, 2]).update([np.nan, 0.5])
+
+    assert histogram.counts.tolist() == [1, 0]
+    assert len(histogram) == len(KLLSketch().update([np.nan, 0.5])) == 1
+
+
+def test_sketch_drift_matches_raw_drift():
+    rng = np.random.default_rng(4)
+    baseline = BaselineHistogram.from_data('v1', rng.normal(72, 5, size=50000))
+    current = rng.normal(78, 6, size=50000)
+
+    exact = baseline.kl_divergence(current)
+    from_histogram = baseline.kl_divergence_counts(bin_counts(FixedBinHistogram(baseline.edges).update(current),
+                                                              baseline.edges))
+    from_kll = baseline.kl_divergence_counts(bin_counts(KLLSketch(seed=0).update(current), baseline.edges))
+
+    assert from_histogram == pytest.approx(exact)
+    assert from_kll == pytest.approx(exact, rel=0.1)
+
+
+@pytest.fixture
+def monitoring_app(monkeypatch, tmp_path):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-west-2')
+    monkeypatch.setenv('BASELINE_STORE', 'file')
+    monkeypatch.setenv('BASELINE_DIR', str(tmp_path))
+    spec = importlib.util.spec_from_file_location('model_monitoring_app', os.path.join(MONITORING_DIR, 'app.py'))
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    monkeypatch.setattr(app, 'store_metrics', lambda metrics, model_version: True)
+    return app
+
+
+def test_handler_computes_drift_and_percentiles_from_sketches(monitoring_app):
+    rng = np.random.default_rng(5)
+    monitoring_app.handler({'action': 'register_baseline', 'model_version': 'v1',
+                            'baseline_data': rng.normal(72, 5, size=5000).tolist()}, None)
+    latencies = rng.gamma(4, 5, size=20000)
+    windows = [KLLSketch(seed=i).update(chunk) for i, chunk in enumerate(np.array_split(latencies, 4))]
+
+    event = {'predictions': [1, 0], 'actuals': [1, 0], 'model_version': 'v1', 'baseline_id': 'v1',
+             'current_sketch': encode_sketch(KLLSketch(seed=9).update(rng.normal(72, 5, size=20000))),
+             'latency_sketch': [encode_sketch(window) for window in windows]}
+    response = monitoring_app.handler(event, None)
+    metrics = json.loads(response['body'])['metrics']
+
+    assert response['statusCode'] == 200
+    assert metrics['drift'] < 0.05
+    expected = np.percentile(latencies, [50, 95, 99])
+    np.testing.assert_allclose([metrics['latency_p50'], metrics['latency_p95'], metrics['latency_p99']],
+                               expected, rtol=0.1)
+    assert metrics['latency'] == metrics['latency_p50']
@@ -0,0 +1,166 @@
+import os
+import sys
+from collections import deque
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'Lambda-Greengrass-LSTM'))
+
+from spool import ResultSpool, StoreAndForwardPublisher
+
+
+class StubPublisher:
+    """Records delivered messages; raises while the simulated uplink is down."""
+
+    def __init__(self):
+        self.online = True
+        self.delivered = []
+
+    def __call__(self, topic, payload):
+        if not self.online:
+            raise ConnectionError("uplink down")
+        self.delivered.append((topic, payload))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_forwarder(tmp_path, capacity=64 * 1024, rate=10.0, burst=1):
+    stub = StubPublisher()
+    clock = FakeClock()
+    forwarder = StoreAndForwardPublisher(stub, ResultSpool(str(tmp_path / 'results.spool'), capacity),
+                                         replay_rate=rate, replay_burst=burst,
+                                         clock=clock, sleep=clock.sleep)
+    return stub, clock, forwarder
+
+
+def test_spool_is_fifo_and_keeps_payload_types(tmp_path):
+    spool = ResultSpool(str(tmp_path / 's'), 4096)
+    spool.append('a', '{"patient_id": "p1"}')
+    spool.append('b', b'\x00\x01packed')
+
+    assert len(spool) == 2
+    assert spool.peek() == ('a', '{"patient_id": "p1"}')
+    assert spool.pop() == ('a', '{"patient_id": "p1"}')
+    assert spool.pop() == ('b', b'\x00\x01packed')
+    assert spool.pop() is None
+
+
+def test_spool_survives_restart(tmp_path):
+    path = str(tmp_path / 's')
+    spool = ResultSpool(path, 4096)
+    for i in range(5):
+        spool.append('t', f'message-{i}')
+    spool.pop()
+    spool.close()
+
+    reopened = ResultSpool(path, 4096)
+    assert [reopened.pop()[1] for _ in range(len(reopened))] == [f'message-{i}' for i in range(1, 5)]
+
+
+def test_spool_stays_within_budget_and_drops_oldest(tmp_path):
+    path = str(tmp_path / 's')
+    spool = ResultSpool(path, 1024)
+    for i in range(200):
+        spool.append('healthcare/prediction/result', f'{{"seq": {i:04d}}}')
+
+    assert os.path.getsize(path) == 64 + 1024
+    assert spool.dropped > 0
+    assert len(spool) + spool.dropped == 200
+    remaining = [spool.pop()[1] for _ in range(len(spool))]
+    assert remaining == [f'{{"seq": {i:04d}}}' for i in range(spool.dropped, 200)]
+
+
+def test_spool_wraps_with_mixed_sizes(tmp_path):
+    spool = ResultSpool(str(tmp_path / 's'), 512)
+    expected = deque()
+    for i in range(300):
+        payload = 'x' * (i % 37) + str(i)
+        dropped = spool.dropped
+        spool.append('t', payload)
+        expected.append(payload)
+        for _ in range(spool.dropped - dropped):
+            expected.popleft()
+        if i % 3 == 0:
+            assert spool.pop()[1] == expected.popleft()
+        assert spool.used_bytes <= spool.capacity
+
+    assert [spool.pop()[1] for _ in range(len(spool))] == list(expected)
+
+
+def test_corrupt_record_discards_backlog(tmp_path):
+    path = str(tmp_path / 's')
+    spool = ResultSpool(path, 4096)
+    spool.append('t', 'first')
+    spool.append('t', 'second')
+    spool.close()
+    with open(path, 'r+b') as f:
+        f.seek(64 + 11 + 1)
+        f.write(b'X')
+
+    reopened = ResultSpool(path, 4096)
+    assert reopened.pop() is None
+    assert len(reopened) == 0 and reopened.dropped == 2
+
+
+def test_oversized_message_is_rejected(tmp_path):
+    spool = ResultSpool(str(tmp_path / 's'), 256)
+    with pytest.raises(ValueError):
+        spool.append('t', 'x' * 500)
+
+
+def test_outage_spools_and_replays_in_order(tmp_path):
+    stub, _, forwarder = make_forwarder(tmp_path)
+
+    assert forwarder.publish('r', 'm0') is True
+    stub.online = False
+    for i in range(1, 4):
+        forwarder.publish('r', f'm{i}')
+    stub.online = True
+    # Still behind the backlog, so this one queues instead of jumping ahead
+    forwarder.publish('r', 'm4')
+
+    assert forwarder.replay() == 4
+    assert [payload for _, payload in stub.delivered] == ['m0', 'm1', 'm2', 'm3', 'm4']
+    assert forwarder.stats['spooled'] == 4 and forwarder.stats['replayed'] == 4
+
+
+def test_replay_stops_at_first_failure(tmp_path):
+    stub, _, forwarder = make_forwarder(tmp_path)
+    stub.online = False
+    for i in range(3):
+        forwarder.publish('r', f'm{i}')
+
+    assert forwarder.replay() == 0
+    assert len(forwarder.spool) == 3
+
+
+def test_replay_is_rate_limited(tmp_path):
+    stub, clock, forwarder = make_forwarder(tmp_path, rate=10.0, burst=2)
+    stub.online = False
+    for i in range(12):
+        forwarder.publish('r', f'm{i}')
+    stub.online = True
+
+    assert forwarder.replay() == 12
+    # Two burst tokens, then one message every 100 ms
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_replay_can_be_capped_per_call(tmp_path):
+    stub, _, forwarder = make_forwarder(tmp_path, rate=1000.0, burst=100)
+    stub.online = False
+    for i in range(10):
+        forwarder.publish('r', f'm{i}')
+    stub.online = True
+
+    assert forwarder.replay(max_messages=4) == 4
+    assert len(forwarder.spool) == 6
@@ -0,0 +1,127 @@
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'Lambda-Greengrass-LSTM'))
+
+from numpy_lstm import DenseLayer, LSTMLayer
+from streaming import PatientStateCache, StreamingLSTM
+
+
+def random_layers(seed=0, units=(8, 4)):
+    rng = np.random.default_rng(seed)
+    layers = []
+    input_dim = 1
+    for i, u in enumerate(units):
+        layers.append(LSTMLayer(rng.normal(scale=0.5, size=(input_dim, 4 * u)),
+                                rng.normal(scale=0.5, size=(u, 4 * u)),
+                                rng.normal(scale=0.1, size=4 * u),
+                                return_sequences=i < len(units) - 1))
+        input_dim = u
+    layers.append(DenseLayer(rng.normal(size=(input_dim, 1)), rng.normal(size=1), activation='sigmoid'))
+    return layers
+
+
+def reference_forward(layers, sequence):
+    """Scalar, loop-by-loop evaluation of the Keras LSTM equations."""
+    sig = lambda v: 1.0 / (1.0 + math.exp(-v))
+    xs = [[float(v)] for v in sequence]
+    for layer in layers:
+        if isinstance(layer, DenseLayer):
+            x = xs[-1]
+            out = [sum(x[k] * layer.kernel[k, j] for k in range(len(x))) + layer.bias[j]
+                   for j in range(layer.kernel.shape[1])]
+            return [sig(v) for v in out]
+        u = layer.units
+        h, c = [0.0] * u, [0.0] * u
+        outputs = []
+        for x in xs:
+            z = [sum(x[k] * layer.kernel[k, j] for k in range(len(x))) +
+                 sum(h[k] * layer.recurrent_kernel[k, j] for k in range(u)) + layer.bias[j]
+                 for j in range(4 * u)]
+            c = [sig(z[u + j]) * c[j] + sig(z[j]) * math.tanh(z[2 * u + j]) for j in range(u)]
+            h = [sig(z[3 * u + j]) * math.tanh(c[j]) for j in range(u)]
+            outputs.append(h)
+        xs = outputs
+
+
+def test_first_window_matches_reference():
+    layers = random_layers()
+    window = np.sin(np.linspace(0, 3, 20))
+    streamer = StreamingLSTM(layers, PatientStateCache())
+
+    prediction = streamer.update('p1', window)
+
+    np.testing.assert_allclose(prediction, [reference_forward(layers, window)], rtol=1e-5)
+
+
+def test_incremental_updates_match_full_history():
+    layers = random_layers(seed=1)
+    history = np.cos(np.linspace(0, 6, 40))
+    streamer = StreamingLSTM(layers, PatientStateCache())
+
+    streamer.update('p1', history[:20])
+    for end in range(21, 41):
+        prediction = streamer.update('p1', history[end - 20:end])
+
+    np.testing.assert_allclose(prediction, [reference_forward(layers, history)], rtol=1e-5)
+    assert streamer.stats == {'full_windows': 1, 'incremental_steps': 20, 'duplicates': 0}
+
+
+def test_index_skips_duplicates_and_consumes_multiple_samples():
+    layers = random_layers(seed=2)
+    history = np.linspace(-1, 1, 30)
+    streamer = StreamingLSTM(layers, PatientStateCache())
+
+    streamer.update('p1', history[:10], index=9)
+    first = streamer.update('p1', history[:10], index=9)
+    prediction = streamer.update('p1', history[3:13], index=12)
+
+    assert streamer.stats['duplicates'] == 1
+    assert streamer.stats['incremental_steps'] == 3
+    np.testing.assert_allclose(prediction, [reference_forward(layers, history[:13])], rtol=1e-5)
+    assert first != prediction
+
+
+def test_gap_larger_than_window_restarts_stream():
+    streamer = StreamingLSTM(random_layers(), PatientStateCache())
+    streamer.update('p1', np.zeros(10), index=9)
+    streamer.update('p1', np.ones(10), index=50)
+    assert streamer.stats['full_windows'] == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = PatientStateCache(max_patients=2)
+    streamer = StreamingLSTM(random_layers(), cache)
+    for patient_id in ('a', 'b'):
+        streamer.update(patient_id, np.zeros(5))
+    streamer.update('a', np.zeros(5))
+    streamer.update('c', np.zeros(5))
+
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.stats['evictions'] == 1
+
+
+def test_cache_expires_quiet_patients():
+    now = [0.0]
+    cache = PatientStateCache(ttl_seconds=60, clock=lambda: now[0])
+    streamer = StreamingLSTM(random_layers(), cache)
+    streamer.update('a', np.zeros(5))
+    streamer.update('b', np.zeros(5))
+
+    now[0] = 30.0
+    streamer.update('b', np.zeros(5))
+    now[0] = 70.0
+    assert cache.evict_expired() == 1
+    assert cache.get('a') is None
+    assert cache.get('b') is not None
+
+
+def test_requires_an_lstm_layer():
+    with pytest.raises(ValueError):
+        StreamingLSTM([DenseLayer(np.ones((1, 1)))], PatientStateCache())
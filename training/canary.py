@@ -0,0 +1,272 @@
+import math
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from metric_queries import (MetricQueryEngine, Series, align_time, endpoint_dimensions, metric_query,
+                            series_sum)
+from rollout import ModelRollout
+from utils import get_query_engine, logger, log_metric
+
+METRIC_PERIOD = 60
+
+# Smallest baseline error rate used in the error test, so a variant with no
+# errors yet still gives finite likelihoods
+MIN_ERROR_RATE = 1e-4
+
+
+def sprt_bounds(alpha: float, beta: float) -> Tuple[float, float]:
+    """
+    Wald's log-likelihood-ratio thresholds.
+
+    Args:
+        alpha: Chance of calling a regression when there is none
+        beta: Chance of missing a regression of the size tested for
+
+    Returns:
+        Tuple[float, float]: Accept-H0 (no regression) and reject-H0 (regression) bounds
+    """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def error_rate_llr(invocations: float, errors: float, baseline_rate: float,
+                   error_ratio: float = 2.0, min_increase: float = 0.005) -> float:
+    """
+    Log-likelihood ratio that the new variant's error rate is regressed.
+
+    Bernoulli SPRT on the new variant's requests: H0 says it fails at the old
+    variant's rate p0, H1 at p1 = max(p0 * error_ratio, p0 + min_increase).
+    The old variant carries most of the traffic, so its rate is used as a
+    plug-in estimate of p0.
+    """
+    p0 = max(baseline_rate, MIN_ERROR_RATE)
+    p1 = min(max(p0 * error_ratio, p0 + min_increase), 1 - MIN_ERROR_RATE)
+    return errors * math.log(p1 / p0) + (invocations - errors) * math.log((1 - p1) / (1 - p0))
+
+
+def latency_llr(differences: Sequence[float], shift: float, variances: Sequence[float]) -> float:
+    """
+    Log-likelihood ratio that latency is regressed by `shift`.
+
+    Normal SPRT on per-period differences (new minus old mean latency), each
+    with its own variance: H0 says they average 0, H1 that they average
+    `shift`.
+    """
+    return sum(shift / variance * (difference - shift / 2) for difference, variance in zip(differences, variances))
+
+
+class SequentialComparison:
+    """
+    Sequential tests of the new variant against the old one.
+
+    The error test is a Bernoulli SPRT on the new variant's requests (see
+    error_rate_llr). The latency test is a normal SPRT on the per-minute
+    difference in mean ModelLatency, for a slowdown of latency_ratio relative
+    to the old variant. A minute's variance is the larger of the spread of
+    the differences so far and the sampling variance of its two means
+    (mean² / requests, as for exponential service times), so minutes where
+    the new variant saw few requests count for little. The tests can be
+    re-evaluated as data arrives without inflating their error rates.
+
+    The result is 'regression' as soon as either test rejects H0, and
+    'no_regression' once both accept it. Otherwise it is 'continue'.
+
+    Args:
+        alpha: False-regression rate of each test
+        beta: Missed-regression rate of each test
+        error_ratio: Relative error-rate increase to detect
+        min_increase: Smallest absolute error-rate increase to detect
+        latency_ratio: Relative latency increase to detect
+        min_latency_points: Minutes with traffic on both variants before
+            the latency test can decide
+    """
+
+    def __init__(self, alpha: float = 0.05, beta: float = 0.05, error_ratio: float = 2.0,
+                 min_increase: float = 0.005, latency_ratio: float = 1.2, min_latency_points: int = 3):
+        self.lower, self.upper = sprt_bounds(alpha, beta)
+        self.error_ratio = error_ratio
+        self.min_increase = min_increase
+        self.latency_ratio = latency_ratio
+        self.min_latency_points = min_latency_points
+
+    def evaluate(self, old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compare cumulative observations of the two variants.
+
+        Args:
+            old: invocations, errors, and latency_ms and requests (per-minute
+                mean latency and invocations by timestamp) for the old variant
+            new: The same for the new variant
+
+        Returns:
+            Dict[str, Any]: decision, error and latency log-likelihood ratios
+                (latency is None until there are enough points), error rates
+                and mean latencies
+        """
+        baseline_rate = old['errors'] / old['invocations'] if old['invocations'] else 0.0
+        error_llr = error_rate_llr(new['invocations'], new['errors'], baseline_rate,
+                                   self.error_ratio, self.min_increase)
+
+        shared = sorted(set(old['latency_ms']) & set(new['latency_ms']))
+        old_latency = statistics.fmean(old['latency_ms'][t] for t in shared) if shared else None
+        new_latency = statistics.fmean(new['latency_ms'][t] for t in shared) if shared else None
+        lat_llr = None
+        if len(shared) >= self.min_latency_points and old_latency:
+            differences = [new['latency_ms'][t] - old['latency_ms'][t] for t in shared]
+            shift = (self.latency_ratio - 1) * old_latency
+            spread = statistics.variance(differences)
+            variances = [max(spread, old['latency_ms'][t] ** 2 / max(old['requests'].get(t, 1), 1)
+                             + new['latency_ms'][t] ** 2 / max(new['requests'].get(t, 1), 1))
+                         for t in shared]
+            lat_llr = latency_llr(differences, shift, variances)
+
+        if error_llr >= self.upper or (lat_llr is not None and lat_llr >= self.upper):
+            decision = 'regression'
+        elif error_llr <= self.lower and lat_llr is not None and lat_llr <= self.lower:
+            decision = 'no_regression'
+        else:
+            decision = 'continue'
+
+        return {
+            'decision': decision,
+            'error_llr': round(error_llr, 3),
+            'latency_llr': round(lat_llr, 3) if lat_llr is not None else None,
+            'old_error_rate': baseline_rate,
+            'new_error_rate': new['errors'] / new['invocations'] if new['invocations'] else None,
+            'old_latency_ms': old_latency,
+            'new_latency_ms': new_latency
+        }
+
+
+class CanaryController:
+    """
+    Progressive canary rollout of the endpoint's new variant.
+
+    Walks the traffic schedule with ModelRollout.update_endpoint_weights.
+    Every poll it reads both variants' invocations, 4XX/5XX errors and
+    per-minute ModelLatency since the rollout began, and runs the sequential
+    comparison:
+      - regression: traffic goes back to the old variant and the rollback
+        path runs
+      - no_regression with at least min_invocations on the new variant: the
+        new variant is promoted to 100% straight away
+      - otherwise the step runs for step_minutes before moving on, and the
+        new variant is promoted once the schedule is done
+
+    Args:
+        rollout: Rollout for the endpoint
+        engine: Metric query engine (defaults to the shared, cached one)
+        schedule: New-variant traffic percentages before 100
+        step_minutes: Longest time spent at a step
+        poll_minutes: Time between evaluations
+        min_invocations: New-variant requests needed before promoting early
+        comparison: The sequential tests
+        rollback: Called after traffic is shifted back (defaults to ModelRollback)
+        now: Current time, tz-aware
+        sleep: Waits a number of seconds
+    """
+
+    def __init__(self, rollout: ModelRollout, engine: Optional[MetricQueryEngine] = None,
+                 schedule: Sequence[int] = (5, 10, 25, 50), step_minutes: int = 10, poll_minutes: int = 2,
+                 min_invocations: int = 500, comparison: Optional[SequentialComparison] = None,
+                 rollback: Optional[Callable[[], Any]] = None,
+                 now: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+                 sleep: Callable[[float], Any] = time.sleep):
+        if any(not 0 < percentage < 100 for percentage in schedule):
+            raise ValueError("Schedule percentages must be between 0 and 100")
+        self.rollout = rollout
+        self.engine = engine or get_query_engine()
+        self.schedule = list(schedule)
+        self.step_minutes = step_minutes
+        self.poll_minutes = poll_minutes
+        self.min_invocations = min_invocations
+        self.comparison = comparison or SequentialComparison()
+        self.rollback = rollback or self._default_rollback
+        self.now = now
+        self.sleep = sleep
+        self.history: List[Dict[str, Any]] = []
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the rollout to promotion or rollback.
+
+        Returns:
+            Dict[str, Any]: decision (promoted, promoted_early or rolled_back),
+                the new variant's final percentage, the reason, and the
+                evaluation history
+        """
+        old_variant, new_variant = self.rollout.variant_names()
+        started = align_time(self.now(), METRIC_PERIOD)
+        logger.info(f"Canary of {new_variant} against {old_variant} on {self.rollout.endpoint_name}: "
+                    f"schedule {self.schedule}")
+
+        for percentage in self.schedule:
+            self.rollout.update_endpoint_weights(percentage)
+            step_end = self.now() + timedelta(minutes=self.step_minutes)
+            while self.now() < step_end:
+                self.sleep(self.poll_minutes * 60)
+                old, new = self.observe(old_variant, new_variant, started)
+                evaluation = self.comparison.evaluate(old, new)
+                evaluation.update({'percentage': percentage, 'time': self.now().isoformat(),
+                                   'old_invocations': old['invocations'], 'new_invocations': new['invocations']})
+                self.history.append(evaluation)
+                logger.info(f"Canary at {percentage}%: {evaluation}")
+
+                if evaluation['decision'] == 'regression':
+                    return self._roll_back(percentage, evaluation)
+                if evaluation['decision'] == 'no_regression' and new['invocations'] >= self.min_invocations:
+                    return self._promote('promoted_early', f"no regression after {new['invocations']:.0f} requests")
+
+        return self._promote('promoted', "schedule completed without a regression")
+
+    def observe(self, old_variant: str, new_variant: str, since: datetime) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Each variant's invocations, errors and per-minute mean latency (ms) since `since`."""
+        end = align_time(self.now(), METRIC_PERIOD)
+        fetched = self.engine.fetch_many({
+            variant: (self._queries(variant), since, end) for variant in (old_variant, new_variant)
+        })
+        return self._summarize(fetched[old_variant]), self._summarize(fetched[new_variant])
+
+    def _queries(self, variant: str) -> List[Dict[str, Any]]:
+        dimensions = endpoint_dimensions(self.rollout.endpoint_name, variant)
+        return [
+            metric_query('invocations', 'AWS/SageMaker', 'Invocations', 'Sum', dimensions, METRIC_PERIOD),
+            metric_query('errors_4xx', 'AWS/SageMaker', 'Invocation4XXErrors', 'Sum', dimensions, METRIC_PERIOD),
+            metric_query('errors_5xx', 'AWS/SageMaker', 'Invocation5XXErrors', 'Sum', dimensions, METRIC_PERIOD),
+            metric_query('latency', 'AWS/SageMaker', 'ModelLatency', 'Average', dimensions, METRIC_PERIOD)
+        ]
+
+    @staticmethod
+    def _summarize(series: Dict[str, Series]) -> Dict[str, Any]:
+        empty = {'timestamps': [], 'values': []}
+        latency = series.get('latency') or empty
+        invocations = series.get('invocations') or empty
+        return {
+            'invocations': series_sum(invocations),
+            'errors': series_sum(series.get('errors_4xx')) + series_sum(series.get('errors_5xx')),
+            # ModelLatency is in microseconds
+            'latency_ms': {t: v / 1000 for t, v in zip(latency['timestamps'], latency['values'])},
+            'requests': dict(zip(invocations['timestamps'], invocations['values']))
+        }
+
+    def _promote(self, decision: str, reason: str) -> Dict[str, Any]:
+        self.rollout.update_endpoint_weights(100)
+        logger.info(f"Canary {decision}: {reason}")
+        log_metric("CanaryOutcome", 1, dimensions=[{'Name': 'Decision', 'Value': decision}])
+        return {'decision': decision, 'percentage': 100, 'reason': reason, 'history': self.history}
+
+    def _roll_back(self, percentage: int, evaluation: Dict[str, Any]) -> Dict[str, Any]:
+        reason = (f"regression at {percentage}%: error rate {evaluation['new_error_rate']} vs "
+                  f"{evaluation['old_error_rate']}, latency {evaluation['new_latency_ms']} vs "
+                  f"{evaluation['old_latency_ms']} ms")
+        logger.error(f"Canary rolling back: {reason}")
+        # Returns once the traffic shift has finished, so SageMaker accepts
+        # the rollback's UpdateEndpoint
+        self.rollout.update_endpoint_weights(0)
+        self.rollback()
+        log_metric("CanaryOutcome", 1, dimensions=[{'Name': 'Decision', 'Value': 'rolled_back'}])
+        return {'decision': 'rolled_back', 'percentage': 0, 'reason': reason, 'history': self.history}
+
+    def _default_rollback(self) -> None:
+        from rollback import ModelRollback
+        ModelRollback(self.rollout.endpoint_name, self.rollout.clients).perform_rollback()
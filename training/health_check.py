@@ -1,44 +1,60 @@
 import argparse
-from typing import Dict, Any
-from utils import setup_aws_clients, logger, log_metric
+from typing import Dict, Any, List, Optional
+from metric_queries import MetricQueryEngine, endpoint_health, endpoint_variant_names
+from utils import ENDPOINT_NAME, get_query_engine, setup_aws_clients, logger, log_metric
+
+# Minimum success rate by check type
+SUCCESS_THRESHOLDS = {
+    'pre-deployment': 0.95,
+    'during-rollout': 0.98,  # Higher threshold during rollout
+    'post-deployment': 0.99  # Highest for post-deployment
+}
 
 class EndpointHealthCheck:
-    def __init__(self):
-        self.clients = setup_aws_clients()
-        
-    def check_endpoint_metrics(self) -> Dict[str, Any]:
-        """Check endpoint CloudWatch metrics."""
+    """
+    Check an endpoint's success rate over a recent window.
+
+    The endpoint as a whole and each named variant are checked; during a
+    rollout that catches a bad new variant whose errors would be diluted by
+    the old one's traffic. SageMaker only publishes per-variant metrics, so
+    the endpoint-wide numbers are combined from all the variants listed by
+    describe_endpoint.
+
+    Args:
+        endpoint_name: SageMaker endpoint
+        variant_names: Production variants to check on their own
+        window_minutes: How far back to look
+        allow_no_traffic: Pass scopes that had no invocations in the window
+        engine: Metric query engine (defaults to the shared, cached one)
+        clients: AWS clients by name, for describe_endpoint
+    """
+
+    def __init__(self, endpoint_name: str = ENDPOINT_NAME, variant_names: Optional[List[str]] = None,
+                 window_minutes: int = 10, allow_no_traffic: bool = False,
+                 engine: Optional[MetricQueryEngine] = None, clients: Optional[Dict[str, Any]] = None):
+        self.endpoint_name = endpoint_name
+        self.variant_names = variant_names or []
+        self.window_minutes = window_minutes
+        self.allow_no_traffic = allow_no_traffic
+        self.engine = engine or get_query_engine()
+        self.clients = clients or setup_aws_clients()
+
+    def check_endpoint_metrics(self) -> Dict[Optional[str], Dict[str, Any]]:
+        """
+        Success rate and latency percentiles for the endpoint and each variant.
+
+        Returns:
+            Dict[Optional[str], Dict[str, Any]]: Health summary by variant
+                name; None is the endpoint as a whole
+        """
         try:
-            response = self.clients['cloudwatch'].get_metric_data(
-                MetricDataQueries=[
-                    {
-                        'Id': 'invocations',
-                        'MetricStat': {
-                            'Metric': {
-                                'Namespace': 'AWS/SageMaker',
-                                'MetricName': 'Invocations'
-                            },
-                            'Period': 300,
-                            'Stat': 'Sum'
-                        }
-                    },
-                    {
-                        'Id': 'latency',
-                        'MetricStat': {
-                            'Metric': {
-                                'Namespace': 'AWS/SageMaker',
-                                'MetricName': 'ModelLatency'
-                            },
-                            'Period': 300,
-                            'Stat': 'Average'
-                        }
-                    }
-                ],
-                StartTime='StartTime',
-                EndTime='EndTime'
-            )
-            return response
-            
+            variants = endpoint_variant_names(self.clients['sagemaker'], self.endpoint_name)
+            unknown = set(self.variant_names) - set(variants)
+            if unknown:
+                raise ValueError(f"{self.endpoint_name} has no variants {sorted(unknown)}")
+            health = endpoint_health(self.engine, self.endpoint_name, variants, self.window_minutes)
+            return {scope: health[scope] for scope in [None] + self.variant_names}
+
         except Exception as e:
             logger.error(f"Error checking endpoint metrics: {e}")
             raise
@@ -47,42 +63,54 @@ class EndpointHealthCheck:
         """Run comprehensive health check."""
         try:
             metrics = self.check_endpoint_metrics()
-            
-            # Define thresholds based on check type
-            if check_type == 'pre-deployment':
-                threshold = 0.95  # 95% success rate
-            elif check_type == 'during-rollout':
-                threshold = 0.98  # Higher threshold during rollout
-            else:
-                threshold = 0.99  # Highest for post-deployment
-                
-            # Calculate health score
-            success_rate = metrics['success_rate']
-            is_healthy = success_rate >= threshold
-            
-            # Log results
-            log_metric("HealthCheckScore", 
-                      success_rate,
-                      dimensions=[{'Name': 'CheckType', 'Value': check_type}])
-                      
+            threshold = SUCCESS_THRESHOLDS.get(check_type, SUCCESS_THRESHOLDS['post-deployment'])
+
+            is_healthy = True
+            for variant, summary in metrics.items():
+                scope = variant or self.endpoint_name
+                success_rate = summary['success_rate']
+                if success_rate is None:
+                    logger.warning(f"No invocations for {scope} in the last {self.window_minutes} minutes")
+                    is_healthy = is_healthy and self.allow_no_traffic
+                    continue
+
+                logger.info(f"{scope}: success rate {success_rate:.4f} over {summary['invocations']:.0f} "
+                            f"invocations, p95 latency {summary['latency_p95_ms']} ms")
+                is_healthy = is_healthy and success_rate >= threshold
+
+                # Log results
+                dimensions = [{'Name': 'CheckType', 'Value': check_type}]
+                if variant:
+                    dimensions.append({'Name': 'VariantName', 'Value': variant})
+                log_metric("HealthCheckScore", success_rate, dimensions=dimensions)
+                if summary['latency_p95_ms'] is not None:
+                    log_metric("HealthCheckLatencyP95", summary['latency_p95_ms'], unit='Milliseconds',
+                               dimensions=dimensions)
+
             return is_healthy
-            
+
         except Exception as e:
             logger.error(f"Health check failed: {e}")
             return False
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument('--check-type', 
+    parser.add_argument('--check-type',
                        choices=['pre-deployment', 'during-rollout', 'post-deployment'],
                        required=True)
+    parser.add_argument('--endpoint-name', default=ENDPOINT_NAME)
+    parser.add_argument('--variant', action='append', default=[],
+                       help='Also check this production variant on its own (repeatable)')
+    parser.add_argument('--window-minutes', type=int, default=10)
+    parser.add_argument('--allow-no-traffic', action='store_true')
     args = parser.parse_args()
-    
-    health_checker = EndpointHealthCheck()
+
+    health_checker = EndpointHealthCheck(args.endpoint_name, args.variant, args.window_minutes,
+                                         args.allow_no_traffic)
     is_healthy = health_checker.run_health_check(args.check_type)
-    
+
     if not is_healthy:
         raise Exception("Health check failed")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,308 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# get_metric_data accepts up to 500 queries per call
+MAX_QUERIES_PER_CALL = 500
+
+# A series is {'timestamps': [...], 'values': [...]}, oldest first
+Series = Dict[str, List]
+
+
+def metric_query(query_id: str, namespace: str, metric_name: str, stat: str,
+                 dimensions: Optional[List[Dict[str, str]]] = None, period: int = 60) -> Dict[str, Any]:
+    """A get_metric_data MetricDataQuery for one metric and statistic."""
+    return {
+        'Id': query_id,
+        'MetricStat': {
+            'Metric': {'Namespace': namespace, 'MetricName': metric_name, 'Dimensions': dimensions or []},
+            'Period': period,
+            'Stat': stat
+        },
+        'ReturnData': True
+    }
+
+
+def endpoint_dimensions(endpoint_name: str, variant_name: Optional[str] = None) -> List[Dict[str, str]]:
+    """Dimensions for a SageMaker endpoint, or one of its production variants."""
+    dimensions = [{'Name': 'EndpointName', 'Value': endpoint_name}]
+    if variant_name:
+        dimensions.append({'Name': 'VariantName', 'Value': variant_name})
+    return dimensions
+
+
+def endpoint_variant_names(sagemaker: Any, endpoint_name: str) -> List[str]:
+    """
+    The endpoint's production variants, in the order it lists them.
+
+    SageMaker publishes the AWS/SageMaker invocation metrics only with both
+    the EndpointName and VariantName dimensions, so endpoint-wide numbers
+    have to be combined from every variant's series.
+    """
+    response = sagemaker.describe_endpoint(EndpointName=endpoint_name)
+    return [variant['VariantName'] for variant in response['ProductionVariants']]
+
+
+def align_time(when: datetime, period: int = 60) -> datetime:
+    """Round a time down to a period boundary."""
+    return datetime.fromtimestamp(int(when.timestamp()) // period * period, timezone.utc)
+
+
+def time_window(minutes: int, period: int = 60, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """
+    The last `minutes` up to now, aligned to period boundaries.
+
+    Aligned windows are what CloudWatch serves fastest, and they make
+    repeated checks within a period hit the same cache entries.
+    """
+    end = align_time(now or datetime.now(timezone.utc), period)
+    return end - timedelta(minutes=minutes), end
+
+
+class MetricQueryEngine:
+    """
+    Fetch CloudWatch metric series in parallel, with pagination and a TTL cache.
+
+    fetch() resolves one set of queries over a window: cached series are
+    reused, the rest are split into get_metric_data calls of up to 500
+    queries that run on a thread pool, each following NextToken until the
+    series are complete. fetch_many() runs several independent requests at
+    once. Series are cached per metric, statistic, period and window for
+    cache_ttl seconds, so repeated rollout checks don't query CloudWatch
+    again.
+
+    Args:
+        cloudwatch: CloudWatch client
+        max_workers: Concurrent get_metric_data calls
+        cache_ttl: Seconds a fetched series is reused (0 disables the cache)
+        clock: Monotonic clock for cache expiry
+    """
+
+    def __init__(self, cloudwatch: Any, max_workers: int = 4, cache_ttl: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.cloudwatch = cloudwatch
+        self.cache_ttl = cache_ttl
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='metric-query')
+        self._cache: Dict[str, Tuple[float, Series]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'pages': 0, 'cache_hits': 0, 'cache_misses': 0}
+
+    def fetch(self, queries: Sequence[Dict[str, Any]], start: datetime, end: datetime) -> Dict[str, Series]:
+        """
+        Series for each query over [start, end).
+
+        Returns:
+            Dict[str, Series]: Series by query Id
+        """
+        results: Dict[str, Series] = {}
+        missing = []
+        for query in queries:
+            cached = self._cached(self._cache_key(query, start, end))
+            if cached is None:
+                missing.append(query)
+            else:
+                results[query['Id']] = cached
+
+        batches = [missing[i:i + MAX_QUERIES_PER_CALL] for i in range(0, len(missing), MAX_QUERIES_PER_CALL)]
+        for fetched in self._executor.map(lambda batch: self._fetch_batch(batch, start, end), batches):
+            results.update(fetched)
+        return results
+
+    def fetch_many(self, requests: Dict[str, Tuple[Sequence[Dict[str, Any]], datetime, datetime]]
+                   ) -> Dict[str, Dict[str, Series]]:
+        """
+        Run independent fetch() requests concurrently.
+
+        Args:
+            requests: (queries, start, end) by request name
+
+        Returns:
+            Dict[str, Dict[str, Series]]: fetch() results by request name
+        """
+        # Each request's batches go to the shared pool; waiting happens on
+        # separate threads so a request can't starve on its own batches
+        with ThreadPoolExecutor(max_workers=max(1, len(requests)), thread_name_prefix='metric-request') as pool:
+            futures = {name: pool.submit(self.fetch, *request) for name, request in requests.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _fetch_batch(self, queries: List[Dict[str, Any]], start: datetime, end: datetime) -> Dict[str, Series]:
+        self._count('calls')
+        series: Dict[str, List[Tuple[datetime, float]]] = {query['Id']: [] for query in queries}
+        kwargs = {'MetricDataQueries': queries, 'StartTime': start, 'EndTime': end, 'ScanBy': 'TimestampAscending'}
+        while True:
+            response = self.cloudwatch.get_metric_data(**kwargs)
+            self._count('pages')
+            for result in response['MetricDataResults']:
+                series[result['Id']].extend(zip(result['Timestamps'], result['Values']))
+            if not response.get('NextToken'):
+                break
+            kwargs['NextToken'] = response['NextToken']
+
+        results = {}
+        for query in queries:
+            points = sorted(series[query['Id']], key=lambda point: point[0])
+            results[query['Id']] = {'timestamps': [t for t, _ in points], 'values': [v for _, v in points]}
+            self._store(self._cache_key(query, start, end), results[query['Id']])
+        return results
+
+    @staticmethod
+    def _cache_key(query: Dict[str, Any], start: datetime, end: datetime) -> str:
+        # The Id only names the result within a call, so it isn't part of the key
+        return json.dumps([query['MetricStat'], start.isoformat(), end.isoformat()], sort_keys=True)
+
+    def _cached(self, key: str) -> Optional[Series]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and self.clock() - entry[0] < self.cache_ttl:
+                self.stats['cache_hits'] += 1
+                return entry[1]
+            self.stats['cache_misses'] += 1
+            return None
+
+    def _store(self, key: str, series: Series) -> None:
+        if self.cache_ttl > 0:
+            with self._lock:
+                now = self.clock()
+                # Re-inserting keeps the dict in store order, so expired entries sit at the front
+                self._cache.pop(key, None)
+                self._cache[key] = (now, series)
+                for stale in list(self._cache):
+                    if now - self._cache[stale][0] < self.cache_ttl:
+                        break
+                    del self._cache[stale]
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+
+def series_sum(series: Optional[Series]) -> float:
+    return float(sum(series['values'])) if series else 0.0
+
+
+def series_mean(series: Optional[Series]) -> Optional[float]:
+    if not series or not series['values']:
+        return None
+    return float(sum(series['values']) / len(series['values']))
+
+
+def series_last(series: Optional[Series]) -> Optional[float]:
+    return float(series['values'][-1]) if series and series['values'] else None
+
+
+LATENCY_PERCENTILES = ('p50', 'p95', 'p99')
+
+
+def endpoint_health_queries(endpoint_name: str, variant_name: str, window_seconds: int,
+                            period: int = 60) -> List[Dict[str, Any]]:
+    """
+    Queries behind endpoint_health() for one variant: invocation and error
+    counts per period, and ModelLatency percentiles over the whole window.
+
+    Percentiles of different periods can't be combined, so those are asked
+    for with a single period covering the window.
+    """
+    dimensions = endpoint_dimensions(endpoint_name, variant_name)
+    queries = [
+        metric_query('invocations', 'AWS/SageMaker', 'Invocations', 'Sum', dimensions, period),
+        metric_query('errors_4xx', 'AWS/SageMaker', 'Invocation4XXErrors', 'Sum', dimensions, period),
+        metric_query('errors_5xx', 'AWS/SageMaker', 'Invocation5XXErrors', 'Sum', dimensions, period),
+        metric_query('latency_avg', 'AWS/SageMaker', 'ModelLatency', 'Average', dimensions, window_seconds)
+    ]
+    queries += [metric_query(f'latency_{p}', 'AWS/SageMaker', 'ModelLatency', p, dimensions, window_seconds)
+                for p in LATENCY_PERCENTILES]
+    return queries
+
+
+def summarize_endpoint_health(series: Dict[str, Series]) -> Dict[str, Any]:
+    """
+    Derived health numbers from endpoint_health_queries() results.
+
+    Returns:
+        Dict[str, Any]: invocations, errors_4xx, errors_5xx, success_rate
+            (None without invocations) and latency_avg_ms / latency_pXX_ms
+            (None without datapoints); ModelLatency is in microseconds
+    """
+    invocations = series_sum(series.get('invocations'))
+    errors_4xx = series_sum(series.get('errors_4xx'))
+    errors_5xx = series_sum(series.get('errors_5xx'))
+    summary: Dict[str, Any] = {
+        'invocations': invocations,
+        'errors_4xx': errors_4xx,
+        'errors_5xx': errors_5xx,
+        'success_rate': max(0.0, 1 - (errors_4xx + errors_5xx) / invocations) if invocations else None
+    }
+    for stat in ('avg',) + LATENCY_PERCENTILES:
+        value = series_mean(series.get(f'latency_{stat}'))
+        summary[f'latency_{stat}_ms'] = value / 1000 if value is not None else None
+    return summary
+
+
+def combine_endpoint_health(summaries: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Endpoint-wide health from the summaries of all its variants.
+
+    Counts add up and the average latency is weighted by invocations.
+    Percentiles can't be combined exactly, so each is the largest of the
+    variants' values: an upper bound on the endpoint-wide percentile.
+    """
+    invocations = sum(summary['invocations'] for summary in summaries)
+    errors_4xx = sum(summary['errors_4xx'] for summary in summaries)
+    errors_5xx = sum(summary['errors_5xx'] for summary in summaries)
+    combined: Dict[str, Any] = {
+        'invocations': invocations,
+        'errors_4xx': errors_4xx,
+        'errors_5xx': errors_5xx,
+        'success_rate': max(0.0, 1 - (errors_4xx + errors_5xx) / invocations) if invocations else None
+    }
+    weighted = [(summary['latency_avg_ms'], summary['invocations']) for summary in summaries
+                if summary['latency_avg_ms'] is not None and summary['invocations']]
+    combined['latency_avg_ms'] = (sum(latency * count for latency, count in weighted)
+                                  / sum(count for _, count in weighted)) if weighted else None
+    for p in LATENCY_PERCENTILES:
+        values = [summary[f'latency_{p}_ms'] for summary in summaries if summary[f'latency_{p}_ms'] is not None]
+        combined[f'latency_{p}_ms'] = max(values) if values else None
+    return combined
+
+
+def endpoint_health(engine: MetricQueryEngine, endpoint_name: str, variant_names: Sequence[str],
+                    window_minutes: int = 10, period: int = 60,
+                    now: Optional[datetime] = None) -> Dict[Optional[str], Dict[str, Any]]:
+    """
+    Success rate and latency for each of an endpoint's variants, fetched
+    concurrently, and for the endpoint as a whole.
+
+    Args:
+        engine: Query engine to fetch through
+        endpoint_name: SageMaker endpoint
+        variant_names: All the endpoint's production variants (see
+            endpoint_variant_names); the endpoint-wide numbers are combined
+            from them
+        window_minutes: How far back to look
+
+    Returns:
+        Dict[Optional[str], Dict[str, Any]]: summarize_endpoint_health() by
+            variant, and combine_endpoint_health() under None
+    """
+    start, end = time_window(window_minutes, period, now)
+    window_seconds = int((end - start).total_seconds())
+    fetched = engine.fetch_many({
+        variant: (endpoint_health_queries(endpoint_name, variant, window_seconds, period), start, end)
+        for variant in variant_names
+    })
+    health: Dict[Optional[str], Dict[str, Any]] = {
+        variant: summarize_endpoint_health(series) for variant, series in fetched.items()
+    }
+    health[None] = combine_endpoint_health(list(health.values()))
+    return health
@@ -0,0 +1,130 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# put_metric_data accepts up to 1000 datums per call
+MAX_BATCH_SIZE = 1000
+
+
+class _Flush:
+    """Queue marker: send everything queued before it, then signal."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class MetricShipper:
+    """
+    Ship CloudWatch datums from a background thread so callers never block.
+
+    put() only appends to a bounded queue. A daemon thread drains it, sending
+    a batch once batch_size datums are waiting or flush_interval seconds after
+    the first datum of a batch arrived. When the queue is full new datums are
+    dropped, and failed sends are logged rather than raised; both are counted
+    in stats.
+
+    Args:
+        send: Called with a list of datums, e.g. a put_metric_data wrapper
+        max_queue: Datums held before new ones are dropped
+        batch_size: Datums per send (at most 1000)
+        flush_interval: Seconds a datum may wait for its batch to fill
+    """
+
+    def __init__(self,
+                 send: Callable[[List[Dict[str, Any]]], Any],
+                 max_queue: int = 10000,
+                 batch_size: int = MAX_BATCH_SIZE,
+                 flush_interval: float = 5.0):
+        self.send = send
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.stats = {'queued': 0, 'sent': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+
+    def put(self, datum: Dict[str, Any]) -> bool:
+        """Queue one datum without blocking. Returns False if it was dropped."""
+        if self._closed:
+            self._count('dropped')
+            return False
+        self._start()
+        try:
+            self._queue.put_nowait(datum)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('queued')
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far has been sent. Returns False on timeout."""
+        if self._thread is None:
+            return True
+        marker = _Flush()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Flush and stop accepting datums; used at interpreter exit."""
+        flushed = self.flush(timeout)
+        self._closed = True
+        if self.stats['dropped'] or self.stats['failed']:
+            logger.warning(f"Metric shipper dropped {self.stats['dropped']} and failed to send "
+                           f"{self.stats['failed']} datums")
+        return flushed
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += amount
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='metric-shipper', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, _Flush):
+                self._send(batch)
+                batch, deadline = [], None
+                item.done.set()
+                continue
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                self._send(batch)
+                batch, deadline = [], None
+
+    def _send(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        try:
+            self.send(batch)
+            self._count('sent', len(batch))
+        except Exception as e:
+            self._count('failed', len(batch))
+            logger.error(f"Failed to send {len(batch)} metrics: {e}")
+        finally:
+            self._count('batches')
@@ -1,46 +1,77 @@
-from utils import setup_aws_clients, logger, log_metric
+import os
+from typing import Any, Dict, Optional
+from metric_queries import (MetricQueryEngine, endpoint_dimensions, endpoint_variant_names, metric_query,
+                            series_mean, time_window)
+from utils import ENDPOINT_NAME, get_query_engine, setup_aws_clients, logger, log_metric
+
+# Model accuracy as published by the model monitoring Lambda
+ACCURACY_NAMESPACE = 'Healthcare/ML'
+MODEL_VERSION = os.getenv('MODEL_VERSION', 'current')
+MODEL_ENVIRONMENT = os.getenv('MODEL_ENVIRONMENT', 'production')
 
 class ModelPerformanceCheck:
-    def __init__(self):
-        self.clients = setup_aws_clients()
-        
+    def __init__(self, endpoint_name: str = ENDPOINT_NAME, window_minutes: int = 30,
+                 engine: Optional[MetricQueryEngine] = None, clients: Optional[Dict[str, Any]] = None):
+        self.endpoint_name = endpoint_name
+        self.window_minutes = window_minutes
+        self.engine = engine or get_query_engine()
+        self.clients = clients or setup_aws_clients()
+
+    def get_performance_metrics(self) -> Dict[str, Any]:
+        """
+        Mean model accuracy and endpoint p95 latency (ms) over the window.
+
+        ModelLatency is only published per variant, and percentiles can't be
+        combined, so the endpoint's p95 is the slowest variant's.
+        """
+        start, end = time_window(self.window_minutes, 300)
+        window_seconds = int((end - start).total_seconds())
+        model_dimensions = [{'Name': 'ModelVersion', 'Value': MODEL_VERSION},
+                            {'Name': 'Environment', 'Value': MODEL_ENVIRONMENT}]
+
+        latency_queries = [
+            metric_query(f'latency_{i}', 'AWS/SageMaker', 'ModelLatency', 'p95',
+                         endpoint_dimensions(self.endpoint_name, variant), window_seconds)
+            for i, variant in enumerate(endpoint_variant_names(self.clients['sagemaker'], self.endpoint_name))
+        ]
+
+        # The two come from different namespaces and are fetched concurrently
+        fetched = self.engine.fetch_many({
+            'accuracy': ([metric_query('accuracy', ACCURACY_NAMESPACE, 'ModelAccuracy', 'Average',
+                                       model_dimensions, 300)], start, end),
+            'latency': (latency_queries, start, end)
+        })
+        latencies = [latency for latency in map(series_mean, fetched['latency'].values()) if latency is not None]
+        return {
+            'accuracy': series_mean(fetched['accuracy']['accuracy']),
+            'latency': max(latencies) / 1000 if latencies else None  # ModelLatency is in microseconds
+        }
+
     def validate_performance(self) -> bool:
         """Validate model performance metrics."""
         try:
             # Get model metrics
-            metrics = self.clients['cloudwatch'].get_metric_data(
-                MetricDataQueries=[
-                    {
-                        'Id': 'accuracy',
-                        'MetricStat': {
-                            'Metric': {
-                                'Namespace': 'MLOps/ModelMetrics',
-                                'MetricName': 'ModelAccuracy'
-                            },
-                            'Period': 300,
-                            'Stat': 'Average'
-                        }
-                    }
-                ],
-                StartTime='StartTime',
-                EndTime='EndTime'
-            )
-            
+            metrics = self.get_performance_metrics()
+
             # Define performance thresholds
             accuracy_threshold = 0.95
             latency_threshold = 100  # ms
-            
+
             # Check if performance meets thresholds
-            meets_threshold = (
-                metrics['accuracy'] >= accuracy_threshold and
-                metrics['latency'] <= latency_threshold
-            )
-            
-            log_metric("PerformanceValidation", 
+            if metrics['accuracy'] is None or metrics['latency'] is None:
+                logger.warning(f"No performance data in the last {self.window_minutes} minutes: {metrics}")
+                meets_threshold = False
+            else:
+                meets_threshold = (
+                    metrics['accuracy'] >= accuracy_threshold and
+                    metrics['latency'] <= latency_threshold
+                )
+
+            log_metric("PerformanceValidation",
                       1 if meets_threshold else 0)
-                      
+
             return meets_threshold
-            
+
         except Exception as e:
             logger.error(f"Performance validation failed: {e}")
             log_metric("PerformanceValidationError", 1)
@@ -52,4 +83,4 @@ def main():
         raise Exception("Performance validation failed")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
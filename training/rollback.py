@@ -1,8 +1,10 @@
-from utils import setup_aws_clients, logger, log_metric
+from typing import Any, Dict, Optional
+from utils import ENDPOINT_NAME, setup_aws_clients, wait_for_endpoint, logger, log_metric
 
 class ModelRollback:
-    def __init__(self):
-        self.clients = setup_aws_clients()
+    def __init__(self, endpoint_name: str = ENDPOINT_NAME, clients: Optional[Dict[str, Any]] = None):
+        self.endpoint_name = endpoint_name
+        self.clients = clients or setup_aws_clients()
         
     def perform_rollback(self) -> None:
         """Rollback to previous model version."""
@@ -12,15 +14,19 @@ class ModelRollback:
                 EndpointConfigName='previous-config'
             )
             
+            # An update still in progress (e.g. a traffic shift) would make
+            # SageMaker reject this one
+            wait_for_endpoint(self.clients['sagemaker'], self.endpoint_name)
+
             # Update endpoint to use previous configuration
             self.clients['sagemaker'].update_endpoint(
-                EndpointName='endpoint-name',
+                EndpointName=self.endpoint_name,
                 EndpointConfigName='previous-config'
             )
             
             log_metric("RollbackExecuted", 
                       1,
-                      dimensions=[{'Name': 'Endpoint', 'Value': 'endpoint-name'}])
+                      dimensions=[{'Name': 'Endpoint', 'Value': self.endpoint_name}])
                       
             logger.info("Rollback completed successfully")
             
@@ -1,53 +1,72 @@
 import argparse
-from utils import setup_aws_clients, logger, log_metric
+import os
+from typing import Any, Dict, Optional, Tuple
+from metric_queries import endpoint_variant_names
+from utils import ENDPOINT_NAME, setup_aws_clients, wait_for_endpoint, logger, log_metric
 
 class ModelRollout:
-    def __init__(self):
-        self.clients = setup_aws_clients()
-        
+    def __init__(self, endpoint_name: str = ENDPOINT_NAME, clients: Optional[Dict[str, Any]] = None):
+        self.endpoint_name = endpoint_name
+        self.clients = clients or setup_aws_clients()
+
+    def variant_names(self) -> Tuple[str, str]:
+        """Names of the old and new production variants (first and second on the endpoint)."""
+        variants = endpoint_variant_names(self.clients['sagemaker'], self.endpoint_name)
+        return variants[0], variants[1]
+
     def update_endpoint_weights(self, percentage: int) -> None:
-        """Update traffic distribution for endpoint."""
+        """Update traffic distribution for endpoint, returning once the endpoint is back in service."""
         try:
-            endpoint_config = self.clients['sagemaker'].describe_endpoint_config(
-                EndpointConfigName='current-config'
-            )
-            
+            old_variant, new_variant = self.variant_names()
+
             # Calculate weights
             new_weight = percentage / 100.0
             old_weight = 1 - new_weight
-            
-            # Update variant weights
-            variants = endpoint_config['ProductionVariants']
-            variants[0]['VariantWeight'] = old_weight  # Old model
-            variants[1]['VariantWeight'] = new_weight  # New model
-            
-            # Create new config
-            self.clients['sagemaker'].create_endpoint_config(
-                EndpointConfigName=f"config-{percentage}percent",
-                ProductionVariants=variants
-            )
-            
-            # Update endpoint
-            self.clients['sagemaker'].update_endpoint(
-                EndpointName='endpoint-name',
-                EndpointConfigName=f"config-{percentage}percent"
+
+            # Shift traffic in place; unlike a new endpoint config this
+            # doesn't redeploy the variants
+            self.clients['sagemaker'].update_endpoint_weights_and_capacities(
+                EndpointName=self.endpoint_name,
+                DesiredWeightsAndCapacities=[
+                    {'VariantName': old_variant, 'DesiredWeight': old_weight},  # Old model
+                    {'VariantName': new_variant, 'DesiredWeight': new_weight}   # New model
+                ]
             )
-            
-            log_metric("RolloutPercentage", 
+            wait_for_endpoint(self.clients['sagemaker'], self.endpoint_name)
+
+            log_metric("RolloutPercentage",
                       percentage,
-                      dimensions=[{'Name': 'Endpoint', 'Value': 'endpoint-name'}])
-                      
+                      dimensions=[{'Name': 'Endpoint', 'Value': self.endpoint_name}])
+
         except Exception as e:
             logger.error(f"Error updating endpoint weights: {e}")
             raise
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument('--percentage', type=int, required=True)
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--percentage', type=int)
+    mode.add_argument('--canary', action='store_true',
+                      help='Walk the traffic schedule, promoting or rolling back automatically')
+    parser.add_argument('--schedule', default='5,10,25,50',
+                        help='Canary traffic percentages for the new variant, before 100')
+    parser.add_argument('--step-minutes', type=int, default=10)
     args = parser.parse_args()
-    
+
     rollout = ModelRollout()
-    rollout.update_endpoint_weights(args.percentage)
+    if args.canary:
+        from canary import CanaryController
+        schedule = [int(percentage) for percentage in args.schedule.split(',')]
+        result = CanaryController(rollout, schedule=schedule, step_minutes=args.step_minutes).run()
+        # The controller has already rolled back; the workflow reads the
+        # decision so its own rollback step doesn't run a second one
+        if os.getenv('GITHUB_OUTPUT'):
+            with open(os.environ['GITHUB_OUTPUT'], 'a') as output:
+                output.write(f"decision={result['decision']}\n")
+        if result['decision'] == 'rolled_back':
+            raise Exception(f"Canary rolled back: {result['reason']}")
+    else:
+        rollout.update_endpoint_weights(args.percentage)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
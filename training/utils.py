@@ -1,42 +1,124 @@
+import atexit
 import logging
-import boto3
+import os
+import threading
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timezone
 from botocore.exceptions import ClientError
+from emf import emit_emf
+from aws_clients import get_client
+from metric_shipper import MetricShipper
+from metric_queries import MetricQueryEngine
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+METRICS_NAMESPACE = 'MLOps/ModelMetrics'
+# 'api' calls put_metric_data; 'emf' writes Embedded Metric Format lines to stdout,
+# which CloudWatch Logs turns into metrics when stdout is shipped there
+METRICS_BACKEND = os.getenv('METRICS_BACKEND', 'api').lower()
+# API metrics are queued and sent from a background thread; whatever is still
+# queued at exit gets up to METRICS_FLUSH_TIMEOUT seconds to go out
+METRICS_QUEUE_SIZE = int(os.getenv('METRICS_QUEUE_SIZE', '10000'))
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+METRICS_FLUSH_TIMEOUT = float(os.getenv('METRICS_FLUSH_TIMEOUT', '5'))
+
+# Endpoint the rollout scripts act on
+ENDPOINT_NAME = os.getenv('ENDPOINT_NAME', 'endpoint-name')
+# Metric series read back from CloudWatch are reused for METRIC_CACHE_TTL seconds
+METRIC_CACHE_TTL = float(os.getenv('METRIC_CACHE_TTL', '60'))
+METRIC_QUERY_WORKERS = int(os.getenv('METRIC_QUERY_WORKERS', '4'))
+# An endpoint update is polled every ENDPOINT_WAIT_DELAY seconds, up to
+# ENDPOINT_WAIT_ATTEMPTS times, until the endpoint is back in service
+ENDPOINT_WAIT_DELAY = int(os.getenv('ENDPOINT_WAIT_DELAY', '30'))
+ENDPOINT_WAIT_ATTEMPTS = int(os.getenv('ENDPOINT_WAIT_ATTEMPTS', '60'))
+
+_shipper = None
+_shipper_lock = threading.Lock()
+_query_engine = None
+_query_engine_lock = threading.Lock()
+
+# setup_aws_clients() keys, and the services behind them
+CLIENT_SERVICES = {
+    'sagemaker': 'sagemaker',
+    'cloudwatch': 'cloudwatch',
+    'runtime': 'sagemaker-runtime'
+}
+
+class AwsClients(dict):
+    """Clients by short name, each created on first access and shared process-wide."""
+
+    def __missing__(self, name: str):
+        client = self[name] = get_client(CLIENT_SERVICES.get(name, name))
+        return client
+
 def setup_aws_clients():
-    """Initialise AWS clients with error handling."""
-    try:
-        return {
-            'sagemaker': boto3.client('sagemaker'),
-            'cloudwatch': boto3.client('cloudwatch'),
-            'runtime': boto3.client('sagemaker-runtime')
-        }
-    except Exception as e:
-        logger.error(f"Failed to initialise AWS clients: {e}")
-        raise 
-
-def log_metric(name: str, value: float, unit: str = 'None', dimensions: Optional[Dict] = None):
-    """"Send metric to CloudWatch."""
-    try: 
-        clients = setup_aws_clients()
-        clients['cloudwatch'].put_metric_data(
-            Namespace = 'MLOps/ModelMetrics',
-            MetricData = [{
-                'MetricName': name,
-                'Value': value,
-                'Unit': unit,
-                'Timestamp': datetime.now(timezone.utc),
-                'Dimensions': dimensions or []
-            }]
-        )
-    except Exception as e:
-        logger.error(f"Failed to log metric {name}: {e}")
-        raise 
-
-    
\ No newline at end of file
+    """AWS clients by name; each is created lazily and cached (see aws_clients)."""
+    return AwsClients()
+
+def wait_for_endpoint(sagemaker: Any, endpoint_name: str) -> None:
+    """
+    Block until the endpoint is InService.
+
+    SageMaker rejects UpdateEndpoint and UpdateEndpointWeightsAndCapacities
+    while an earlier update is still in progress.
+    """
+    sagemaker.get_waiter('endpoint_in_service').wait(
+        EndpointName = endpoint_name,
+        WaiterConfig = {'Delay': ENDPOINT_WAIT_DELAY, 'MaxAttempts': ENDPOINT_WAIT_ATTEMPTS})
+
+def put_metric_data(datums: List[Dict[str, Any]]):
+    """Send datums to CloudWatch in one call (at most 1000)."""
+    get_client('cloudwatch').put_metric_data(Namespace = METRICS_NAMESPACE, MetricData = datums)
+
+def get_metric_shipper() -> MetricShipper:
+    """The process-wide metric shipper, flushed at interpreter exit."""
+    global _shipper
+    with _shipper_lock:
+        if _shipper is None:
+            _shipper = MetricShipper(put_metric_data,
+                                     max_queue = METRICS_QUEUE_SIZE,
+                                     flush_interval = METRICS_FLUSH_INTERVAL)
+            atexit.register(_shipper.close, METRICS_FLUSH_TIMEOUT)
+        return _shipper
+
+def get_query_engine() -> MetricQueryEngine:
+    """The process-wide metric query engine, so checks share its cache."""
+    global _query_engine
+    with _query_engine_lock:
+        if _query_engine is None:
+            _query_engine = MetricQueryEngine(get_client('cloudwatch'),
+                                              max_workers = METRIC_QUERY_WORKERS,
+                                              cache_ttl = METRIC_CACHE_TTL)
+        return _query_engine
+
+def log_metric(name: str, value: float, unit: str = 'None', dimensions: Optional[List[Dict]] = None,
+               high_resolution: bool = False) -> bool:
+    """
+    Record a metric without waiting on CloudWatch.
+
+    With the api backend the datum is queued for the background shipper;
+    with the emf backend it is written to stdout as an EMF log line.
+
+    Returns:
+        bool: False if the datum was dropped because the queue was full
+    """
+    if METRICS_BACKEND == 'emf':
+        emit_emf(METRICS_NAMESPACE,
+                 [{'name': name, 'value': value, 'unit': unit, 'high_resolution': high_resolution}],
+                 {d['Name']: d['Value'] for d in dimensions or []})
+        return True
+
+    queued = get_metric_shipper().put({
+        'MetricName': name,
+        'Value': value,
+        'Unit': unit,
+        'Timestamp': datetime.now(timezone.utc),
+        'Dimensions': dimensions or [],
+        'StorageResolution': 1 if high_resolution else 60
+    })
+    if not queued:
+        logger.warning(f"Metric queue full, dropped {name}")
+    return queued